@@ -1,7 +1,15 @@
-from flask import Flask, render_template, request, redirect, url_for, send_from_directory, flash
+from flask import (Flask, Response, render_template, request, redirect, url_for, send_from_directory, flash,
+                   jsonify, stream_with_context)
 import os
+import json
+import uuid
+import shutil
 from werkzeug.utils import secure_filename
-from core.similarity import process_uploaded_file
+from core.similarity import process_uploaded_file, ETAPAS_ANALISE
+from core.modelos import MODELO_PADRAO, iniciar_aquecimento, estado_aquecimento, modelos_prontos, identificador_modelo
+from core.fila_analises import FilaAnalises, FilaCheia, NA_FILA, CONCLUIDA, ERRO
+from core.resultados_analises import ResultadosAnalises, TIPOS_RELATORIO
+from core.cache_resultados import obter_cache_resultados, chave_resultado, salvar_com_hash
 
 BASE_DIR = os.path.dirname(__file__)
 UPLOAD_FOLDER = os.path.join(BASE_DIR, 'uploads')
@@ -14,72 +22,281 @@ app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.secret_key = 'troque_para_uma_chave_secreta'
 
+# Modelos aquecidos na subida do worker (lista separada por vírgulas)
+MODELOS_AQUECIMENTO = [
+    nome.strip() for nome in os.environ.get('BNCC_MODELOS_AQUECIMENTO', MODELO_PADRAO).split(',')
+    if nome.strip()
+]
+
+# No modo debug o reloader do Werkzeug executa este módulo duas vezes;
+# só o processo filho (WERKZEUG_RUN_MAIN) atende requisições e precisa do modelo
+if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    iniciar_aquecimento(MODELOS_AQUECIMENTO)
+
+# Análises de /process executadas em segundo plano (ver core/fila_analises.py)
+fila_analises = FilaAnalises()
+# Resultado de cada análise pelo id, para a página de resultados e /get_report
+resultados_analises = ResultadosAnalises()
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def mensagem_erro(error_msg):
+    """Mensagens de erro mais amigáveis"""
+    if "Colunas ausentes" in error_msg:
+        return f"Estrutura de arquivo incorreta: {error_msg}"
+    if "não encontrado" in error_msg:
+        return f"Arquivo de referência não encontrado: {error_msg}"
+    if "Formato de arquivo" in error_msg:
+        return "Formato de arquivo não suportado. Use .xlsx, .xls ou .csv"
+    return f"Erro durante o processamento: {error_msg}"
+
+def analisar_upload(saved_path, segment, nota_corte, chave_curriculo, id_analise, chave_cache=None,
+                    progresso=None):
+    """
+    Tarefa da fila: analisa o arquivo enviado, guarda o resultado em
+    resultados_analises (e no cache de resultados, com `chave_cache`) e apaga a
+    pasta do upload ao fim
+    """
+    try:
+        print(f"🔄 Processando arquivo: {os.path.basename(saved_path)}")
+        print(f"📋 Segmento: {segment}")
+        print(f"🎯 Nota de corte: {nota_corte}")
+        if chave_curriculo:
+            from core.reanalise import reanalisar_curriculo
+            resultado = reanalisar_curriculo(saved_path, segment, nota_corte, chave_curriculo, progresso=progresso)
+        else:
+            # Início do id no nome dos relatórios: análises simultâneas do mesmo
+            # segmento não gravam por cima umas das outras
+            resultado = process_uploaded_file(saved_path, segment, nota_corte, id_analise[:8], progresso=progresso)
+    finally:
+        shutil.rmtree(os.path.dirname(saved_path), ignore_errors=True)
+    resultados_analises.guardar(id_analise, resultado, {'segmento': segment, 'nota_corte': nota_corte})
+    cache = obter_cache_resultados() if chave_cache else None
+    if cache is not None:
+        try:
+            cache.gravar(chave_cache, resultado)
+        except Exception as e:
+            print(f"⚠️ Resultado não gravado no cache: {e}")
+    # A tarefa fica só com o resumo e os arquivos; o restante está em resultados_analises
+    return {'resumo': resultado['resumo'], 'files': resultado['files']}
+
+def analisar_upload_abas(saved_path, segment, nota_corte, abas, progresso=None):
+    """Tarefa da fila de /process_abas: analisa as abas e apaga a pasta do upload ao fim"""
+    from core.analise_abas import analisar_abas
+    try:
+        resultado = analisar_abas(saved_path, segment, nota_corte, abas, progresso=progresso)
+    finally:
+        shutil.rmtree(os.path.dirname(saved_path), ignore_errors=True)
+    return {
+        'resumo': None,
+        'files': {'indice': resultado['indice']},
+        'erros': resultado['erros'],
+        'abas': {aba: {'resumo': r['resumo'], 'files': r['files']} for aba, r in resultado['abas'].items()},
+    }
+
+def links_arquivos(files):
+    """URLs de download dos arquivos gerados"""
+    return {tipo: url_for('download', filepath=caminho.replace(os.sep, '/'))
+            for tipo, caminho in files.items() if caminho}
+
+def situacao_tarefa(tarefa):
+    """Estado da tarefa para /jobs/<id>: etapas, posição na fila e links do resultado"""
+    situacao = tarefa.situacao()
+    situacao['posicao_fila'] = fila_analises.posicao(tarefa) if tarefa.estado == NA_FILA else None
+    if situacao['erro']:
+        situacao['erro'] = mensagem_erro(situacao['erro'])
+    situacao['links'] = {'status': url_for('job', id_tarefa=tarefa.id),
+                         'eventos': url_for('eventos_job', id_tarefa=tarefa.id)}
+    if tarefa.estado == CONCLUIDA:
+        situacao['resumo'] = tarefa.resultado.get('resumo')
+        situacao['links']['arquivos'] = links_arquivos(tarefa.resultado.get('files', {}))
+        if 'abas' in tarefa.resultado:
+            # Análise por abas: resumo e arquivos de cada aba, sem página de resultados
+            situacao['erros_abas'] = tarefa.resultado['erros']
+            situacao['abas'] = {aba: {'resumo': r['resumo'], 'arquivos': links_arquivos(r['files'])}
+                                for aba, r in tarefa.resultado['abas'].items()}
+        else:
+            situacao['links']['resultado'] = url_for('resultado_job', id_tarefa=tarefa.id)
+    return situacao
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.route('/ready')
+def ready():
+    """Prontidão para o balanceador: 200 só depois do aquecimento dos modelos"""
+    estado = estado_aquecimento()
+    estado['pronto'] = modelos_prontos()
+    return jsonify(estado), (200 if estado['pronto'] else 503)
+
 @app.route('/process', methods=['POST'])
 def process():
+    """
+    Enfileira a análise do arquivo enviado; 202 com o id e o link de /jobs/<id>
+    (200 e a análise já concluída, se o resultado estiver no cache)
+    """
     # Validar arquivo
     if 'file' not in request.files:
-        flash('Nenhum arquivo enviado')
-        return redirect(url_for('index'))
+        return jsonify({'erro': 'Nenhum arquivo enviado'}), 400
 
     file = request.files['file']
     if file.filename == '':
-        flash('Nenhum arquivo selecionado')
-        return redirect(url_for('index'))
+        return jsonify({'erro': 'Nenhum arquivo selecionado'}), 400
 
     if not allowed_file(file.filename):
-        flash('Formato não permitido. Envie .xlsx, .xls ou .csv')
-        return redirect(url_for('index'))
+        return jsonify({'erro': 'Formato não permitido. Envie .xlsx, .xls ou .csv'}), 400
 
     segment = request.form.get('segment')
-    nota_corte = float(request.form.get('nota_corte', 0.8))
+    try:
+        nota_corte = float(request.form.get('nota_corte', 0.8))
+    except ValueError:
+        return jsonify({'erro': 'Nota de corte inválida'}), 400
+    # Identificação do currículo: com ela, a análise reaproveita a versão anterior
+    chave_curriculo = request.form.get('chave_curriculo', '').strip()
 
+    # Cada tarefa grava o upload na própria pasta (uploads/<id>/)
+    id_tarefa = uuid.uuid4().hex
     filename = secure_filename(file.filename)
-    saved_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    file.save(saved_path)
+    pasta_upload = os.path.join(app.config['UPLOAD_FOLDER'], id_tarefa)
+    os.makedirs(pasta_upload)
+    saved_path = os.path.join(pasta_upload, filename)
+    # SHA-256 calculado enquanto o upload é gravado, para o cache de resultados
+    hash_upload = salvar_com_hash(file.stream, saved_path)
+    parametros = {'arquivo': filename, 'segmento': segment, 'nota_corte': nota_corte,
+                  'chave_curriculo': chave_curriculo or None}
+
+    # Mesmo arquivo, segmento, nota de corte e modelo já analisados: resultado guardado
+    # na hora. A reanálise por chave_curriculo sempre roda (versiona o currículo)
+    cache = None if chave_curriculo else obter_cache_resultados()
+    chave_cache = None
+    if cache is not None:
+        try:
+            chave_cache = chave_resultado(hash_upload, segment, nota_corte, identificador_modelo(MODELO_PADRAO))
+        except Exception:
+            # Segmento inválido: a própria análise informa o erro
+            chave_cache = None
+        resultado = cache.obter(chave_cache) if chave_cache else None
+        if resultado is not None:
+            shutil.rmtree(pasta_upload, ignore_errors=True)
+            print(f"♻️ Resultado do cache para {filename} ({segment}, nota de corte {nota_corte})")
+            resultados_analises.guardar(id_tarefa, resultado, {'segmento': segment, 'nota_corte': nota_corte})
+            tarefa = fila_analises.registrar_concluida(
+                {'resumo': resultado['resumo'], 'files': resultado['files']},
+                parametros=parametros, id_tarefa=id_tarefa)
+            situacao = situacao_tarefa(tarefa)
+            situacao['cache'] = True
+            return jsonify(situacao), 200, {'Location': url_for('job', id_tarefa=tarefa.id)}
 
-    # Processar (sincrono)
     try:
-        print(f"🔄 Processando arquivo: {filename}")
-        print(f"📋 Segmento: {segment}")
-        print(f"🎯 Nota de corte: {nota_corte}")
-        
-        resultado = process_uploaded_file(saved_path, segment, nota_corte)
-        
-        print("✅ Processamento concluído com sucesso!")
-        
-        # Armazenar informações da última análise para as rotas de relatório
-        app.config['LAST_ANALYSIS'] = resultado
-        
-        return render_template('results.html', 
-                             resumo=resultado.get('resumo'), 
-                             files=resultado.get('files'), 
-                             top_matches=resultado.get('top_matches'),
-                             segment=segment,
-                             nota_corte=nota_corte)
-                             
-    except Exception as e:
-        error_msg = str(e)
-        print(f"❌ Erro durante o processamento: {error_msg}")
-        
-        # Mensagens de erro mais amigáveis
-        if "Colunas ausentes" in error_msg:
-            flash(f"Estrutura de arquivo incorreta: {error_msg}")
-        elif "não encontrado" in error_msg:
-            flash(f"Arquivo de referência não encontrado: {error_msg}")
-        elif "Formato de arquivo" in error_msg:
-            flash("Formato de arquivo não suportado. Use .xlsx, .xls ou .csv")
+        tarefa = fila_analises.enfileirar(
+            analisar_upload, saved_path, segment, nota_corte, chave_curriculo, id_tarefa, chave_cache,
+            parametros=parametros, etapas=ETAPAS_ANALISE, id_tarefa=id_tarefa)
+    except FilaCheia as e:
+        shutil.rmtree(pasta_upload, ignore_errors=True)
+        return jsonify({'erro': str(e)}), 503, {'Retry-After': '30'}
+
+    return jsonify(situacao_tarefa(tarefa)), 202, {'Location': url_for('job', id_tarefa=tarefa.id)}
+
+@app.route('/jobs/<id_tarefa>')
+def job(id_tarefa):
+    """Estado, etapa atual e duração de cada etapa da análise; links do resultado ao concluir"""
+    tarefa = fila_analises.obter(id_tarefa)
+    if tarefa is None:
+        return jsonify({'erro': 'Análise não encontrada'}), 404
+    return jsonify(situacao_tarefa(tarefa))
+
+@app.route('/jobs/<id_tarefa>/eventos')
+def eventos_job(id_tarefa):
+    """
+    Fluxo SSE da análise: o mesmo JSON de /jobs/<id> a cada mudança de etapa, de
+    contagem ou de posição na fila, até a análise terminar
+    """
+    tarefa = fila_analises.obter(id_tarefa)
+    if tarefa is None:
+        return jsonify({'erro': 'Análise não encontrada'}), 404
+
+    def eventos():
+        enviado = None
+        while True:
+            situacao = situacao_tarefa(tarefa)
+            chave = (situacao['versao'], situacao['posicao_fila'])
+            if chave != enviado:
+                enviado = chave
+                yield f"id: {situacao['versao']}\ndata: {json.dumps(situacao, ensure_ascii=False)}\n\n"
+            else:
+                # Comentário SSE: mantém a conexão aberta em proxies
+                yield ": ativo\n\n"
+            if situacao['estado'] in (CONCLUIDA, ERRO):
+                return
+            # Na fila, a posição muda sem aviso da tarefa: consulta mais vezes
+            tarefa.esperar_mudanca(situacao['versao'], timeout=2 if situacao['estado'] == NA_FILA else 15)
+
+    return Response(stream_with_context(eventos()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/jobs/<id_tarefa>/resultado')
+def resultado_job(id_tarefa):
+    """Página de resultados da análise concluída"""
+    guardado = resultados_analises.obter(id_tarefa)
+    if guardado is None:
+        tarefa = fila_analises.obter(id_tarefa)
+        if tarefa is not None and tarefa.estado == ERRO:
+            flash(mensagem_erro(tarefa.erro))
+        elif tarefa is not None and tarefa.estado != CONCLUIDA:
+            flash('A análise ainda está em andamento.')
         else:
-            flash(f"Erro durante o processamento: {error_msg}")
-        
+            flash('Análise não encontrada ou expirada. Faça uma nova análise.')
         return redirect(url_for('index'))
 
+    return render_template('results.html', 
+                         id_analise=guardado.id,
+                         resumo=guardado.resumo, 
+                         files=guardado.files, 
+                         top_matches=guardado.top_matches,
+                         segment=guardado.parametros['segmento'],
+                         nota_corte=guardado.parametros['nota_corte'])
+
+@app.route('/process_abas', methods=['POST'])
+def process_abas():
+    """
+    Enfileira a análise de todas as abas (ou das listadas em 'abas', separadas por
+    vírgula) da pasta de trabalho; 202 com o id e o link de /jobs/<id>
+    """
+    from core.analise_abas import ETAPAS_ABAS
+
+    file = request.files.get('file')
+    if file is None or file.filename == '':
+        return jsonify({'erro': 'Nenhum arquivo enviado'}), 400
+    if not file.filename.lower().endswith(('.xlsx', '.xls')):
+        return jsonify({'erro': 'A análise por abas exige um arquivo .xlsx ou .xls'}), 400
+
+    segment = request.form.get('segment')
+    try:
+        nota_corte = float(request.form.get('nota_corte', 0.8))
+    except ValueError:
+        return jsonify({'erro': 'Nota de corte inválida'}), 400
+    abas = [aba.strip() for aba in request.form.get('abas', '').split(',') if aba.strip()] or None
+
+    id_tarefa = uuid.uuid4().hex
+    filename = secure_filename(file.filename)
+    pasta_upload = os.path.join(app.config['UPLOAD_FOLDER'], id_tarefa)
+    os.makedirs(pasta_upload)
+    saved_path = os.path.join(pasta_upload, filename)
+    file.save(saved_path)
+
+    try:
+        tarefa = fila_analises.enfileirar(
+            analisar_upload_abas, saved_path, segment, nota_corte, abas,
+            parametros={'arquivo': filename, 'segmento': segment, 'nota_corte': nota_corte, 'abas': abas},
+            etapas=ETAPAS_ABAS, id_tarefa=id_tarefa)
+    except FilaCheia as e:
+        shutil.rmtree(pasta_upload, ignore_errors=True)
+        return jsonify({'erro': str(e)}), 503, {'Retry-After': '30'}
+
+    return jsonify(situacao_tarefa(tarefa)), 202, {'Location': url_for('job', id_tarefa=tarefa.id)}
+
 @app.route('/download/<path:filepath>')
 def download(filepath):
     # filepath é relativo à pasta src
@@ -88,6 +305,34 @@ def download(filepath):
     filename = os.path.basename(full_path)
     return send_from_directory(directory, filename, as_attachment=True)
 
+@app.route('/matriz/<path:filepath>')
+def matriz(filepath):
+    """
+    Maiores similaridades de uma habilidade BNCC (?bncc=código ou posição) ou de
+    uma linha do currículo (?curriculo=...) na matriz gravada pela análise
+    """
+    from core.matriz_similaridade import abrir_matriz
+
+    full_path = os.path.realpath(os.path.join(BASE_DIR, filepath))
+    docs_dir = os.path.realpath(os.path.join(BASE_DIR, 'docs'))
+    # commonpath compara por componentes: docs_old/ não passa por docs/
+    if not filepath.endswith('.npy') or os.path.commonpath([full_path, docs_dir]) != docs_dir:
+        return jsonify({'erro': 'Matriz inválida'}), 400
+    if not os.path.exists(full_path):
+        return jsonify({'erro': 'Matriz não encontrada'}), 404
+
+    def chave(valor):
+        return int(valor) if valor is not None and valor.isdigit() else valor
+
+    try:
+        matriz_similaridade = abrir_matriz(full_path)
+        similares = matriz_similaridade.mais_similares(
+            bncc=chave(request.args.get('bncc')), curriculo=chave(request.args.get('curriculo')),
+            limite=int(request.args.get('limite', 10)))
+    except (KeyError, ValueError, IndexError) as e:
+        return jsonify({'erro': e.args[0] if e.args else str(e)}), 400
+    return jsonify({'forma': list(matriz_similaridade.shape), 'similares': similares})
+
 @app.route('/download_template/<template_name>')
 def download_template(template_name):
     """Download dos templates de currículo"""
@@ -106,41 +351,24 @@ def download_template(template_name):
     
     return send_from_directory(template_path, filename, as_attachment=True)
 
-@app.route('/get_report/<report_type>')
-def get_report(report_type):
-    """Serve os relatórios detalhados para as abas"""
+@app.route('/get_report/<id_analise>/<report_type>')
+def get_report(id_analise, report_type):
+    """Serve os relatórios detalhados para as abas, da memória (resultados_analises)"""
+    if report_type not in TIPOS_RELATORIO:
+        return "Tipo de relatório não reconhecido.", 400
+
+    guardado = resultados_analises.obter(id_analise)
+    if guardado is None:
+        return "Análise não encontrada ou expirada. Faça uma nova análise primeiro.", 404
+
     try:
-        # Usar os dados da última análise
-        last_analysis = app.config.get('LAST_ANALYSIS')
-        if not last_analysis:
-            return "Nenhuma análise recente encontrada. Faça uma nova análise primeiro."
-        
-        files = last_analysis.get('files', {})
-        
-        if report_type == 'executive':
-            # Buscar arquivo de resumo executivo
-            resumo_path = files.get('resumo_executivo')
-            if resumo_path:
-                full_path = os.path.join(BASE_DIR, resumo_path)
-                if os.path.exists(full_path):
-                    with open(full_path, 'r', encoding='utf-8') as f:
-                        return f.read()
-            return "Resumo executivo não encontrado."
-                
-        elif report_type == 'detailed':
-            # Buscar arquivo de relatório detalhado
-            detalhado_path = files.get('relatorio_detalhado')
-            if detalhado_path:
-                full_path = os.path.join(BASE_DIR, detalhado_path)
-                if os.path.exists(full_path):
-                    with open(full_path, 'r', encoding='utf-8') as f:
-                        return f.read()
-            return "Relatório detalhado não encontrado."
-        
-        return "Tipo de relatório não reconhecido."
-        
+        texto = guardado.relatorio(report_type)
     except Exception as e:
-        return f"Erro ao carregar relatório: {e}"
+        return f"Erro ao carregar relatório: {e}", 500
+    if texto is None:
+        nome = "Resumo executivo" if report_type == 'executive' else "Relatório detalhado"
+        return f"{nome} não encontrado.", 404
+    return texto
 
 if __name__ == '__main__':
     app.run(debug=True)
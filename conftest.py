@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Fixtures compartilhadas pelos testes que rodam análises completas
+"""
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core import modelos, artefatos_bncc, tabelas_parquet, reanalise
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def ambiente_offline(tmp_path, monkeypatch):
+    """
+    Backend 'hash', artefatos BNCC, tabelas Parquet e versões em diretório
+    temporário, sem cache de embeddings; remove os relatórios listados em docs/
+    """
+    monkeypatch.setattr(modelos, 'BACKEND_PADRAO', 'hash')
+    monkeypatch.setattr(artefatos_bncc, 'DIRETORIO_ARTEFATOS', str(tmp_path / 'bncc'))
+    monkeypatch.setattr(tabelas_parquet, 'DIRETORIO_PARQUET', str(tmp_path / 'parquet'))
+    monkeypatch.setattr(reanalise, 'DIRETORIO_VERSOES', str(tmp_path / 'versoes'))
+    monkeypatch.setenv('BNCC_CACHE_EMBEDDINGS', '0')
+    gerados = []
+    yield gerados
+    for caminho in gerados:
+        if caminho and os.path.exists(os.path.join(BASE_DIR, caminho)):
+            os.remove(os.path.join(BASE_DIR, caminho))
+            if caminho.endswith('.npy'):
+                indices = os.path.join(BASE_DIR, caminho[:-len('.npy')] + '_indices.json')
+                if os.path.exists(indices):
+                    os.remove(indices)
@@ -0,0 +1,172 @@
+import os
+import re
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import pandas as pd
+
+from core.modelos import obter_modelo, identificador_modelo, MODELO_PADRAO
+from core.artefatos_bncc import resolver_arquivo_bncc, carregar_referencia_bncc
+from core.leitura_upload import listar_abas, conferir_layout, ler_curriculo_enviado, validar_colunas
+from core.progresso import avisar_etapa, Avanco
+
+# ==================================================================================
+#               ANÁLISE DE TODAS AS ABAS DE UMA PASTA DE TRABALHO
+# ==================================================================================
+# Redes costumam enviar uma pasta de trabalho com uma aba por ano ou componente, e
+# process_uploaded_file só lê a primeira. Aqui cada aba escolhida (ou todas) é lida
+# e codificada no processo principal, com o modelo e os embeddings da BNCC
+# carregados uma vez; a similaridade, o algoritmo balanceado e os relatórios de
+# cada aba, independentes entre si, rodam em um pool de processos enquanto as abas
+# seguintes são codificadas. Os trabalhadores abrem o mesmo artefato BNCC (tabela
+# Arrow e embeddings .npy mapeados em memória), sem copiar a BNCC por aba.
+
+PROCESSOS_ABAS = int(os.environ.get('BNCC_ABAS_PROCESSOS', 0))  # 0 = min(abas, núcleos)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Etapas avisadas a `progresso` (fila de análises, /jobs/<id>)
+ETAPAS_ABAS = {
+    'validacao': 'Conferência do layout de cada aba',
+    'codificacao': 'Leitura e embeddings das abas',
+    'analise': 'Similaridade, algoritmo e relatórios por aba',
+    'indice': 'Índice combinado',
+}
+
+COLUNAS_INDICE = [
+    'aba', 'total_curriculo', 'habilidades_utilizadas', 'disciplinas_envolvidas',
+    'total_matches_acima_corte', 'nota_media_usada', 'eficiencia_uso',
+    'csv', 'resumo_executivo', 'relatorio_detalhado', 'heatmap', 'matriz', 'erro',
+]
+
+
+def _rotulos_arquivo(abas):
+    """Nome de cada aba seguro para nomes de arquivo e sem repetição"""
+    rotulos, usados = {}, set()
+    for aba in abas:
+        base = re.sub(r"\W+", '_', str(aba)).strip('_') or 'aba'
+        rotulo, n = base, 1
+        while rotulo in usados:
+            n += 1
+            rotulo = f"{base}_{n}"
+        usados.add(rotulo)
+        rotulos[aba] = rotulo
+    return rotulos
+
+
+def _analisar_aba(curriculo_df, curriculo_embeddings, bncc_path, modelo_id, segment, nota_corte, rotulo):
+    """Trabalhador: matching e relatórios de uma aba já codificada"""
+    from core.similarity import analisar_curriculo_codificado
+    referencia = carregar_referencia_bncc(bncc_path, modelo_id, construir_se_ausente=False)
+    bncc_df = referencia.dataframe()
+    bncc_df.columns = bncc_df.columns.str.strip()
+    return analisar_curriculo_codificado(curriculo_df, curriculo_embeddings, bncc_df, referencia.embeddings,
+                                         segment, nota_corte, modelo_id, rotulo,
+                                         codigos_bncc=referencia.indice_codigos())
+
+
+def _gravar_indice(resultados, erros, segment, abas):
+    """Índice combinado: uma linha por aba com o resumo e os arquivos gerados"""
+    linhas = []
+    for aba in abas:
+        if aba in resultados:
+            resumo = resultados[aba]['resumo']
+            linhas.append({'aba': aba, **{c: resumo[c] for c in COLUNAS_INDICE[1:-1]}})
+        else:
+            linhas.append({'aba': aba, 'erro': erros.get(aba)})
+
+    output_dir = os.path.join(BASE_DIR, 'docs', segment.replace(' ', '_'))
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    caminho = os.path.join(output_dir, f"{segment.replace(' ', '_')}_indice_abas_{timestamp}.csv")
+    pd.DataFrame(linhas, columns=COLUNAS_INDICE).convert_dtypes().to_csv(caminho, index=False, encoding='utf-8-sig')
+    return os.path.relpath(caminho, BASE_DIR)
+
+
+def analisar_abas(caminho, segment, nota_corte, abas=None, processos=None, progresso=None):
+    """
+    Analisa as abas `abas` (padrão: todas) da pasta de trabalho contra a BNCC do
+    segmento. Retorna os resultados por aba (mesmo formato de process_uploaded_file),
+    os erros por aba e o caminho do índice combinado.
+    """
+    disponiveis = listar_abas(caminho)
+    if not disponiveis:
+        raise Exception('A análise por abas exige uma pasta de trabalho (.xlsx ou .xls)')
+    abas = list(abas) if abas else disponiveis
+    desconhecidas = [aba for aba in abas if aba not in disponiveis]
+    if desconhecidas:
+        raise Exception(f'Abas não encontradas na pasta de trabalho: {desconhecidas}. Abas disponíveis: {disponiveis}')
+
+    avisar_etapa(progresso, 'validacao')
+    # Layout de cada aba conferido pelo cabeçalho; abas fora do layout (capa,
+    # instruções...) ficam de fora com o motivo no índice
+    erros = {}
+    for aba in abas:
+        try:
+            conferir_layout(caminho, segment, aba)
+        except Exception as e:
+            erros[aba] = str(e)
+    validas = [aba for aba in abas if aba not in erros]
+    if not validas:
+        raise Exception(f'Nenhuma aba com o layout do currículo: {erros}')
+
+    bncc_path = resolver_arquivo_bncc(segment)
+    if not os.path.exists(bncc_path):
+        raise Exception(f'Arquivo BNCC não encontrado: {bncc_path}')
+    modelo_id = identificador_modelo(MODELO_PADRAO)
+    referencia = carregar_referencia_bncc(bncc_path, modelo_id)
+    missing_bncc, required_bncc = validar_colunas(referencia.tabela.columns.str.strip(), 'bncc', segment)
+    if missing_bncc:
+        raise Exception(f'Colunas ausentes no arquivo BNCC: {missing_bncc}. Colunas necessárias: {required_bncc}.')
+    model = obter_modelo(modelo_id)
+
+    from core.similarity import gerar_embeddings_curriculo
+    processos = processos or PROCESSOS_ABAS or min(len(validas), os.cpu_count() or 1)
+    rotulos = _rotulos_arquivo(validas)
+    print(f"📑 Análise por abas: {len(validas)} de {len(abas)} abas, {processos} processo(s)")
+
+    executor = None
+    if processos > 1 and len(validas) > 1:
+        # spawn: fork de um processo com torch/threads já iniciados não é seguro
+        executor = ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context('spawn'))
+    pendentes, resultados = {}, {}
+    avanco_codificacao = Avanco(progresso, 'codificacao', len(validas), intervalo=0)
+    avanco_codificacao(0)
+    avanco_analise = Avanco(progresso, 'analise', len(validas), intervalo=0)
+    try:
+        for aba in validas:
+            try:
+                curriculo_df = ler_curriculo_enviado(caminho, segment, aba)
+                embeddings = gerar_embeddings_curriculo(model, curriculo_df, modelo_id)
+                argumentos = (curriculo_df, embeddings, bncc_path, modelo_id, segment, nota_corte, rotulos[aba])
+                # A aba é analisada no pool enquanto a próxima é lida e codificada
+                if executor is not None:
+                    pendentes[aba] = executor.submit(_analisar_aba, *argumentos)
+                else:
+                    resultados[aba] = _analisar_aba(*argumentos)
+                print(f"   📄 {aba}: {len(curriculo_df)} linhas")
+            except Exception as e:
+                erros[aba] = str(e)
+            avanco_codificacao.somar(1)
+        avanco_analise(len(resultados) + sum(1 for aba in validas if aba in erros))
+        for aba, futuro in pendentes.items():
+            try:
+                resultados[aba] = futuro.result()
+            except Exception as e:
+                erros[aba] = str(e)
+            avanco_analise(len(resultados) + sum(1 for aba in validas if aba in erros))
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    for aba, erro in erros.items():
+        print(f"⚠️ Aba '{aba}' não analisada: {erro}")
+
+    avisar_etapa(progresso, 'indice')
+
+    return {
+        'abas': {aba: resultados[aba] for aba in abas if aba in resultados},
+        'erros': erros,
+        'indice': _gravar_indice(resultados, erros, segment, abas),
+        'modelo_usado': modelo_id,
+    }
@@ -0,0 +1,239 @@
+import os
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+import pandas as pd
+
+from core.modelos import obter_modelo, identificador_modelo, MODELO_PADRAO
+from core.artefatos_bncc import resolver_arquivo_bncc, carregar_referencia_bncc, segmento_normalizado
+from core.leitura_upload import conferir_layout, ler_e_codificar_curriculo, validar_colunas
+from core.analise_abas import _rotulos_arquivo
+
+# ==================================================================================
+#                 ANÁLISE EM LOTE DOS CURRÍCULOS DE VÁRIAS REDES
+# ==================================================================================
+# A cada ciclo chegam currículos de dezenas de municípios; antes cada um era um
+# upload ou uma execução de anosiniciais.py com CONFIGURACOES editado. Aqui uma
+# lista de arquivos (um diretório ou um manifesto com o segmento de cada um) é
+# analisada em uma execução: o modelo e os embeddings da BNCC de cada segmento são
+# carregados uma vez, cada arquivo é lido e codificado no processo principal e o
+# matching/relatórios rodam em um pool de processos enquanto o próximo arquivo é
+# codificado. No máximo `processos` arquivos codificados ficam à espera do pool,
+# para a memória não crescer com o tamanho do lote.
+#
+# Saída (em `saida`): os relatórios de cada arquivo (docs/<segmento>/, com o nome
+# do arquivo no prefixo), todos os matches em um dataset Parquet particionado
+# (matches/segmento=<...>/arquivo=<...>/) e um resumo por arquivo (resumos.csv).
+
+PROCESSOS_LOTE = int(os.environ.get('BNCC_LOTE_PROCESSOS', 0))  # 0 = núcleos
+EXTENSOES_LOTE = ('.xlsx', '.xls', '.csv')
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_LOTES = os.path.join(BASE_DIR, 'artefatos', 'lotes')
+
+# Colunas do relatório CSV de cada arquivo, gravadas no dataset de matches
+COLUNAS_MATCHES = ['bncc_indice', 'bncc_codigo', 'bncc_objetivo', 'curriculo_indice',
+                   'curriculo_codigo', 'similaridade', 'nota_corte_usada']
+COLUNAS_TEXTO_MATCHES = ('bncc_codigo', 'bncc_objetivo', 'curriculo_codigo')
+
+COLUNAS_RESUMO = [
+    'arquivo', 'segmento', 'nota_corte', 'linhas_curriculo', 'total_curriculo',
+    'habilidades_utilizadas', 'disciplinas_envolvidas', 'total_matches_acima_corte',
+    'nota_media_usada', 'eficiencia_uso', 'csv', 'resumo_executivo',
+    'relatorio_detalhado', 'heatmap', 'matriz', 'erro',
+]
+
+
+def listar_diretorio(diretorio, segment, nota_corte):
+    """Itens do lote: todas as planilhas/CSVs do diretório, com o mesmo segmento"""
+    nomes = sorted(n for n in os.listdir(diretorio)
+                   if n.lower().endswith(EXTENSOES_LOTE) and not n.startswith(('~$', '.')))
+    return [{'arquivo': os.path.join(diretorio, n), 'segmento': segment, 'nota_corte': nota_corte}
+            for n in nomes]
+
+
+def ler_manifesto(caminho, nota_corte):
+    """
+    Itens do lote a partir de um CSV com as colunas `arquivo` e `segmento` (e,
+    opcional, `nota_corte`); caminhos relativos partem da pasta do manifesto.
+    Cada arquivo aparece uma vez: resultados e partições são indexados por ele.
+    """
+    manifesto = pd.read_csv(caminho, dtype=str, keep_default_na=False)
+    manifesto.columns = manifesto.columns.str.strip().str.lower()
+    ausentes = [c for c in ('arquivo', 'segmento') if c not in manifesto.columns]
+    if ausentes:
+        raise Exception(f'Colunas ausentes no manifesto: {ausentes}. Colunas disponíveis: {list(manifesto.columns)}')
+
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    itens, linhas_arquivo = [], {}
+    # Linha do manifesto como vista no editor (o cabeçalho é a linha 1)
+    for numero, (_, linha) in enumerate(manifesto.iterrows(), 2):
+        if not linha['arquivo'].strip():
+            continue
+        arquivo = os.path.join(pasta, linha['arquivo'].strip())
+        if os.path.normcase(os.path.abspath(arquivo)) in linhas_arquivo:
+            raise Exception(f"Manifesto, linha {numero}: '{linha['arquivo'].strip()}' já aparece na linha "
+                            f"{linhas_arquivo[os.path.normcase(os.path.abspath(arquivo))]}; "
+                            f"use um lote para cada segmento/nota de corte do mesmo arquivo")
+        linhas_arquivo[os.path.normcase(os.path.abspath(arquivo))] = numero
+        nota = linha.get('nota_corte', '').strip()
+        try:
+            nota = float(nota) if nota else nota_corte
+        except ValueError:
+            raise Exception(f"Manifesto, linha {numero}: nota_corte inválida '{nota}'") from None
+        itens.append({'arquivo': arquivo, 'segmento': linha['segmento'].strip(), 'nota_corte': nota})
+    return itens
+
+
+def _gravar_particao(relatorio, saida, segment, rotulo):
+    """Matches de um arquivo em matches/segmento=<...>/arquivo=<...>/parte-0.parquet"""
+    destino = os.path.join(saida, 'matches', f"segmento={segmento_normalizado(segment)}", f"arquivo={rotulo}")
+    os.makedirs(destino, exist_ok=True)
+    temporario = os.path.join(destino, f".parte-0.parquet.tmp-{os.getpid()}")
+    relatorio.to_parquet(temporario, index=False)
+    os.replace(temporario, os.path.join(destino, 'parte-0.parquet'))
+
+
+def _analisar_arquivo(curriculo_df, curriculo_embeddings, bncc_path, modelo_id, segment, nota_corte, rotulo, saida):
+    """Trabalhador: matching, relatórios e partição Parquet de um arquivo já codificado"""
+    from core.similarity import analisar_curriculo_codificado
+    referencia = carregar_referencia_bncc(bncc_path, modelo_id, construir_se_ausente=False)
+    bncc_df = referencia.dataframe()
+    bncc_df.columns = bncc_df.columns.str.strip()
+    resultado = analisar_curriculo_codificado(curriculo_df, curriculo_embeddings, bncc_df, referencia.embeddings,
+                                              segment, nota_corte, modelo_id, rotulo,
+                                              codigos_bncc=referencia.indice_codigos())
+    try:
+        relatorio = pd.read_csv(os.path.join(BASE_DIR, resultado['files']['csv']), encoding='utf-8-sig',
+                                dtype={c: str for c in COLUNAS_TEXTO_MATCHES})
+    except pd.errors.EmptyDataError:
+        # Nenhum match: a partição existe, vazia, com o mesmo esquema
+        relatorio = pd.DataFrame({c: pd.Series(dtype=str if c in COLUNAS_TEXTO_MATCHES else
+                                               'int64' if c.endswith('_indice') else float)
+                                  for c in COLUNAS_MATCHES})
+    _gravar_particao(relatorio, saida, segment, rotulo)
+    return resultado['resumo']
+
+
+def _preparar_segmentos(itens, modelo_id):
+    """Caminho da BNCC de cada segmento do lote, com o artefato carregado e validado"""
+    caminhos, erros = {}, {}
+    for segment in dict.fromkeys(item['segmento'] for item in itens):
+        try:
+            bncc_path = resolver_arquivo_bncc(segment)
+            if not os.path.exists(bncc_path):
+                raise Exception(f'Arquivo BNCC não encontrado: {bncc_path}')
+            referencia = carregar_referencia_bncc(bncc_path, modelo_id)
+            missing_bncc, required_bncc = validar_colunas(referencia.tabela.columns.str.strip(), 'bncc', segment)
+            if missing_bncc:
+                raise Exception(f'Colunas ausentes no arquivo BNCC: {missing_bncc}. '
+                                f'Colunas necessárias: {required_bncc}.')
+            caminhos[segment] = bncc_path
+        except Exception as e:
+            erros[segment] = str(e)
+    return caminhos, erros
+
+
+def _gravar_resumos(itens, resultados, erros, linhas, saida):
+    registros = []
+    for item in itens:
+        arquivo = item['arquivo']
+        registro = {'arquivo': arquivo, 'segmento': item['segmento'],
+                    'nota_corte': item['nota_corte'], 'linhas_curriculo': linhas.get(arquivo)}
+        if arquivo in resultados:
+            resumo = resultados[arquivo]
+            registro.update({c: resumo[c] for c in COLUNAS_RESUMO[4:-1]})
+        else:
+            registro['erro'] = erros.get(arquivo)
+        registros.append(registro)
+    caminho = os.path.join(saida, 'resumos.csv')
+    pd.DataFrame(registros, columns=COLUNAS_RESUMO).convert_dtypes().to_csv(caminho, index=False, encoding='utf-8-sig')
+    return caminho
+
+
+def analisar_lote(itens, saida=None, processos=None):
+    """
+    Analisa os itens do lote (dicts com 'arquivo', 'segmento' e 'nota_corte').
+    Retorna os resumos por arquivo, os erros por arquivo e os caminhos do dataset
+    de matches e do resumos.csv.
+    """
+    if not itens:
+        raise Exception('Nenhum arquivo para analisar no lote')
+    repetidos = sorted(a for a, n in Counter(i['arquivo'] for i in itens).items() if n > 1)
+    if repetidos:
+        raise Exception(f'Arquivos repetidos no lote: {repetidos}')
+    saida = saida or os.path.join(DIRETORIO_LOTES, datetime.now().strftime("%Y%m%d_%H%M%S"))
+    os.makedirs(saida, exist_ok=True)
+
+    modelo_id = identificador_modelo(MODELO_PADRAO)
+    caminhos_bncc, erros_segmento = _preparar_segmentos(itens, modelo_id)
+    model = obter_modelo(modelo_id)
+
+    from core.similarity import gerar_embeddings_curriculo
+
+    def codificar_curriculo(df):
+        return gerar_embeddings_curriculo(model, df, modelo_id)
+
+    processos = processos or PROCESSOS_LOTE or os.cpu_count() or 1
+    # Rótulo (nome dos relatórios e da partição) a partir do caminho relativo à pasta comum
+    arquivos = list(dict.fromkeys(i['arquivo'] for i in itens))
+    comum = os.path.commonpath([os.path.dirname(os.path.abspath(a)) for a in arquivos])
+    nomes = {a: os.path.splitext(os.path.relpath(os.path.abspath(a), comum))[0] for a in arquivos}
+    rotulos = _rotulos_arquivo(list(nomes.values()))
+    rotulos = {a: rotulos[nome] for a, nome in nomes.items()}
+    print(f"📦 Lote: {len(itens)} arquivos, {len(caminhos_bncc)} segmento(s), {processos} processo(s)")
+
+    executor = None
+    if processos > 1 and len(itens) > 1:
+        # spawn: fork de um processo com torch/threads já iniciados não é seguro
+        executor = ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context('spawn'))
+    pendentes, resultados, erros, linhas = {}, {}, {}, {}
+
+    def coletar(futuros):
+        for futuro in futuros:
+            arquivo = pendentes.pop(futuro)
+            try:
+                resultados[arquivo] = futuro.result()
+            except Exception as e:
+                erros[arquivo] = str(e)
+
+    try:
+        for numero, item in enumerate(itens, 1):
+            arquivo, segment = item['arquivo'], item['segmento']
+            try:
+                if segment in erros_segmento:
+                    raise Exception(erros_segmento[segment])
+                conferir_layout(arquivo, segment)
+                curriculo_df, embeddings = ler_e_codificar_curriculo(arquivo, segment, codificar_curriculo)
+                linhas[arquivo] = len(curriculo_df)
+                argumentos = (curriculo_df, embeddings, caminhos_bncc[segment], modelo_id, segment,
+                              item['nota_corte'], rotulos[arquivo], saida)
+                print(f"   📄 [{numero}/{len(itens)}] {os.path.basename(arquivo)}: {len(curriculo_df)} linhas")
+                if executor is None:
+                    resultados[arquivo] = _analisar_arquivo(*argumentos)
+                    continue
+                # Paralelismo limitado: espera uma vaga antes de enfileirar mais um
+                # arquivo codificado
+                while len(pendentes) >= processos:
+                    concluidos, _ = wait(list(pendentes), return_when=FIRST_COMPLETED)
+                    coletar(concluidos)
+                pendentes[executor.submit(_analisar_arquivo, *argumentos)] = arquivo
+            except Exception as e:
+                erros[arquivo] = str(e)
+        coletar(list(pendentes))
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    for arquivo, erro in erros.items():
+        print(f"⚠️ {os.path.basename(arquivo)} não analisado: {erro}")
+    print(f"✅ Lote concluído: {len(resultados)} de {len(itens)} arquivos analisados")
+
+    return {
+        'resumos': {arquivo: resultados[arquivo] for arquivo in (i['arquivo'] for i in itens) if arquivo in resultados},
+        'erros': erros,
+        'matches': os.path.join(saida, 'matches'),
+        'resumos_csv': _gravar_resumos(itens, resultados, erros, linhas, saida),
+        'modelo_usado': modelo_id,
+    }
@@ -0,0 +1,229 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import threading
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.modelos import obter_modelo, MODELO_PADRAO
+from core.lotes_encode import codificar_em_lotes
+from core.tabelas_parquet import ler_planilha
+from core.embeddings_compactos import EmbeddingsCompactos, normalizar, FORMATO_EMBEDDINGS
+from core.codigos import IndiceCodigos, indexar_codigos
+
+# ==================================================================================
+#              ARTEFATOS PRÉ-COMPUTADOS DA BNCC (TEXTOS, CÓDIGOS, EMBEDDINGS)
+# ==================================================================================
+# As planilhas de referência da BNCC não mudam entre requisições. Os textos, os
+# códigos e os embeddings são gravados uma vez em artefatos/bncc/<segmento>/<chave>/
+# (tabela Arrow + embeddings .npy mapeados em memória). A chave combina o hash do
+# conteúdo da planilha com o nome do modelo, então trocar qualquer um dos dois gera
+# um artefato novo em vez de reaproveitar um desatualizado. Os embeddings são gravados
+# já normalizados, no formato de BNCC_FORMATO_EMBEDDINGS (que também entra na chave).
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_ARTEFATOS = os.path.join(BASE_DIR, 'artefatos', 'bncc')
+# 3: CODIGO extraído da mesma coluna que o algoritmo balanceado usa (HABILIDADE antes
+# de OBJETIVO DE APRENDIZAGEM)
+VERSAO_ARTEFATO = 3
+
+ARQUIVOS_BNCC = {
+    'infantil': 'bncc_df_inf.xlsx',
+    'anos iniciais': 'bncc_df_anosiniciais.xlsx',
+    'anos finais': 'bncc_df_anosfinais (2).xlsx',
+}
+
+_referencias_em_memoria = {}
+_lock_construcao = threading.Lock()
+
+
+class ReferenciaBNCC:
+    """Lado BNCC de uma análise, pronto para uso (tabela, textos, códigos e embeddings)"""
+
+    def __init__(self, tabela, compactos, chave, modelo_nome, diretorio):
+        self.tabela = tabela
+        # Normalizados e mapeados em memória no formato gravado; cada trecho pontuado
+        # vira float32 só na hora (EmbeddingsCompactos.__getitem__/__array__)
+        self.compactos = compactos
+        self.chave = chave
+        self.modelo_nome = modelo_nome
+        self.diretorio = diretorio
+        self._indice_codigos = None
+
+    @property
+    def embeddings(self):
+        return self.compactos
+
+    @property
+    def textos(self):
+        return self.tabela['TEXTO_EMBEDDING']
+
+    @property
+    def codigos(self):
+        return self.tabela['CODIGO']
+
+    def indice_codigos(self):
+        """IndiceCodigos da coluna CODIGO, montado uma vez por referência carregada"""
+        if self._indice_codigos is None:
+            self._indice_codigos = IndiceCodigos(self.codigos)
+        return self._indice_codigos
+
+    def dataframe(self):
+        """Cópia da BNCC com as colunas originais (sem as colunas auxiliares)"""
+        return self.tabela.drop(columns=['TEXTO_EMBEDDING', 'CODIGO']).copy()
+
+
+def segmento_normalizado(segment):
+    """Converte o segmento informado pelo usuário em uma chave de ARQUIVOS_BNCC"""
+    segment = segment.lower()
+    if 'infantil' in segment:
+        return 'infantil'
+    elif 'iniciais' in segment:
+        return 'anos iniciais'
+    elif 'finais' in segment:
+        return 'anos finais'
+    raise Exception(f'Segmento inválido: {segment}')
+
+
+def resolver_arquivo_bncc(segment):
+    """Caminho da planilha BNCC de referência do segmento"""
+    segmento = segmento_normalizado(segment)
+    bncc_path = os.path.join(BASE_DIR, ARQUIVOS_BNCC[segmento])
+    if segmento == 'infantil' and not os.path.exists(bncc_path):
+        # Se não existir, tentar o arquivo normalizado
+        bncc_path = os.path.join(BASE_DIR, 'data', 'infantil_curriculo', 'infantil_curriculo_normalizado.xlsx')
+    return bncc_path
+
+
+def hash_arquivo(caminho, tamanho_bloco=1024 * 1024):
+    """SHA-256 do conteúdo do arquivo"""
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def chave_artefato(hash_planilha, modelo_nome, formato=None):
+    conteudo = f"v{VERSAO_ARTEFATO}|{hash_planilha}|{modelo_nome}|{formato or FORMATO_EMBEDDINGS}".encode('utf-8')
+    return hashlib.sha256(conteudo).hexdigest()[:20]
+
+
+def _diretorio_artefato(caminho_bncc, chave):
+    nome_base = os.path.splitext(os.path.basename(caminho_bncc))[0]
+    nome_base = ''.join(c if c.isalnum() else '_' for c in nome_base).strip('_')
+    return os.path.join(DIRETORIO_ARTEFATOS, nome_base, chave)
+
+
+def _preparar_tabela(bncc_df):
+    """Garante tipos serializáveis em Arrow sem alterar valores ausentes"""
+    tabela = bncc_df.copy()
+    tabela.columns = [str(c).strip() for c in tabela.columns]
+    for coluna in tabela.columns:
+        if tabela[coluna].dtype == object:
+            valores = tabela[coluna]
+            tabela[coluna] = valores.where(valores.isna(), valores.astype(str))
+    return tabela.reset_index(drop=True)
+
+
+def construir_artefato_bncc(caminho_bncc, modelo_nome=MODELO_PADRAO, hash_planilha=None):
+    """
+    Lê a planilha BNCC, gera textos/códigos/embeddings e grava o artefato versionado
+    """
+    from core.similarity import concat_features_bncc
+
+    if hash_planilha is None:
+        hash_planilha = hash_arquivo(caminho_bncc)
+    chave = chave_artefato(hash_planilha, modelo_nome)
+    destino = _diretorio_artefato(caminho_bncc, chave)
+
+    print(f"🏗️  Construindo artefato BNCC: {os.path.basename(caminho_bncc)} ({modelo_nome})")
+    tabela = _preparar_tabela(ler_planilha(caminho_bncc))
+
+    textos = concat_features_bncc(tabela)
+    tabela['TEXTO_EMBEDDING'] = textos.astype(str)
+    # Mesma coluna e mesma extração que o algoritmo balanceado usa na BNCC
+    tabela['CODIGO'] = indexar_codigos(tabela, 'bncc').lista()
+
+    model = obter_modelo(modelo_nome)
+    embeddings = normalizar(codificar_em_lotes(model, textos.tolist(), show_progress_bar=False))
+    compactos = EmbeddingsCompactos.compactar(embeddings)
+
+    # Grava em diretório temporário e troca no final para nunca expor artefato parcial
+    temporario = destino + f".tmp-{os.getpid()}"
+    if os.path.exists(temporario):
+        shutil.rmtree(temporario)
+    os.makedirs(temporario)
+    tabela.to_feather(os.path.join(temporario, 'tabela.arrow'))
+    compactos.gravar(temporario)
+    with open(os.path.join(temporario, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'versao': VERSAO_ARTEFATO,
+            'arquivo_origem': os.path.basename(caminho_bncc),
+            'hash_planilha': hash_planilha,
+            'modelo': modelo_nome,
+            'linhas': int(len(tabela)),
+            'dimensao': int(embeddings.shape[1]) if embeddings.ndim == 2 else 0,
+            'formato': compactos.formato,
+            'normalizados': True,
+        }, f, ensure_ascii=False, indent=2)
+
+    if os.path.exists(destino):
+        shutil.rmtree(temporario)
+    else:
+        os.replace(temporario, destino)
+    print(f"✅ Artefato salvo em: {os.path.relpath(destino, BASE_DIR)}")
+    return destino
+
+
+def _abrir_artefato(destino, chave, modelo_nome):
+    from pyarrow import feather
+    tabela = feather.read_table(os.path.join(destino, 'tabela.arrow'), memory_map=True).to_pandas()
+    return ReferenciaBNCC(tabela, EmbeddingsCompactos.abrir(destino), chave, modelo_nome, destino)
+
+
+def carregar_referencia_bncc(caminho_bncc, modelo_nome=MODELO_PADRAO, construir_se_ausente=True):
+    """
+    Carrega o artefato BNCC correspondente ao conteúdo atual da planilha e ao modelo.
+    Constrói o artefato na primeira vez se ainda não existir.
+    """
+    estado = os.stat(caminho_bncc)
+    chave_memoria = (os.path.abspath(caminho_bncc), estado.st_mtime_ns, estado.st_size, modelo_nome)
+    referencia = _referencias_em_memoria.get(chave_memoria)
+    if referencia is not None:
+        return referencia
+
+    hash_planilha = hash_arquivo(caminho_bncc)
+    chave = chave_artefato(hash_planilha, modelo_nome)
+    destino = _diretorio_artefato(caminho_bncc, chave)
+
+    if not os.path.exists(os.path.join(destino, 'meta.json')):
+        if not construir_se_ausente:
+            raise Exception(f'Artefato BNCC não encontrado para {caminho_bncc} ({modelo_nome}). '
+                            f'Execute: python core/artefatos_bncc.py')
+        with _lock_construcao:
+            if not os.path.exists(os.path.join(destino, 'meta.json')):
+                construir_artefato_bncc(caminho_bncc, modelo_nome, hash_planilha=hash_planilha)
+
+    referencia = _abrir_artefato(destino, chave, modelo_nome)
+    _referencias_em_memoria[chave_memoria] = referencia
+    return referencia
+
+
+def construir_todos(modelo_nome=MODELO_PADRAO):
+    """Passo de build: gera os artefatos dos três segmentos"""
+    for segmento in ARQUIVOS_BNCC:
+        caminho = resolver_arquivo_bncc(segmento)
+        if not os.path.exists(caminho):
+            print(f"⚠️  Planilha BNCC ausente para '{segmento}': {caminho}")
+            continue
+        referencia = carregar_referencia_bncc(caminho, modelo_nome)
+        print(f"📦 {segmento}: {len(referencia.tabela)} habilidades | chave {referencia.chave}")
+
+
+if __name__ == '__main__':
+    modelo = sys.argv[1] if len(sys.argv) > 1 else MODELO_PADRAO
+    construir_todos(modelo)
@@ -0,0 +1,197 @@
+import os
+import json
+import shutil
+import tempfile
+import numpy as np
+
+# ==================================================================================
+#              BACKEND ONNX INT8 (CPU) PARA OS MODELOS SENTENCE-TRANSFORMERS
+# ==================================================================================
+# Os nós de inferência não têm GPU e o encode fp32 do PyTorch é o maior custo de uma
+# requisição. Este backend exporta o transformer do modelo para ONNX uma única vez,
+# aplica quantização dinâmica int8 nos pesos (onnxruntime.quantization) e roda com o
+# onnxruntime em CPU, repetindo o pooling e a normalização do SentenceTransformer.
+#
+# Dependências opcionais: pip install -r requirements-onnx.txt
+# Exportação antecipada: python core/backend_onnx.py [modelo]
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_ONNX = os.path.join(BASE_DIR, 'artefatos', 'onnx')
+THREADS_ONNX = int(os.environ.get('BNCC_ONNX_THREADS', 0))  # 0 = padrão do onnxruntime
+TAMANHO_LOTE_PADRAO = 32
+
+ARQUIVO_FP32 = 'modelo_fp32.onnx'
+ARQUIVO_INT8 = 'modelo_int8.onnx'
+ARQUIVO_CONFIG = 'config_onnx.json'
+
+
+def _importar_onnxruntime():
+    try:
+        import onnxruntime
+        return onnxruntime
+    except ImportError:
+        raise Exception("Backend 'onnx-int8' requer o onnxruntime: pip install -r requirements-onnx.txt")
+
+
+def diretorio_modelo_onnx(nome):
+    return os.path.join(DIRETORIO_ONNX, nome.replace('/', '__'))
+
+
+def _configuracao_pooling(modelo_st):
+    """Modo de pooling, normalização e tamanho máximo lidos dos módulos do SentenceTransformer"""
+    from sentence_transformers.models import Pooling, Normalize
+    pooling = 'mean'
+    normalizar = False
+    for modulo in modelo_st:
+        if isinstance(modulo, Pooling):
+            if getattr(modulo, 'pooling_mode_cls_token', False):
+                pooling = 'cls'
+            elif getattr(modulo, 'pooling_mode_max_tokens', False):
+                pooling = 'max'
+        elif isinstance(modulo, Normalize):
+            normalizar = True
+    return {'pooling': pooling, 'normalizar': normalizar, 'max_seq_length': int(modelo_st.max_seq_length)}
+
+
+def _classe_saida_tokens(torch):
+    class SaidaTokens(torch.nn.Module):
+        """
+        Transformer chamado com as entradas por nome, devolvendo só os vetores de
+        token: passados por posição, como o rastreamento do exportador faz, os
+        tensores colidem com argumentos do forward() no transformers 5 ('use_cache')
+        """
+
+        def __init__(self, transformer, entradas):
+            super().__init__()
+            self.transformer = transformer
+            self.entradas = entradas
+
+        def forward(self, *tensores):
+            return self.transformer(**dict(zip(self.entradas, tensores)), return_dict=True).last_hidden_state
+
+    return SaidaTokens
+
+
+def exportar_modelo_onnx(nome, diretorio=None):
+    """
+    Exporta o transformer do modelo para ONNX (fp32) e grava a versão int8 com
+    quantização dinâmica. A pasta final só aparece quando tudo foi gravado.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    _importar_onnxruntime()
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    diretorio = diretorio or diretorio_modelo_onnx(nome)
+    print(f"📦 Exportando {nome} para ONNX int8 em {diretorio}...")
+    modelo_st = SentenceTransformer(nome, device='cpu')
+    transformer = modelo_st[0].auto_model.eval()
+    SaidaTokens = _classe_saida_tokens(torch)
+    tokenizer = modelo_st.tokenizer
+    config = _configuracao_pooling(modelo_st)
+
+    os.makedirs(os.path.dirname(diretorio), exist_ok=True)
+    temporario = tempfile.mkdtemp(prefix='.tmp_onnx_', dir=os.path.dirname(diretorio))
+    try:
+        exemplo = tokenizer(["exportação do modelo"], return_tensors='pt')
+        entradas = [n for n in ('input_ids', 'attention_mask', 'token_type_ids') if n in exemplo]
+        eixos = {n: {0: 'lote', 1: 'sequencia'} for n in entradas}
+        eixos['last_hidden_state'] = {0: 'lote', 1: 'sequencia'}
+        caminho_fp32 = os.path.join(temporario, ARQUIVO_FP32)
+        with torch.no_grad():
+            torch.onnx.export(
+                SaidaTokens(transformer, entradas),
+                tuple(exemplo[n] for n in entradas),
+                caminho_fp32,
+                input_names=entradas,
+                output_names=['last_hidden_state'],
+                dynamic_axes=eixos,
+                opset_version=17,
+                dynamo=False,
+            )
+        quantize_dynamic(caminho_fp32, os.path.join(temporario, ARQUIVO_INT8), weight_type=QuantType.QInt8)
+        tokenizer.save_pretrained(temporario)
+        config.update({'modelo': nome, 'entradas': entradas})
+        with open(os.path.join(temporario, ARQUIVO_CONFIG), 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2)
+
+        if os.path.exists(diretorio):
+            shutil.rmtree(diretorio)
+        os.replace(temporario, diretorio)
+    except Exception:
+        shutil.rmtree(temporario, ignore_errors=True)
+        raise
+    print(f"✅ Modelo ONNX int8 gravado: {os.path.join(diretorio, ARQUIVO_INT8)}")
+    return diretorio
+
+
+def agrupar_tokens(saida, mascara, modo='mean'):
+    """Pooling dos vetores de token (mesma regra do sentence_transformers.models.Pooling)"""
+    if modo == 'cls':
+        return saida[:, 0]
+    mascara = mascara[..., None].astype(saida.dtype)
+    if modo == 'max':
+        return np.where(mascara > 0, saida, -1e9).max(axis=1)
+    soma = (saida * mascara).sum(axis=1)
+    return soma / np.clip(mascara.sum(axis=1), 1e-9, None)
+
+
+class ModeloOnnxInt8:
+    """
+    Codificador com a mesma interface de encode() do SentenceTransformer, rodando
+    o modelo quantizado no onnxruntime (CPU)
+    """
+
+    def __init__(self, nome, diretorio=None):
+        onnxruntime = _importar_onnxruntime()
+        from transformers import AutoTokenizer
+
+        self.nome = nome
+        self.diretorio = diretorio or diretorio_modelo_onnx(nome)
+        if not os.path.exists(os.path.join(self.diretorio, ARQUIVO_INT8)):
+            exportar_modelo_onnx(nome, self.diretorio)
+
+        with open(os.path.join(self.diretorio, ARQUIVO_CONFIG), encoding='utf-8') as f:
+            self.config = json.load(f)
+        self.tokenizer = AutoTokenizer.from_pretrained(self.diretorio)
+        self.max_seq_length = self.config['max_seq_length']
+
+        opcoes = onnxruntime.SessionOptions()
+        opcoes.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if THREADS_ONNX:
+            opcoes.intra_op_num_threads = THREADS_ONNX
+        self.sessao = onnxruntime.InferenceSession(
+            os.path.join(self.diretorio, ARQUIVO_INT8), opcoes, providers=['CPUExecutionProvider']
+        )
+        self.entradas = [e.name for e in self.sessao.get_inputs()]
+
+    def encode(self, textos, batch_size=TAMANHO_LOTE_PADRAO, show_progress_bar=False,
+               convert_to_numpy=True, normalize_embeddings=False, **kwargs):
+        unico = isinstance(textos, str)
+        if unico:
+            textos = [textos]
+        lotes = []
+        for inicio in range(0, len(textos), batch_size):
+            lote = [str(t) for t in textos[inicio:inicio + batch_size]]
+            tokens = self.tokenizer(lote, padding=True, truncation=True,
+                                    max_length=self.max_seq_length, return_tensors='np')
+            alimentacao = {n: tokens[n].astype(np.int64) for n in self.entradas if n in tokens}
+            if 'token_type_ids' in self.entradas and 'token_type_ids' not in alimentacao:
+                alimentacao['token_type_ids'] = np.zeros_like(alimentacao['input_ids'])
+            saida = self.sessao.run(None, alimentacao)[0]
+            vetores = agrupar_tokens(saida, tokens['attention_mask'], self.config['pooling'])
+            if self.config['normalizar'] or normalize_embeddings:
+                vetores = vetores / np.clip(np.linalg.norm(vetores, axis=1, keepdims=True), 1e-12, None)
+            lotes.append(vetores.astype(np.float32))
+
+        if not lotes:
+            return np.zeros((0, 0), dtype=np.float32)
+        embeddings = np.vstack(lotes)
+        return embeddings[0] if unico else embeddings
+
+
+if __name__ == "__main__":
+    import sys
+    sys.path.insert(0, BASE_DIR)
+    from core.modelos import MODELO_PADRAO
+    exportar_modelo_onnx(sys.argv[1] if len(sys.argv) > 1 else MODELO_PADRAO)
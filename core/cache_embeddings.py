@@ -0,0 +1,201 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+
+from core.pool_encode import codificar_paralelo
+
+# ==================================================================================
+#              CACHE PERSISTENTE DE EMBEDDINGS (ENDEREÇADO POR CONTEÚDO)
+# ==================================================================================
+# Os municípios reenviam quase o mesmo currículo várias vezes corrigindo poucas
+# linhas. O cache guarda cada embedding pela chave (modelo, hash do texto
+# normalizado) em um SQLite local, de modo que um reenvio com 5 linhas editadas
+# codifica apenas essas 5 linhas. O tamanho é limitado por número de entradas,
+# com descarte LRU (menor último acesso primeiro).
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CAMINHO_CACHE_PADRAO = os.path.join(BASE_DIR, 'artefatos', 'cache_embeddings.sqlite3')
+LIMITE_ENTRADAS_PADRAO = int(os.environ.get('BNCC_CACHE_EMBEDDINGS_MAX_ENTRADAS', 100_000))
+
+# Limite de variáveis por consulta do SQLite (compatível com versões antigas)
+_TAMANHO_LOTE_SQL = 500
+
+
+def normalizar_texto(texto):
+    """Remove espaços nas pontas e colapsa espaços/quebras de linha internos"""
+    return ' '.join(str(texto).split())
+
+
+def hash_texto(texto):
+    return hashlib.sha1(normalizar_texto(texto).encode('utf-8')).hexdigest()
+
+
+class CacheEmbeddings:
+    """
+    Cache de embeddings em SQLite com leitura/gravação em lote, limite de tamanho
+    com descarte LRU e contadores de acertos/falhas
+    """
+
+    def __init__(self, caminho=CAMINHO_CACHE_PADRAO, limite_entradas=LIMITE_ENTRADAS_PADRAO):
+        self.caminho = caminho
+        self.limite_entradas = limite_entradas
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0
+        self._lock = threading.Lock()
+
+        if caminho != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False, timeout=30)
+        if caminho != ':memory:':
+            self._conexao.execute('PRAGMA journal_mode=WAL')
+        self._conexao.execute('PRAGMA synchronous=NORMAL')
+        self._conexao.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                modelo TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                dimensao INTEGER NOT NULL,
+                vetor BLOB NOT NULL,
+                ultimo_acesso REAL NOT NULL,
+                PRIMARY KEY (modelo, hash)
+            ) WITHOUT ROWID
+        """)
+        self._conexao.execute(
+            'CREATE INDEX IF NOT EXISTS idx_embeddings_acesso ON embeddings (ultimo_acesso)'
+        )
+        self._conexao.commit()
+
+    def obter_varios(self, modelo, hashes):
+        """Retorna {hash: vetor float32} para os hashes presentes no cache"""
+        hashes = list(dict.fromkeys(hashes))
+        encontrados = {}
+        with self._lock:
+            for inicio in range(0, len(hashes), _TAMANHO_LOTE_SQL):
+                lote = hashes[inicio:inicio + _TAMANHO_LOTE_SQL]
+                marcadores = ','.join('?' * len(lote))
+                linhas = self._conexao.execute(
+                    f'SELECT hash, dimensao, vetor FROM embeddings '
+                    f'WHERE modelo = ? AND hash IN ({marcadores})',
+                    [modelo, *lote]
+                ).fetchall()
+                for h, dimensao, vetor in linhas:
+                    encontrados[h] = np.frombuffer(vetor, dtype=np.float32, count=dimensao)
+
+            if encontrados:
+                agora = time.time()
+                self._conexao.executemany(
+                    'UPDATE embeddings SET ultimo_acesso = ? WHERE modelo = ? AND hash = ?',
+                    [(agora, modelo, h) for h in encontrados]
+                )
+                self._conexao.commit()
+
+            self.acertos += len(encontrados)
+            self.falhas += len(hashes) - len(encontrados)
+        return encontrados
+
+    def gravar_varios(self, modelo, itens):
+        """Grava {hash: vetor} e aplica o limite de tamanho"""
+        if not itens:
+            return
+        agora = time.time()
+        registros = []
+        for h, vetor in itens.items():
+            vetor = np.ascontiguousarray(vetor, dtype=np.float32).ravel()
+            registros.append((modelo, h, int(vetor.shape[0]), vetor.tobytes(), agora))
+        with self._lock:
+            self._conexao.executemany(
+                'INSERT OR REPLACE INTO embeddings (modelo, hash, dimensao, vetor, ultimo_acesso) '
+                'VALUES (?, ?, ?, ?, ?)',
+                registros
+            )
+            self._aplicar_limite()
+            self._conexao.commit()
+
+    def _aplicar_limite(self):
+        total = self._conexao.execute('SELECT COUNT(*) FROM embeddings').fetchone()[0]
+        excedente = total - self.limite_entradas
+        if excedente > 0:
+            self._conexao.execute("""
+                DELETE FROM embeddings WHERE (modelo, hash) IN (
+                    SELECT modelo, hash FROM embeddings ORDER BY ultimo_acesso LIMIT ?
+                )
+            """, (excedente,))
+            self.descartes += excedente
+
+    def __len__(self):
+        with self._lock:
+            return self._conexao.execute('SELECT COUNT(*) FROM embeddings').fetchone()[0]
+
+    def estatisticas(self):
+        consultas = self.acertos + self.falhas
+        return {
+            'entradas': len(self),
+            'limite_entradas': self.limite_entradas,
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'descartes': self.descartes,
+            'taxa_acerto': self.acertos / consultas if consultas else 0.0,
+        }
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
+
+
+_cache_global = None
+_lock_global = threading.Lock()
+
+
+def obter_cache_embeddings():
+    """Cache compartilhado pelo processo; None se desativado por BNCC_CACHE_EMBEDDINGS=0"""
+    global _cache_global
+    if os.environ.get('BNCC_CACHE_EMBEDDINGS', '1') == '0':
+        return None
+    if _cache_global is None:
+        with _lock_global:
+            if _cache_global is None:
+                _cache_global = CacheEmbeddings()
+    return _cache_global
+
+
+def codificar_com_cache(model, textos, modelo_nome, cache=None, avanco=None, **kwargs_encode):
+    """
+    Codifica os textos consultando o cache antes; só os textos ausentes passam pelo modelo.
+    Retorna uma matriz float32 na mesma ordem de `textos`; `avanco`
+    (core.progresso.Avanco) soma os textos prontos.
+    """
+    textos = list(textos)
+    if cache is None:
+        cache = obter_cache_embeddings()
+    kwargs_encode.setdefault('show_progress_bar', False)
+
+    if cache is None or modelo_nome is None:
+        return codificar_paralelo(model, textos, modelo_nome, avanco=avanco, **kwargs_encode)
+
+    hashes = [hash_texto(t) for t in textos]
+    encontrados = cache.obter_varios(modelo_nome, hashes)
+
+    # Textos ausentes, sem repetição (o primeiro texto de cada hash é o codificado)
+    faltantes = {}
+    for h, texto in zip(hashes, textos):
+        if h not in encontrados and h not in faltantes:
+            faltantes[h] = texto
+
+    # Reaproveitados e repetidos já estão prontos; os demais contam ao ser codificados
+    if avanco is not None:
+        avanco.somar(len(textos) - len(faltantes))
+    if faltantes:
+        print(f"🧮 Cache de embeddings: {len(encontrados)} reaproveitados, {len(faltantes)} novos para codificar")
+        novos = codificar_paralelo(model, list(faltantes.values()), modelo_nome, avanco=avanco, **kwargs_encode)
+        novos_por_hash = dict(zip(faltantes.keys(), novos))
+        cache.gravar_varios(modelo_nome, novos_por_hash)
+        encontrados.update(novos_por_hash)
+    else:
+        print(f"🧮 Cache de embeddings: todos os {len(textos)} textos reaproveitados")
+
+    if not textos:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.vstack([encontrados[h] for h in hashes]).astype(np.float32, copy=False)
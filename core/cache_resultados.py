@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+from core.artefatos_bncc import resolver_arquivo_bncc, segmento_normalizado, hash_arquivo
+
+# ==================================================================================
+#          CACHE DE RESULTADOS POR CONTEÚDO DO UPLOAD, SEGMENTO E NOTA DE CORTE
+# ==================================================================================
+# Professores reenviam o mesmo arquivo com o mesmo segmento e a mesma nota de corte;
+# cada reenvio refazia a análise inteira e gravava mais um conjunto de relatórios
+# com data e hora em docs/<segmento>/. Aqui /process calcula o SHA-256 do upload
+# enquanto o grava e procura, em um índice SQLite local, a chave (hash do upload,
+# segmento, nota de corte, modelo, versão do algoritmo e configuração que muda as
+# notas). Um acerto devolve na hora o resultado guardado (resumo, top matches,
+# texto dos relatórios e caminhos dos arquivos já gravados em docs/), sem
+# enfileirar nada. O índice é limitado por número de entradas, com descarte LRU;
+# os arquivos em docs/ não são apagados no descarte. Uma entrada cujos arquivos
+# sumiram de docs/ vale como falha e é removida.
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CAMINHO_CACHE_PADRAO = os.path.join(BASE_DIR, 'artefatos', 'cache_resultados.sqlite3')
+LIMITE_ENTRADAS_PADRAO = int(os.environ.get('BNCC_CACHE_RESULTADOS_MAX_ENTRADAS', 500))
+
+# Mude ao alterar o algoritmo balanceado ou o conteúdo dos relatórios: invalida o cache
+VERSAO_ALGORITMO = 1
+
+_BLOCO_UPLOAD = 1024 * 1024
+
+
+def salvar_com_hash(origem, caminho):
+    """Grava o fluxo `origem` (ex.: FileStorage.stream) em `caminho`; devolve o SHA-256"""
+    sha = hashlib.sha256()
+    with open(caminho, 'wb') as destino:
+        for bloco in iter(lambda: origem.read(_BLOCO_UPLOAD), b''):
+            sha.update(bloco)
+            destino.write(bloco)
+    return sha.hexdigest()
+
+
+def _configuracao():
+    """
+    Ajustes que mudam as notas ou os pares (formato dos embeddings, modo de
+    similaridade e, no modo 'ann', os parâmetros do índice)
+    """
+    from core.embeddings_compactos import FORMATO_EMBEDDINGS
+    from core.similaridade_blocos import MODO_SIMILARIDADE, K_PADRAO
+    configuracao = f"{FORMATO_EMBEDDINGS}|{MODO_SIMILARIDADE}|{K_PADRAO}"
+    if MODO_SIMILARIDADE == 'ann':
+        from core.indice_ann import N_LISTAS_PADRAO, N_SONDAS_PADRAO, PQ_SUBESPACOS_PADRAO, PQ_REORDENAR_PADRAO
+        configuracao += f"|{N_LISTAS_PADRAO}|{N_SONDAS_PADRAO}|{PQ_SUBESPACOS_PADRAO}|{PQ_REORDENAR_PADRAO}"
+    return configuracao
+
+
+def chave_resultado(hash_upload, segment, nota_corte, modelo_id):
+    """Chave do resultado; inclui o conteúdo da planilha BNCC do segmento"""
+    bncc_path = resolver_arquivo_bncc(segment)
+    hash_bncc = hash_arquivo(bncc_path) if os.path.exists(bncc_path) else '-'
+    conteudo = (f"v{VERSAO_ALGORITMO}|{hash_upload}|{segmento_normalizado(segment)}|{float(nota_corte)!r}|"
+                f"{modelo_id}|{hash_bncc}|{_configuracao()}")
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+
+def _para_json(valor):
+    # Escalares NumPy (np.float32, np.int64...) vindos dos DataFrames
+    return valor.item() if hasattr(valor, 'item') else str(valor)
+
+
+class CacheResultados:
+    """Índice SQLite chave -> resultado da análise, com limite de entradas e descarte LRU"""
+
+    def __init__(self, caminho=None, limite_entradas=None):
+        self.caminho = caminho or CAMINHO_CACHE_PADRAO
+        self.limite_entradas = limite_entradas or LIMITE_ENTRADAS_PADRAO
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0
+        self._lock = threading.Lock()
+
+        if self.caminho != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.caminho)), exist_ok=True)
+        self._conexao = sqlite3.connect(self.caminho, check_same_thread=False, timeout=30)
+        if self.caminho != ':memory:':
+            self._conexao.execute('PRAGMA journal_mode=WAL')
+        self._conexao.execute('PRAGMA synchronous=NORMAL')
+        self._conexao.execute("""
+            CREATE TABLE IF NOT EXISTS resultados (
+                chave TEXT PRIMARY KEY,
+                resultado TEXT NOT NULL,
+                criado_em REAL NOT NULL,
+                ultimo_acesso REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self._conexao.execute(
+            'CREATE INDEX IF NOT EXISTS idx_resultados_acesso ON resultados (ultimo_acesso)'
+        )
+        self._conexao.commit()
+
+    def obter(self, chave):
+        """Resultado guardado para a chave, ou None (ausente ou com arquivos faltando em docs/)"""
+        with self._lock:
+            linha = self._conexao.execute(
+                'SELECT resultado FROM resultados WHERE chave = ?', (chave,)
+            ).fetchone()
+            resultado = json.loads(linha[0]) if linha else None
+            if resultado is not None and not all(
+                    os.path.exists(os.path.join(BASE_DIR, caminho))
+                    for caminho in resultado.get('files', {}).values() if caminho):
+                self._conexao.execute('DELETE FROM resultados WHERE chave = ?', (chave,))
+                resultado = None
+            if resultado is None:
+                self.falhas += 1
+            else:
+                self.acertos += 1
+                self._conexao.execute('UPDATE resultados SET ultimo_acesso = ? WHERE chave = ?',
+                                      (time.time(), chave))
+            self._conexao.commit()
+        return resultado
+
+    def gravar(self, chave, resultado):
+        """Grava resumo, arquivos, top matches e relatórios do resultado e aplica o limite"""
+        conteudo = json.dumps({c: resultado.get(c) for c in ('resumo', 'files', 'top_matches', 'relatorios')},
+                              default=_para_json, ensure_ascii=False)
+        agora = time.time()
+        with self._lock:
+            self._conexao.execute(
+                'INSERT OR REPLACE INTO resultados (chave, resultado, criado_em, ultimo_acesso) VALUES (?, ?, ?, ?)',
+                (chave, conteudo, agora, agora)
+            )
+            self._aplicar_limite()
+            self._conexao.commit()
+
+    def _aplicar_limite(self):
+        total = self._conexao.execute('SELECT COUNT(*) FROM resultados').fetchone()[0]
+        excedente = total - self.limite_entradas
+        if excedente > 0:
+            self._conexao.execute("""
+                DELETE FROM resultados WHERE chave IN (
+                    SELECT chave FROM resultados ORDER BY ultimo_acesso LIMIT ?
+                )
+            """, (excedente,))
+            self.descartes += excedente
+
+    def __len__(self):
+        with self._lock:
+            return self._conexao.execute('SELECT COUNT(*) FROM resultados').fetchone()[0]
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
+
+
+_cache_global = None
+_lock_global = threading.Lock()
+
+
+def obter_cache_resultados():
+    """Cache compartilhado pelo processo; None se desativado por BNCC_CACHE_RESULTADOS=0"""
+    global _cache_global
+    if os.environ.get('BNCC_CACHE_RESULTADOS', '1') == '0':
+        return None
+    if _cache_global is None:
+        with _lock_global:
+            if _cache_global is None:
+                _cache_global = CacheResultados()
+    return _cache_global
@@ -0,0 +1,52 @@
+import numpy as np
+from scipy.sparse import hstack
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+# ==================================================================================
+#                 CODIFICADOR DETERMINÍSTICO OFFLINE (HASHING DE N-GRAMAS)
+# ==================================================================================
+# Todo codificador do registro (core/modelos.py) segue a interface do
+# SentenceTransformer: encode(textos, batch_size=..., show_progress_bar=...) devolve
+# uma matriz float32 (uma linha por texto), e o identificador 'modelo@backend' é a
+# chave dos caches e artefatos.
+#
+# Este backend não baixa pesos: cada texto vira um vetor de palavras e n-gramas de
+# caracteres espalhados por hashing (sem vocabulário ajustado, então o vetor de um
+# texto não depende dos demais e pode ir para o cache). Não é semântico como um
+# transformer, mas roda em segundos em máquina sem rede — testes, benchmarks e o
+# pipeline completo em ambiente isolado.
+
+DIMENSAO_PALAVRAS = 512
+DIMENSAO_CARACTERES = 512
+
+
+class CodificadorHash:
+    """
+    Codificador por hashing de palavras (1-2 gramas) e n-gramas de caracteres (3-5),
+    com tf sublinear e vetores unitários
+    """
+
+    def __init__(self, nome='ngramas-hash-v1'):
+        self.nome = nome
+        opcoes = dict(lowercase=True, strip_accents='unicode', alternate_sign=True, norm=None)
+        self._palavras = HashingVectorizer(n_features=DIMENSAO_PALAVRAS, analyzer='word',
+                                           ngram_range=(1, 2), **opcoes)
+        self._caracteres = HashingVectorizer(n_features=DIMENSAO_CARACTERES, analyzer='char_wb',
+                                             ngram_range=(3, 5), **opcoes)
+        self.dimensao = DIMENSAO_PALAVRAS + DIMENSAO_CARACTERES
+
+    def _tf_sublinear(self, matriz):
+        matriz.data = np.sign(matriz.data) * np.log1p(np.abs(matriz.data))
+        return normalize(matriz)
+
+    def encode(self, textos, batch_size=None, show_progress_bar=False, **kwargs):
+        unico = isinstance(textos, str)
+        textos = [textos] if unico else [str(t) for t in textos]
+        if not textos:
+            return np.zeros((0, self.dimensao), dtype=np.float32)
+        # Palavras e caracteres com o mesmo peso no vetor final
+        matriz = hstack([self._tf_sublinear(self._palavras.transform(textos)),
+                         self._tf_sublinear(self._caracteres.transform(textos))]).tocsr()
+        embeddings = normalize(matriz).toarray().astype(np.float32)
+        return embeddings[0] if unico else embeddings
@@ -0,0 +1,120 @@
+import re
+import numpy as np
+import pandas as pd
+
+# ==================================================================================
+#          CÓDIGOS BNCC: EXTRAÇÃO VETORIZADA E ÍNDICE CÓDIGO → LINHAS
+# ==================================================================================
+# extrair_codigo fazia até cinco re.search (padrões não compilados) por célula e era
+# chamada linha a linha no algoritmo balanceado, nos rótulos do heatmap, na matriz
+# persistida e nos scripts de segmento: a mesma célula era lida várias vezes por
+# análise. Agora os padrões formam uma única expressão compilada, aplicada à coluna
+# inteira com Series.str.extract, uma vez por tabela. O resultado (IndiceCodigos)
+# guarda o código de cada linha e as posições de cada código, e é repassado às
+# etapas seguintes.
+#
+# A prioridade dos padrões é a mesma da versão anterior: o primeiro padrão que
+# aparece em qualquer ponto do texto vence, mesmo que um padrão seguinte apareça
+# antes. Por isso cada padrão é um lookahead ancorado no início, e não uma
+# alternância simples, que pegaria o código mais à esquerda. Dentro do lookahead,
+# (?:[^(]*\()+? salta direto de um "(" para o próximo, em vez de testar o padrão
+# em cada caractere como faria .*?.
+
+# Código entre parênteses, na ordem de prioridade
+_PADROES_CODIGO = [
+    # Padrão infantil: (EI03CG01), (EI01EF23ME03), etc.
+    r'[A-Z]{2}\d{2}[A-Z]{2,4}\d{2}[A-Z]*\d*',
+    # Padrão anos iniciais/finais: (EF15AR01), (EF67LP01), etc.
+    r'[A-Z]{2}\d{2}[A-Z]{2}\d{2}',
+    # Padrão genérico para códigos alfanuméricos
+    r'[A-Z]+\d+[A-Z]*\d*',
+    # Qualquer código entre parênteses
+    r'[A-Z0-9]+',
+]
+PADRAO_CODIGO = re.compile(
+    r'^(?:' + '|'.join(f'(?=(?:[^(]*\\()+?({p})\\))' for p in _PADROES_CODIGO)
+    # Sem padrão específico: o primeiro parênteses, se o texto começar por ele
+    + r'|\(([^)]+)\))',
+    re.DOTALL,
+)
+
+# Coluna do código em cada tabela, na ordem de preferência
+COLUNAS_CODIGO = {
+    'bncc': ('HABILIDADE', 'OBJETIVO DE APRENDIZAGEM'),
+    'curriculo': ('HABILIDADES', 'OBJETIVO DE APRENDIZAGEM', 'HABILIDADE'),
+}
+_PREFIXO_SEM_COLUNA = {'bncc': 'BNCC', 'curriculo': 'CURR'}
+
+
+def _sem_codigo(obj_str):
+    # Fallback para objetos sem código
+    return f"({obj_str[:15]}...)" if len(obj_str) > 15 else f"({obj_str})"
+
+
+def extrair_codigo(obj):
+    """Código BNCC de uma célula, ex.: '(EF15AR01)'"""
+    if pd.isna(obj):
+        return "(SEM_COD)"
+    obj_str = str(obj)
+    match = PADRAO_CODIGO.match(obj_str)
+    if match:
+        return f"({next(g for g in match.groups() if g is not None)})"
+    return _sem_codigo(obj_str)
+
+
+def extrair_codigos(valores):
+    """extrair_codigo aplicada à coluna inteira de uma vez; Series com o mesmo índice"""
+    valores = pd.Series(valores, dtype=object) if not isinstance(valores, pd.Series) else valores
+    ausentes = valores.isna().to_numpy()
+    # dtype object: o dtype str do pandas usa o motor de regex do Arrow, sem lookahead
+    textos = pd.Series([str(v) for v in valores.to_numpy()], index=valores.index, dtype=object)
+    encontrados = textos.str.extract(PADRAO_CODIGO).bfill(axis=1).iloc[:, 0]
+
+    codigos = ('(' + encontrados + ')').astype(object)
+    sem_padrao = encontrados.isna().to_numpy() & ~ausentes
+    if sem_padrao.any():
+        codigos[sem_padrao] = [_sem_codigo(t) for t in textos[sem_padrao]]
+    codigos[ausentes] = "(SEM_COD)"
+    return codigos
+
+
+def coluna_codigo(colunas, tipo):
+    """Coluna de onde sai o código da tabela `tipo` ('bncc' ou 'curriculo'), ou None"""
+    return next((c for c in COLUNAS_CODIGO[tipo] if c in colunas), None)
+
+
+class IndiceCodigos:
+    """
+    Código de cada linha de uma tabela e as posições de cada código. `ids` são os
+    códigos numerados na ordem de primeira aparição (pd.factorize).
+    """
+
+    def __init__(self, codigos):
+        self.codigos = np.empty(len(codigos), dtype=object)
+        self.codigos[:] = list(codigos)
+        ids, self.unicos = pd.factorize(pd.Series(self.codigos, dtype=object))
+        self.ids = np.asarray(ids, dtype=np.intp)
+        ordem = np.argsort(self.ids, kind='stable')
+        limites = np.cumsum(np.bincount(self.ids, minlength=len(self.unicos)))[:-1]
+        self.posicoes = dict(zip(self.unicos, np.split(ordem, limites)))
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def __getitem__(self, posicao):
+        return self.codigos[posicao]
+
+    def lista(self):
+        return self.codigos.tolist()
+
+    def posicao(self, codigo):
+        """Primeira linha com o código (KeyError se não houver)"""
+        return int(self.posicoes[codigo][0])
+
+
+def indexar_codigos(df, tipo):
+    """IndiceCodigos de uma tabela BNCC ou do currículo, extraído em uma passada"""
+    coluna = coluna_codigo(df.columns, tipo)
+    if coluna is None:
+        return IndiceCodigos([f"{_PREFIXO_SEM_COLUNA[tipo]}_{i}" for i in range(len(df))])
+    return IndiceCodigos(extrair_codigos(df[coluna]))
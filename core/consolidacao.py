@@ -0,0 +1,345 @@
+import os
+import re
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+from core.tabelas_parquet import _hash_conteudo, _tipos_serializaveis
+
+# ==================================================================================
+#        CONSOLIDAÇÃO INCREMENTAL DAS PLANILHAS POR ANO/DISCIPLINA/BIMESTRE
+# ==================================================================================
+# Os currículos normalizados (*_curriculo_normalizado.xlsx) eram montados à mão,
+# rodando os notebooks de data/*/ sobre centenas de planilhas (uma por ano, disciplina
+# e bimestre). Aqui as planilhas são descobertas nas pastas de cada segmento,
+# interpretadas em um pool de processos e gravadas como fragmentos Parquet
+# endereçados pelo hash do conteúdo. Um manifesto guarda hash/mtime/tamanho de cada
+# arquivo: numa nova execução só os arquivos alterados ou novos são lidos de novo, e
+# a tabela consolidada (Parquet) é remontada a partir dos fragmentos.
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_CONSOLIDACAO = os.path.join(BASE_DIR, 'artefatos', 'consolidacao')
+PROCESSOS_PADRAO = int(os.environ.get('BNCC_CONSOLIDACAO_PROCESSOS', 0))  # 0 = núcleos disponíveis
+# Mudanças na interpretação das planilhas invalidam todos os fragmentos
+VERSAO_CONSOLIDACAO = 1
+
+SEGMENTOS = {
+    'anos_iniciais': {
+        'pasta': os.path.join('data', 'iniciais_curriculo'),
+        'segmento': 'ANOS INICIAIS',
+        'coluna_grupo': 'DISCIPLINA',
+        'colunas_texto': {
+            'HABILIDADES': [r"HABILIDADES?"],
+            'ORIENTACOES_PEDAGOGICAS': [r"ORIENTA(Ç|C)(Õ|O)ES.*PEDAG(Ó|O)GICAS?"],
+        },
+        'disciplinas': {},
+    },
+    'anos_finais': {
+        'pasta': os.path.join('data', 'anosfinais_curriculo', 'tudo'),
+        'segmento': 'ANOS FINAIS',
+        'coluna_grupo': 'DISCIPLINA',
+        'colunas_texto': {
+            'HABILIDADES': [r"HABILIDADES?", r"COMPETENCIAS?", r"OBJETIVOS?"],
+            'ORIENTACOES_PEDAGOGICAS': [r"ORIENTA(Ç|C)(Õ|O)ES.*PEDAG(Ó|O)GICAS?",
+                                        r"ORIENTA(Ç|C)(Õ|O)ES.*DID(Á|A)TICAS?",
+                                        r"SUGEST(Õ|O)ES.*PEDAG(Ó|O)GICAS?",
+                                        r"METODOLOGIA", r"SUGEST(Õ|O)ES"],
+        },
+        # Nomes usados no currículo normalizado dos anos finais
+        'disciplinas': {'LÍNGUA PORTUGUESA': 'PORTUGUÊS', 'LÍNGUA INGLESA': 'INGLÊS'},
+    },
+    'infantil': {
+        'pasta': os.path.join('data', 'infantil_curriculo'),
+        'segmento': 'EDUCAÇÃO INFANTIL',
+        'coluna_grupo': 'EIXO',
+        'colunas_texto': {
+            'OBJETIVO DE APRENDIZAGEM': [r"OBJETIVO.*APRENDIZAGEM"],
+            'EXEMPLOS': [r"EXPERI(Ê|E)NCIA", r"EXEMPLO"],
+        },
+        'disciplinas': {},
+    },
+}
+
+# Variações de nome de disciplina/eixo -> nome consistente
+MAPA_DISCIPLINAS = {
+    # Eixos da educação infantil
+    "ESPAÇOS, TEMPOS, QUANTIDADES E RELAÇÕES": "ESPAÇOS, TEMPOS, QUANTIDADES, RELAÇÕES",
+    "ESCUTA, FALA, PENSAMENTOS E IMAGINAÇÃO": "ESCUTA, FALA, PENSAMENTO E IMAGINAÇÃO",
+    "TRAÇOS, SONS, CORES E FROMAS": "TRAÇOS, SONS, CORES E FORMAS",
+    "O EU, O OUTRO E O NÓS": "O EU, O OUTRO E O NÓS",
+    # Disciplinas do ensino fundamental (grafias e abreviações dos nomes de arquivo)
+    "ARTES": "ARTE",
+    "MAT": "MATEMÁTICA",
+    "MATEMATICA": "MATEMÁTICA",
+    "LP": "LÍNGUA PORTUGUESA",
+    "PORTUGUES": "PORTUGUÊS",
+    "LINGUA PORTUGUESA": "LÍNGUA PORTUGUESA",
+    "CIENCIAS": "CIÊNCIAS",
+    "HISTORIA": "HISTÓRIA",
+    "EDUCACAO FISICA": "EDUCAÇÃO FÍSICA",
+    "EDUCAÇAO FISICA": "EDUCAÇÃO FÍSICA",
+    "EDUCAÇÃO FISICA": "EDUCAÇÃO FÍSICA",
+    "INGLES": "INGLÊS",
+    "LINGUA INGLESA": "LÍNGUA INGLESA",
+}
+
+_RE_ANO = re.compile(r"(\d+)\s*[º°ª]?\s*-?\s*ANO\b", re.IGNORECASE)
+_RE_BIMESTRE = re.compile(r"(\d+)\s*[º°ª]?\s*-?\s*BIMESTRE\b", re.IGNORECASE)
+_RE_TURMA = re.compile(r"^\s*(B\s*\d|MATERNAL|\d+\s*[º°ª]?\s*PER[ÍI]ODO)\b", re.IGNORECASE)
+_RE_COPIA = re.compile(r"\s*\(\d+\)\s*$")
+_SEPARADORES = re.compile(r"\s*[-–—]+\s*")
+
+
+def normalizar_disciplina(nome):
+    """Normaliza nomes de disciplinas removendo variações desnecessárias"""
+    if pd.isna(nome):
+        return "SEM_DISCIPLINA"
+
+    nome_str = str(nome).strip().upper()
+    return MAPA_DISCIPLINAS.get(nome_str, nome_str)
+
+
+def _limpar_texto(valor):
+    if pd.isna(valor):
+        return ''
+    return re.sub(r"\s+", " ", str(valor)).strip()
+
+
+def ler_nome_arquivo(nome, chave_segmento):
+    """
+    Ano (ou turma, na educação infantil), bimestre e disciplina/eixo a partir do nome
+    do arquivo. Campos não encontrados voltam vazios (None no bimestre).
+    """
+    base = _RE_COPIA.sub('', os.path.splitext(os.path.basename(nome))[0])
+
+    if chave_segmento == 'infantil':
+        turma = _RE_TURMA.match(base)
+        if not turma:
+            return {'ANO': '', 'BIMESTRE': None, 'GRUPO': ''}
+        ano = re.sub(r"\s+", " ", turma.group(1)).upper()
+        ano = re.sub(r"^B\s*(\d)$", r"BERÇÁRIO \1", ano)
+        ano = re.sub(r"^(\d+)\s*[º°ª]?\s*PER[ÍI]ODO$", r"\1º PERÍODO", ano)
+        resto = base[turma.end():]
+        return {'ANO': ano, 'BIMESTRE': None, 'GRUPO': _SEPARADORES.sub(' ', resto).strip(' -')}
+
+    ano = _RE_ANO.search(base)
+    bimestre = _RE_BIMESTRE.search(base)
+    resto = _RE_BIMESTRE.sub(' - ', _RE_ANO.sub(' - ', base))
+    partes = [p for p in _SEPARADORES.split(resto) if p.strip()]
+    return {
+        'ANO': f"{int(ano.group(1))}º Ano" if ano else '',
+        'BIMESTRE': int(bimestre.group(1)) if bimestre else None,
+        'GRUPO': ' '.join(partes).strip(),
+    }
+
+
+def _encontrar_coluna(colunas, padroes):
+    """Posição da primeira coluna que casa com os padrões (na ordem de prioridade)"""
+    for padrao in padroes:
+        for posicao, col in enumerate(colunas):
+            if isinstance(col, str) and re.search(padrao, _limpar_texto(col).upper()):
+                return posicao
+    return None
+
+
+def _linha_cabecalho(bruto, padroes, max_linhas=10):
+    """Primeira linha (entre as iniciais) com alguma coluna de texto esperada"""
+    for i in range(min(max_linhas, len(bruto))):
+        if any(_encontrar_coluna(list(bruto.iloc[i]), p) is not None for p in padroes):
+            return i
+    return None
+
+
+def interpretar_planilha(caminho, chave_segmento):
+    """
+    DataFrame padronizado de uma planilha por bimestre: SEGMENTO, ANO, BIMESTRE,
+    DISCIPLINA (ou EIXO), colunas de texto do segmento e ARQUIVO
+    """
+    config = SEGMENTOS[chave_segmento]
+    padroes = list(config['colunas_texto'].values())
+    info = ler_nome_arquivo(caminho, chave_segmento)
+
+    bruto = pd.read_excel(caminho, header=None)
+    inicio = _linha_cabecalho(bruto, padroes)
+    if inicio is None:
+        raise ValueError('cabeçalho com as colunas de texto não encontrado')
+
+    # O título acima do cabeçalho completa o que o nome do arquivo não traz
+    # (ex.: "6-ano-1º-bimestre.xlsx" -> "LÍNGUA PORTUGUESA - 6º ANO - 1º BIMESTRE")
+    if not info['GRUPO'] or not info['ANO']:
+        titulo = next((v for linha in bruto.iloc[:inicio].itertuples(index=False)
+                       for v in linha if isinstance(v, str) and v.strip()), '')
+        do_titulo = ler_nome_arquivo(titulo, chave_segmento)
+        for campo in ('ANO', 'BIMESTRE', 'GRUPO'):
+            info[campo] = info[campo] or do_titulo[campo]
+
+    cabecalho = list(bruto.iloc[inicio])
+    dados = bruto.iloc[inicio + 1:].reset_index(drop=True)
+    dados.columns = range(len(cabecalho))
+    # Células mescladas ficam só na primeira linha do bloco
+    dados = dados.dropna(how='all').ffill()
+
+    textos = {}
+    for destino, padroes_coluna in config['colunas_texto'].items():
+        coluna = _encontrar_coluna(cabecalho, padroes_coluna)
+        textos[destino] = dados[coluna].map(_limpar_texto) if coluna is not None else pd.Series('', index=dados.index)
+
+    grupo = normalizar_disciplina(_limpar_texto(info['GRUPO']) or None)
+    grupo = config['disciplinas'].get(grupo, grupo)
+    df = pd.DataFrame({
+        'SEGMENTO': config['segmento'],
+        'ANO': info['ANO'],
+        'BIMESTRE': info['BIMESTRE'],
+        config['coluna_grupo']: grupo,
+        **textos,
+        'ARQUIVO': os.path.basename(caminho),
+    }, index=dados.index)
+    df['BIMESTRE'] = df['BIMESTRE'].astype('Int64')
+
+    # Só linhas com algum conteúdo
+    com_texto = pd.concat(list(textos.values()), axis=1).ne('').any(axis=1)
+    return df[com_texto].reset_index(drop=True)
+
+
+def descobrir_planilhas(chave_segmento, base_dir=None):
+    """Planilhas por bimestre da pasta do segmento (sem os consolidados manuais)"""
+    pasta = os.path.join(base_dir or BASE_DIR, SEGMENTOS[chave_segmento]['pasta'])
+    nomes = [nome for nome in os.listdir(pasta)
+             if nome.lower().endswith('.xlsx') and not nome.startswith('~$')
+             and 'normalizado' not in nome.lower() and not nome.lower().startswith('bncc')]
+    # Cópias "... (1).xlsx" depois do original, para o original ser o mantido
+    nomes.sort(key=lambda nome: (bool(_RE_COPIA.search(os.path.splitext(nome)[0])), nome))
+    return [os.path.join(pasta, nome) for nome in nomes]
+
+
+def _caminhos_saida(chave_segmento, diretorio):
+    base = os.path.join(diretorio, chave_segmento)
+    return {
+        'fragmentos': os.path.join(base, 'fragmentos'),
+        'manifesto': os.path.join(base, 'manifesto.json'),
+        'tabela': os.path.join(diretorio, f"{chave_segmento}_curriculo_consolidado.parquet"),
+    }
+
+
+def _ler_manifesto(caminho):
+    try:
+        with open(caminho, encoding='utf-8') as f:
+            manifesto = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifesto.get('arquivos', {}) if manifesto.get('versao') == VERSAO_CONSOLIDACAO else {}
+
+
+def _gravar_manifesto(caminho, arquivos):
+    temporario = caminho + f".tmp-{os.getpid()}"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump({'versao': VERSAO_CONSOLIDACAO, 'arquivos': arquivos}, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho)
+
+
+def _processar_arquivo(caminho, chave_segmento, caminho_fragmento):
+    """Trabalhador: interpreta uma planilha e grava o fragmento Parquet"""
+    df = interpretar_planilha(caminho, chave_segmento)
+    temporario = caminho_fragmento + f".tmp-{os.getpid()}"
+    _tipos_serializaveis(df).to_parquet(temporario, index=False)
+    os.replace(temporario, caminho_fragmento)
+    return len(df)
+
+
+def consolidar_segmento(chave_segmento, processos=None, forcar=False, diretorio=None, base_dir=None):
+    """
+    Consolida as planilhas do segmento relendo só as alteradas. Retorna o resumo
+    da execução (arquivos lidos, reaproveitados, com erro e total de linhas).
+    """
+    inicio = time.perf_counter()
+    saida = _caminhos_saida(chave_segmento, diretorio or DIRETORIO_CONSOLIDACAO)
+    os.makedirs(saida['fragmentos'], exist_ok=True)
+    anterior = {} if forcar else _ler_manifesto(saida['manifesto'])
+
+    arquivos, pendentes, duplicados = {}, {}, []
+    vistos = {}
+    for caminho in descobrir_planilhas(chave_segmento, base_dir):
+        nome = os.path.basename(caminho)
+        estado = os.stat(caminho)
+        registro = anterior.get(nome)
+        if registro and registro['mtime_ns'] == estado.st_mtime_ns and registro['tamanho'] == estado.st_size:
+            hash_arquivo = registro['hash']
+        else:
+            hash_arquivo = _hash_conteudo(caminho)
+        # Cópias idênticas (ex.: "... (1).xlsx") entram uma vez só
+        if hash_arquivo in vistos:
+            duplicados.append((nome, vistos[hash_arquivo]))
+            continue
+        vistos[hash_arquivo] = nome
+
+        fragmento = os.path.join(saida['fragmentos'], f"{hash_arquivo[:20]}.parquet")
+        arquivos[nome] = {'hash': hash_arquivo, 'mtime_ns': estado.st_mtime_ns, 'tamanho': estado.st_size,
+                          'fragmento': os.path.basename(fragmento)}
+        if registro and registro['hash'] == hash_arquivo and 'linhas' in registro and os.path.exists(fragmento):
+            arquivos[nome]['linhas'] = registro['linhas']
+        else:
+            pendentes[nome] = (caminho, fragmento)
+
+    erros = {}
+    if pendentes:
+        processos = processos or PROCESSOS_PADRAO or os.cpu_count() or 1
+        processos = min(processos, len(pendentes))
+        if processos <= 1:
+            resultados = {nome: _tentar(_processar_arquivo, c, chave_segmento, f)
+                          for nome, (c, f) in pendentes.items()}
+        else:
+            with ProcessPoolExecutor(max_workers=processos) as executor:
+                futuros = {nome: executor.submit(_processar_arquivo, c, chave_segmento, f)
+                           for nome, (c, f) in pendentes.items()}
+                resultados = {nome: _tentar(futuro.result) for nome, futuro in futuros.items()}
+        for nome, (linhas, erro) in resultados.items():
+            if erro:
+                erros[nome] = erro
+                del arquivos[nome]
+            else:
+                arquivos[nome]['linhas'] = linhas
+
+    for nome, original in duplicados:
+        print(f"⚠️ {nome}: conteúdo idêntico a {original}, ignorado")
+    for nome, erro in erros.items():
+        print(f"❌ {nome}: {erro}")
+
+    if pendentes or set(arquivos) != set(anterior) or not os.path.exists(saida['tabela']):
+        fragmentos = [pd.read_parquet(os.path.join(saida['fragmentos'], arquivos[nome]['fragmento']))
+                      for nome in sorted(arquivos)]
+        tabela = pd.concat(fragmentos, ignore_index=True) if fragmentos else pd.DataFrame()
+        temporario = saida['tabela'] + f".tmp-{os.getpid()}"
+        tabela.to_parquet(temporario, index=False)
+        os.replace(temporario, saida['tabela'])
+    if arquivos != anterior:
+        _gravar_manifesto(saida['manifesto'], arquivos)
+
+    # Fragmentos que nenhum arquivo atual usa
+    em_uso = {registro['fragmento'] for registro in arquivos.values()}
+    for nome in os.listdir(saida['fragmentos']):
+        if nome.endswith('.parquet') and nome not in em_uso:
+            os.remove(os.path.join(saida['fragmentos'], nome))
+
+    resumo = {
+        'segmento': chave_segmento,
+        'arquivos': len(arquivos),
+        'lidos': len(pendentes) - len(erros),
+        'reaproveitados': len(arquivos) - (len(pendentes) - len(erros)),
+        'duplicados': len(duplicados),
+        'erros': erros,
+        'linhas': sum(r['linhas'] for r in arquivos.values()),
+        'tabela': saida['tabela'],
+    }
+    print(f"📚 {chave_segmento}: {resumo['arquivos']} planilhas ({resumo['lidos']} lidas, "
+          f"{resumo['reaproveitados']} do manifesto), {resumo['linhas']} linhas "
+          f"em {time.perf_counter() - inicio:.1f}s → {os.path.relpath(saida['tabela'], BASE_DIR)}")
+    return resumo
+
+
+def _tentar(funcao, *args):
+    """(resultado, None) ou (None, mensagem de erro) — um arquivo ruim não derruba os demais"""
+    try:
+        return funcao(*args), None
+    except Exception as e:
+        return None, f"{e.__class__.__name__}: {e}"
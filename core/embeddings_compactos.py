@@ -0,0 +1,129 @@
+import os
+import numpy as np
+from sklearn.preprocessing import normalize
+
+# ==================================================================================
+#           EMBEDDINGS NORMALIZADOS E COMPACTOS (float32 / float16 / int8)
+# ==================================================================================
+# cosine_similarity normaliza as duas matrizes a cada chamada; no modo em blocos o
+# currículo inteiro era normalizado de novo a cada bloco de linhas da BNCC. Agora os
+# embeddings são normalizados (norma L2 = 1) uma vez, quando criados, e a nota é um
+# produto interno em float32 (pontuar). Com vetores normalizados pela mesma função,
+# as notas são idênticas às de cosine_similarity.
+#
+# Para guardar, os vetores normalizados podem ser compactados: float16 (metade do
+# espaço) ou int8 com uma escala por vetor (um quarto). O formato vem de
+# BNCC_FORMATO_EMBEDDINGS; o padrão float32 mantém as notas exatas. A perda de cada
+# formato nos dados do repositório é medida por scripts/relatorio_embeddings_compactos.py.
+
+FORMATOS = ('float32', 'float16', 'int8')
+FORMATO_EMBEDDINGS = os.environ.get('BNCC_FORMATO_EMBEDDINGS', 'float32')
+
+
+def normalizar(embeddings):
+    """Vetores com norma L2 = 1, em float32 (vetores nulos continuam nulos)"""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if embeddings.ndim != 2 or not embeddings.size:
+        return embeddings
+    return normalize(embeddings)
+
+
+def pontuar(a, b):
+    """Similaridade cosseno de vetores já normalizados: produto interno a·bᵀ em float32"""
+    return np.asarray(a, dtype=np.float32) @ np.asarray(b, dtype=np.float32).T
+
+
+class EmbeddingsCompactos:
+    """
+    Vetores normalizados em float32, float16 ou int8 (com `escalas`, uma por vetor:
+    vetor ≈ valores × escala)
+    """
+
+    def __init__(self, valores, escalas=None):
+        self.valores = valores
+        self.escalas = escalas
+
+    @classmethod
+    def compactar(cls, normalizados, formato=None):
+        formato = formato or FORMATO_EMBEDDINGS
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato de embeddings desconhecido: {formato}. Use {', '.join(FORMATOS)}")
+        normalizados = np.asarray(normalizados, dtype=np.float32)
+        if formato == 'float32':
+            return cls(normalizados)
+        if formato == 'float16':
+            return cls(normalizados.astype(np.float16))
+        maximos = np.abs(normalizados).max(axis=1) if normalizados.size else np.zeros(len(normalizados), np.float32)
+        escalas = (np.where(maximos > 0, maximos, 1) / 127).astype(np.float32)
+        valores = np.rint(normalizados / escalas[:, None]).astype(np.int8)
+        return cls(valores, escalas)
+
+    @property
+    def formato(self):
+        return np.dtype(self.valores.dtype).name
+
+    @property
+    def shape(self):
+        return self.valores.shape
+
+    def __len__(self):
+        return len(self.valores)
+
+    def nbytes(self):
+        return self.valores.nbytes + (self.escalas.nbytes if self.escalas is not None else 0)
+
+    def float32(self, inicio=None, fim=None):
+        """Vetores [inicio:fim] em float32 (sem cópia quando já são float32)"""
+        trecho = slice(inicio, fim)
+        valores = self.valores[trecho]
+        if self.escalas is not None:
+            return valores.astype(np.float32) * self.escalas[trecho, None]
+        return valores if valores.dtype == np.float32 else valores.astype(np.float32)
+
+    def __getitem__(self, indice):
+        """Vetores selecionados em float32; só a seleção é convertida"""
+        valores = self.valores[indice]
+        if self.escalas is not None:
+            return valores.astype(np.float32) * np.expand_dims(self.escalas[indice], -1)
+        return valores if valores.dtype == np.float32 else valores.astype(np.float32)
+
+    def __array__(self, dtype=None, copy=None):
+        # pontuar()/np.asarray com todos os vetores: conversão temporária, não guardada
+        return self.float32().astype(dtype or np.float32, copy=False)
+
+    def gravar(self, diretorio, nome='embeddings'):
+        np.save(os.path.join(diretorio, f'{nome}.npy'), np.asarray(self.valores))
+        if self.escalas is not None:
+            np.save(os.path.join(diretorio, f'{nome}_escalas.npy'), self.escalas)
+
+    @classmethod
+    def abrir(cls, diretorio, nome='embeddings'):
+        """Abre os arquivos gravados por gravar(), mapeados em memória"""
+        valores = np.load(os.path.join(diretorio, f'{nome}.npy'), mmap_mode='r')
+        caminho_escalas = os.path.join(diretorio, f'{nome}_escalas.npy')
+        escalas = np.load(caminho_escalas) if os.path.exists(caminho_escalas) else None
+        return cls(valores, escalas)
+
+
+def comparar_formatos(bncc, curriculo, formatos=FORMATOS):
+    """
+    Espaço e desvio das notas de cada formato em relação ao float32, para os
+    embeddings normalizados `bncc` e `curriculo`
+    """
+    referencia = pontuar(bncc, curriculo)
+    melhor_referencia = referencia.argmax(axis=1) if referencia.size else np.array([])
+    linhas = []
+    for formato in formatos:
+        b = EmbeddingsCompactos.compactar(bncc, formato)
+        c = EmbeddingsCompactos.compactar(curriculo, formato)
+        notas = pontuar(b.float32(), c.float32())
+        desvio = np.abs(notas - referencia)
+        linhas.append({
+            'formato': formato,
+            'bytes_bncc': b.nbytes(),
+            'bytes_curriculo': c.nbytes(),
+            'desvio_max': float(desvio.max()) if desvio.size else 0.0,
+            'desvio_medio': float(desvio.mean()) if desvio.size else 0.0,
+            'mesmo_top1': float((notas.argmax(axis=1) == melhor_referencia).mean()) if notas.size else 1.0,
+        })
+    return linhas
@@ -0,0 +1,217 @@
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# ==================================================================================
+#                FILA DE ANÁLISES EM SEGUNDO PLANO (/process → /jobs/<id>)
+# ==================================================================================
+# /process lia, codificava, fazia o matching, gravava os relatórios e desenhava o
+# heatmap de 300 dpi dentro da requisição HTTP: currículos grandes estouravam o
+# tempo limite do proxy e prendiam um worker do Flask durante a análise inteira.
+# Agora a requisição só grava o arquivo e enfileira uma tarefa; um pool limitado de
+# threads executa as análises e o cliente acompanha estado e etapa em /jobs/<id>
+# ou no fluxo SSE /jobs/<id>/eventos, avisado a cada mudança (esperar_mudanca).
+# Threads, e não processos: as tarefas compartilham o modelo já aquecido do
+# processo (core/modelos.py) e o artefato BNCC carregado.
+#
+# As tarefas vivem na memória do processo: com gunicorn, use um único processo com
+# várias threads (--workers 1 --threads N), senão a consulta pode cair em outro
+# processo. Tarefas à espera são limitadas (LIMITE_FILA) e, com a fila cheia, a
+# tarefa é recusada na hora (FilaCheia). Das encerradas, só as LIMITE_ENCERRADAS
+# mais recentes são mantidas.
+
+TRABALHADORES_FILA = int(os.environ.get('BNCC_FILA_TRABALHADORES', 2))
+LIMITE_FILA = int(os.environ.get('BNCC_FILA_LIMITE', 20))
+LIMITE_ENCERRADAS = int(os.environ.get('BNCC_FILA_ENCERRADAS', 100))
+
+# Estados de uma tarefa
+NA_FILA, PROCESSANDO, CONCLUIDA, ERRO = 'na_fila', 'processando', 'concluida', 'erro'
+
+
+class FilaCheia(Exception):
+    """Tarefas à espera já atingiram o limite da fila"""
+
+
+class Tarefa:
+    """Uma análise enfileirada: estado, etapa atual, duração das etapas e resultado"""
+
+    def __init__(self, id_tarefa, executar, argumentos, parametros, etapas):
+        self.id = id_tarefa
+        self.executar = executar
+        self.argumentos = argumentos
+        self.parametros = parametros
+        self.estado = NA_FILA
+        self.etapa = None
+        self.etapas = [{'etapa': etapa, 'descricao': descricao, 'inicio': None, 'fim': None,
+                        'feito': None, 'total': None}
+                       for etapa, descricao in etapas.items()]
+        self.resultado = None
+        self.erro = None
+        self.criada_em = time.time()
+        self.iniciada_em = None
+        self.encerrada_em = None
+        # Número da última mudança; quem espera por ela é acordado pela condição
+        self.versao = 0
+        self._lock = threading.Lock()
+        self._mudou = threading.Condition(self._lock)
+
+    def _registrar_mudanca(self):
+        self.versao += 1
+        self._mudou.notify_all()
+
+    def avisar_etapa(self, etapa, feito=None, total=None):
+        """
+        Callback `progresso` da análise: inicia `etapa` (encerrando a atual) ou, se
+        já é a atual, só atualiza a contagem de itens `feito` de `total`
+        """
+        agora = time.time()
+        with self._lock:
+            for registro in self.etapas:
+                if etapa != self.etapa and registro['etapa'] == self.etapa and registro['fim'] is None:
+                    registro['fim'] = agora
+                if registro['etapa'] == etapa:
+                    if etapa != self.etapa:
+                        registro['inicio'] = agora
+                    registro['feito'], registro['total'] = feito, total
+            self.etapa = etapa
+            self._registrar_mudanca()
+
+    def esperar_mudanca(self, versao, timeout=None):
+        """Espera a tarefa passar da `versao` (ou o timeout) e devolve a versão atual"""
+        with self._lock:
+            self._mudou.wait_for(lambda: self.versao != versao, timeout)
+            return self.versao
+
+    def _encerrar(self, estado, resultado=None, erro=None):
+        agora = time.time()
+        with self._lock:
+            for registro in self.etapas:
+                if registro['inicio'] is not None and registro['fim'] is None:
+                    registro['fim'] = agora
+            self.estado, self.resultado, self.erro = estado, resultado, erro
+            self.encerrada_em = agora
+            self.argumentos = None
+            self._registrar_mudanca()
+
+    @property
+    def encerrada(self):
+        return self.estado in (CONCLUIDA, ERRO)
+
+    def situacao(self):
+        """Cópia do estado para consulta (sem o resultado)"""
+        with self._lock:
+            etapas = []
+            for registro in self.etapas:
+                if registro['fim'] is not None:
+                    situacao = 'concluida'
+                elif registro['inicio'] is not None:
+                    situacao = 'em_andamento'
+                else:
+                    situacao = 'pendente'
+                duracao = None
+                if registro['inicio'] is not None:
+                    duracao = round((registro['fim'] or time.time()) - registro['inicio'], 2)
+                etapas.append({'etapa': registro['etapa'], 'descricao': registro['descricao'],
+                               'situacao': situacao, 'duracao_segundos': duracao,
+                               'feito': registro['feito'], 'total': registro['total']})
+            concluidas = sum(1 for e in etapas if e['situacao'] == 'concluida')
+            return {
+                'id': self.id,
+                'versao': self.versao,
+                'estado': self.estado,
+                'etapa': self.etapa,
+                'etapas': etapas,
+                'progresso': 1.0 if self.estado == CONCLUIDA else round(concluidas / max(len(etapas), 1), 2),
+                'parametros': dict(self.parametros),
+                'erro': self.erro,
+                'criada_em': self.criada_em,
+                'iniciada_em': self.iniciada_em,
+                'encerrada_em': self.encerrada_em,
+            }
+
+
+class FilaAnalises:
+    """
+    Pool limitado de threads que executa `executar(*argumentos, progresso=...)` de
+    cada tarefa enfileirada
+    """
+
+    def __init__(self, trabalhadores=None, limite=None, limite_encerradas=None):
+        self.trabalhadores = trabalhadores or TRABALHADORES_FILA
+        self.limite = limite or LIMITE_FILA
+        self.limite_encerradas = limite_encerradas or LIMITE_ENCERRADAS
+        self._executor = None
+        self._tarefas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def enfileirar(self, executar, *argumentos, parametros=None, etapas=None, id_tarefa=None):
+        """Cria a tarefa e a coloca na fila; FilaCheia se já houver `limite` à espera"""
+        with self._lock:
+            if sum(1 for t in self._tarefas.values() if t.estado == NA_FILA) >= self.limite:
+                raise FilaCheia(f'Fila de análises cheia ({self.limite} à espera). Tente novamente em instantes.')
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.trabalhadores,
+                                                    thread_name_prefix='fila-analises')
+            tarefa = Tarefa(id_tarefa or uuid.uuid4().hex, executar, argumentos,
+                            parametros or {}, etapas or {})
+            self._tarefas[tarefa.id] = tarefa
+            self._executor.submit(self._executar, tarefa)
+        print(f"📥 Tarefa {tarefa.id} na fila ({self.posicao(tarefa)} à frente)")
+        return tarefa
+
+    def registrar_concluida(self, resultado, parametros=None, id_tarefa=None):
+        """Registra como concluída, sem passar pela fila, uma análise já resolvida (cache de resultados)"""
+        tarefa = Tarefa(id_tarefa or uuid.uuid4().hex, None, (), parametros or {}, {})
+        tarefa.iniciada_em = tarefa.criada_em
+        tarefa._encerrar(CONCLUIDA, resultado=resultado)
+        with self._lock:
+            self._tarefas[tarefa.id] = tarefa
+        self._descartar_encerradas()
+        return tarefa
+
+    def _executar(self, tarefa):
+        with tarefa._lock:
+            tarefa.estado = PROCESSANDO
+            tarefa.iniciada_em = time.time()
+            tarefa._registrar_mudanca()
+        print(f"⚙️ Tarefa {tarefa.id} em processamento")
+        try:
+            resultado = tarefa.executar(*tarefa.argumentos, progresso=tarefa.avisar_etapa)
+        except Exception as e:
+            print(f"❌ Tarefa {tarefa.id} com erro: {e}")
+            tarefa._encerrar(ERRO, erro=str(e))
+        else:
+            tarefa._encerrar(CONCLUIDA, resultado=resultado)
+            print(f"✅ Tarefa {tarefa.id} concluída em {tarefa.encerrada_em - tarefa.iniciada_em:.1f}s")
+        self._descartar_encerradas()
+
+    def _descartar_encerradas(self):
+        """Mantém só as `limite_encerradas` tarefas encerradas mais recentes"""
+        with self._lock:
+            encerradas = [t for t in self._tarefas.values() if t.encerrada]
+            encerradas.sort(key=lambda t: t.encerrada_em)
+            for tarefa in encerradas[:max(len(encerradas) - self.limite_encerradas, 0)]:
+                del self._tarefas[tarefa.id]
+
+    def obter(self, id_tarefa):
+        """Tarefa pelo id, ou None (desconhecida ou já descartada)"""
+        with self._lock:
+            return self._tarefas.get(id_tarefa)
+
+    def posicao(self, tarefa):
+        """Quantas tarefas à espera estão à frente de `tarefa` (0 fora da fila)"""
+        with self._lock:
+            if tarefa.estado != NA_FILA:
+                return 0
+            return sum(1 for t in self._tarefas.values()
+                       if t.estado == NA_FILA and t.criada_em < tarefa.criada_em)
+
+    def encerrar(self, esperar=True):
+        """Desliga o pool (usado nos testes e no desligamento do processo)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=esperar, cancel_futures=not esperar)
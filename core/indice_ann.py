@@ -0,0 +1,189 @@
+import os
+import numpy as np
+from sklearn.preprocessing import normalize
+
+from core.motor_balanceado import CurriculoPreparado
+from core.similaridade_blocos import CandidatosTopK, K_PADRAO
+
+# ==================================================================================
+#          ÍNDICE APROXIMADO (IVF + PQ OPCIONAL) SOBRE OS EMBEDDINGS DO CURRÍCULO
+# ==================================================================================
+# Para currículos muito grandes, pontuar todas as combinações BNCC × currículo domina
+# o tempo mesmo vetorizado. O índice agrupa os embeddings do currículo com k-means
+# (quantização grosseira, IVF) e cada linha da BNCC só é comparada com as linhas das
+# `n_sondas` listas de centróides mais próximos (o controle de recall). Com PQ, as
+# notas das listas sondadas são estimadas por quantização de produto dos resíduos e
+# só as melhores são reordenadas com a nota exata. Tudo em NumPy, sem serviço externo.
+# Como o algoritmo balanceado consulta toda disciplina em toda linha, a disciplina
+# sem linhas nas listas sondadas fica sem candidata naquela linha da BNCC (recalcular
+# o trecho dela anularia a economia do índice); só se nenhuma disciplina tiver
+# candidata livre o trecho é pontuado por inteiro (CandidatosTopK com exato=False).
+
+N_LISTAS_PADRAO = int(os.environ.get('BNCC_ANN_LISTAS', 0))  # 0 = √(linhas do currículo)
+N_SONDAS_PADRAO = int(os.environ.get('BNCC_ANN_SONDAS', 8))
+PQ_SUBESPACOS_PADRAO = int(os.environ.get('BNCC_ANN_PQ_SUBESPACOS', 0))  # 0 = sem PQ
+PQ_REORDENAR_PADRAO = int(os.environ.get('BNCC_ANN_PQ_REORDENAR', 512))
+
+# Pontos usados para treinar os k-means (o restante só é atribuído)
+_MAX_PONTOS_TREINO = 20_000
+
+
+def _mais_proximo(vetores, centroides, esferico):
+    produtos = vetores @ centroides.T
+    if not esferico:
+        # argmin ||x - c||² = argmax (x·c - ||c||²/2)
+        produtos -= 0.5 * np.einsum('ij,ij->i', centroides, centroides)
+    return np.argmax(produtos, axis=1)
+
+
+def _kmeans(vetores, n_grupos, iteracoes=20, semente=0, esferico=False):
+    """
+    k-means de Lloyd em NumPy puro; esferico=True usa similaridade cosseno
+    (vetores e centróides unitários). Retorna (centróides, atribuição de cada vetor).
+    """
+    rng = np.random.default_rng(semente)
+    n_grupos = min(n_grupos, len(vetores))
+    treino = vetores
+    if len(vetores) > _MAX_PONTOS_TREINO:
+        treino = vetores[rng.choice(len(vetores), size=_MAX_PONTOS_TREINO, replace=False)]
+
+    centroides = treino[rng.choice(len(treino), size=n_grupos, replace=False)].astype(np.float32)
+    for _ in range(iteracoes):
+        atribuicao = _mais_proximo(treino, centroides, esferico)
+        somas = np.zeros_like(centroides)
+        np.add.at(somas, atribuicao, treino)
+        contagem = np.bincount(atribuicao, minlength=n_grupos)
+        vazios = contagem == 0
+        somas[~vazios] /= contagem[~vazios, None]
+        # Grupo vazio recomeça em um ponto qualquer do treino
+        somas[vazios] = treino[rng.choice(len(treino), size=int(vazios.sum()))]
+        if esferico:
+            somas = normalize(somas)
+        if np.allclose(somas, centroides):
+            centroides = somas
+            break
+        centroides = somas
+    return centroides, _mais_proximo(vetores, centroides, esferico)
+
+
+class IndiceIVF:
+    """
+    Índice de listas invertidas sobre vetores unitários, com PQ opcional dos resíduos
+    """
+
+    def __init__(self, n_listas=N_LISTAS_PADRAO, pq_subespacos=PQ_SUBESPACOS_PADRAO,
+                 pq_reordenar=PQ_REORDENAR_PADRAO, iteracoes=20, semente=0):
+        self.n_listas = n_listas
+        self.pq_subespacos = pq_subespacos
+        self.pq_reordenar = pq_reordenar
+        self.iteracoes = iteracoes
+        self.semente = semente
+
+    def construir(self, embeddings):
+        vetores = normalize(np.asarray(embeddings, dtype=np.float32))
+        n_listas = self.n_listas or max(1, int(round(np.sqrt(len(vetores)))))
+        self.centroides, atribuicao = _kmeans(vetores, n_listas, self.iteracoes, self.semente, esferico=True)
+        self.n_listas = len(self.centroides)
+
+        # Linhas agrupadas por lista: lista l ocupa [limites[l], limites[l + 1])
+        ordem = np.argsort(atribuicao, kind='stable')
+        self.posicoes = ordem.astype(np.int32)
+        self.lista_de = atribuicao[ordem]
+        self.limites = np.concatenate([[0], np.cumsum(np.bincount(atribuicao, minlength=self.n_listas))])
+        self.vetores = vetores[ordem]
+
+        if self.pq_subespacos:
+            self._treinar_pq(self.vetores - self.centroides[self.lista_de])
+        return self
+
+    def _treinar_pq(self, residuos):
+        m = self.pq_subespacos
+        dimensao = residuos.shape[1]
+        if dimensao % m:
+            raise ValueError(f"Dimensão {dimensao} não é divisível por {m} subespaços de PQ")
+        self.pq_dimensao = dimensao // m
+        livros, codigos = [], []
+        for j in range(m):
+            parte = residuos[:, j * self.pq_dimensao:(j + 1) * self.pq_dimensao]
+            livro, codigo = _kmeans(np.ascontiguousarray(parte), 256, self.iteracoes, self.semente + j)
+            livros.append(livro)
+            codigos.append(codigo)
+        # Livros com o mesmo número de centróides (o k-means limita ao total de pontos)
+        self.pq_livros = np.stack(livros)
+        self.pq_codigos = np.stack(codigos, axis=1).astype(np.uint8)
+
+    def listas_sondadas(self, consulta, n_sondas):
+        proximidade = self.centroides @ consulta
+        if n_sondas >= self.n_listas:
+            return np.arange(self.n_listas)
+        return np.argpartition(-proximidade, n_sondas - 1)[:n_sondas]
+
+    def buscar(self, consulta, n_sondas=N_SONDAS_PADRAO):
+        """
+        (posições no currículo, notas cosseno) das linhas das `n_sondas` listas mais
+        próximas da consulta. Com PQ, só as `pq_reordenar` melhores pela nota estimada
+        voltam, já com a nota exata.
+        """
+        consulta = normalize(np.asarray(consulta, dtype=np.float32).reshape(1, -1))[0]
+        listas = self.listas_sondadas(consulta, n_sondas)
+        internos = np.concatenate([np.arange(self.limites[l], self.limites[l + 1]) for l in listas])
+
+        if self.pq_subespacos and len(internos) > self.pq_reordenar:
+            m = self.pq_subespacos
+            # Tabelas de produto interno consulta × centróides de cada subespaço
+            tabelas = np.einsum('mkd,md->mk', self.pq_livros, consulta.reshape(m, self.pq_dimensao))
+            estimadas = (self.centroides[self.lista_de[internos]] @ consulta +
+                         tabelas[np.arange(m), self.pq_codigos[internos]].sum(axis=1))
+            melhores = np.argpartition(-estimadas, self.pq_reordenar - 1)[:self.pq_reordenar]
+            internos = np.sort(internos[melhores])
+
+        return self.posicoes[internos], self.vetores[internos] @ consulta
+
+    def nbytes(self):
+        total = self.centroides.nbytes + self.posicoes.nbytes + self.vetores.nbytes
+        if self.pq_subespacos:
+            total += self.pq_livros.nbytes + self.pq_codigos.nbytes
+        return total
+
+
+def calcular_candidatos_ann(bncc_embeddings, curriculo_embeddings, curriculo_df, k=K_PADRAO,
+                            n_sondas=N_SONDAS_PADRAO, indice=None, codigos=None, avanco=None):
+    """
+    Consulta o índice com cada linha da BNCC e monta as listas top-k por disciplina
+    (CandidatosTopK aproximado) para o algoritmo balanceado; `codigos` é o
+    IndiceCodigos do currículo, se já extraído, e `avanco` (core.progresso.Avanco)
+    conta as linhas BNCC consultadas
+    """
+    curriculo = CurriculoPreparado(curriculo_df, codigos)
+    if indice is None:
+        indice = IndiceIVF().construir(curriculo_embeddings)
+
+    total_bncc = len(bncc_embeddings)
+    total_disciplinas = len(curriculo.disciplinas)
+    disciplina_de = np.empty(curriculo.total, dtype=np.intp)
+    for d in range(total_disciplinas):
+        disciplina_de[curriculo.ordem[curriculo.inicios[d]:curriculo.fins[d]]] = d
+
+    tamanhos_k = [min(k, curriculo.tamanhos[d]) for d in curriculo.disciplinas]
+    colunas = [np.full((total_bncc, kd), -1, dtype=np.int32) for kd in tamanhos_k]
+    notas = [np.full((total_bncc, kd), -np.inf, dtype=np.float32) for kd in tamanhos_k]
+
+    print(f"🧭 Índice IVF: {indice.n_listas} listas, {n_sondas} sondas por consulta"
+          f"{f', PQ com {indice.pq_subespacos} subespaços' if indice.pq_subespacos else ''}")
+
+    for i in range(total_bncc):
+        posicoes, valores = indice.buscar(bncc_embeddings[i], n_sondas)
+        discs = disciplina_de[posicoes]
+        # Agrupa por disciplina; dentro dela, nota decrescente e posição crescente
+        ordem = np.lexsort((posicoes, -valores, discs))
+        posicoes, valores, discs = posicoes[ordem], valores[ordem], discs[ordem]
+        inicios = np.searchsorted(discs, np.arange(total_disciplinas), side='left')
+        fins = np.searchsorted(discs, np.arange(total_disciplinas), side='right')
+        for d, kd in enumerate(tamanhos_k):
+            n = min(kd, fins[d] - inicios[d])
+            colunas[d][i, :n] = posicoes[inicios[d]:inicios[d] + n]
+            notas[d][i, :n] = valores[inicios[d]:inicios[d] + n]
+        if avanco is not None:
+            avanco(i + 1)
+
+    return CandidatosTopK(curriculo, colunas, notas, bncc_embeddings, curriculo_embeddings, exato=False)
@@ -0,0 +1,283 @@
+import io
+import os
+import csv
+import codecs
+import itertools
+import numpy as np
+import pandas as pd
+
+from core.tabelas_parquet import COLUNAS_ANALISE
+
+# ==================================================================================
+#           LEITURA DO UPLOAD: CABEÇALHO PRIMEIRO, DEPOIS SÓ AS COLUNAS USADAS
+# ==================================================================================
+# Antes, o arquivo enviado era lido inteiro (pd.read_excel/pd.read_csv) e só depois
+# as colunas eram validadas: uma planilha de 50 MB com o layout errado gastava
+# segundos e centenas de MB para falhar. Aqui a primeira linha é lida sozinha
+# (openpyxl em modo read-only ou o sniffer do csv), o layout é validado e só então
+# as linhas são percorridas em fluxo, guardando apenas as colunas usadas pela
+# análise. O DataFrame resultante é o mesmo que pd.read_excel/pd.read_csv dariam
+# para essas colunas.
+#
+# CSV: codificação e separador vêm de uma amostra do início do arquivo (exportações
+# brasileiras costumam ser latin-1/cp1252 com ';'). As linhas são lidas pelo leitor
+# em fluxo do pyarrow, em blocos de BLOCO_CSV_BYTES, só com as colunas usadas e como
+# texto; ler_e_codificar_curriculo codifica cada bloco antes de ler o próximo, então
+# o texto bruto do arquivo nunca fica inteiro em memória.
+
+# Bytes inspecionados para descobrir a codificação e o separador do CSV
+_AMOSTRA_CSV = 64 * 1024
+# Tentadas em ordem; latin-1 aceita qualquer sequência de bytes
+_CODIFICACOES_CSV = ('utf-8-sig', 'cp1252', 'latin-1')
+BLOCO_CSV_BYTES = int(os.environ.get('BNCC_CSV_BLOCO_BYTES', 16 * 1024 * 1024))
+
+
+def validar_colunas(colunas, tipo, segment):
+    """
+    (colunas ausentes, colunas necessárias) para a BNCC ou o currículo do segmento
+    """
+    cols = set(colunas)
+
+    if 'infantil' in segment.lower():
+        # Para infantil, o currículo pode ter ANO ou não
+        required = ['EIXO', 'OBJETIVO DE APRENDIZAGEM', 'EXEMPLOS']
+    elif tipo == 'bncc':
+        required = ['EIXO', 'HABILIDADE', 'EXEMPLOS']
+    elif 'HABILIDADE' in cols and 'HABILIDADES' not in cols:
+        # Aceitar variações comuns nas colunas do currículo
+        required = ['DISCIPLINA', 'HABILIDADE', 'ORIENTACOES_PEDAGOGICAS']
+    else:
+        required = ['DISCIPLINA', 'HABILIDADES', 'ORIENTACOES_PEDAGOGICAS']
+
+    missing = [col for col in required if col not in cols]
+    return missing, required
+
+
+def _nomes_colunas(valores):
+    """Nomes como o pandas os gera: vazias viram 'Unnamed: i', repetidas ganham '.1'"""
+    nomes, vistos = [], {}
+    for i, valor in enumerate(valores):
+        nome = f"Unnamed: {i}" if valor is None or valor == '' else valor
+        if nome in vistos:
+            vistos[nome] += 1
+            nome = f"{nome}.{vistos[nome]}"
+        else:
+            vistos[nome] = 0
+        nomes.append(nome)
+    return nomes
+
+
+def _valor_celula(valor):
+    # Mesma conversão do leitor openpyxl do pandas
+    if valor is None or valor == '':
+        return np.nan
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    return valor
+
+
+def detectar_formato_csv(caminho):
+    """(codificação, separador) do CSV a partir de uma amostra do início do arquivo"""
+    with open(caminho, 'rb') as f:
+        amostra = f.read(_AMOSTRA_CSV)
+    for codificacao in _CODIFICACOES_CSV:
+        try:
+            # final=False: a amostra pode terminar no meio de um caractere multibyte
+            texto = codecs.getincrementaldecoder(codificacao)().decode(amostra, final=False)
+            break
+        except UnicodeDecodeError:
+            continue
+    return codificacao, _separador_csv(texto)
+
+
+def _separador_csv(amostra):
+    """
+    Separador com o qual as linhas da amostra têm o mesmo número de campos do
+    cabeçalho (o csv.Sniffer se confunde com as vírgulas dos textos longos)
+    """
+    melhor, pontuacao_melhor = ',', None
+    for candidato in ',;\t|':
+        try:
+            linhas = list(itertools.islice(csv.reader(io.StringIO(amostra), delimiter=candidato), 200))
+        except csv.Error:
+            continue
+        # A última linha da amostra pode estar cortada
+        linhas = [l for l in linhas[:-1] or linhas if l]
+        if not linhas or len(linhas[0]) < 2:
+            continue
+        consistentes = sum(len(l) == len(linhas[0]) for l in linhas) / len(linhas)
+        pontuacao = (consistentes, len(linhas[0]))
+        if pontuacao_melhor is None or pontuacao > pontuacao_melhor:
+            melhor, pontuacao_melhor = candidato, pontuacao
+    return melhor
+
+
+def listar_abas(caminho):
+    """Nomes das abas da pasta de trabalho, na ordem do arquivo (CSV: nenhuma)"""
+    ext = os.path.splitext(caminho)[1].lower()
+    if ext == '.xlsx':
+        from openpyxl import load_workbook
+        livro = load_workbook(caminho, read_only=True)
+        try:
+            return list(livro.sheetnames)
+        finally:
+            livro.close()
+    if ext == '.xls':
+        return list(pd.ExcelFile(caminho).sheet_names)
+    return []
+
+
+def _planilha(livro, aba):
+    return livro[aba] if aba is not None else livro.worksheets[0]
+
+
+def ler_cabecalho(caminho, aba=None):
+    """
+    Colunas do arquivo (sem espaços nas pontas) lendo só a primeira linha da aba
+    (padrão: a primeira). Retorna None para formatos sem leitura parcial (.xls).
+    """
+    ext = os.path.splitext(caminho)[1].lower()
+    if ext == '.xlsx':
+        from openpyxl import load_workbook
+        livro = load_workbook(caminho, read_only=True, data_only=True)
+        try:
+            planilha = _planilha(livro, aba)
+            primeira = next(planilha.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        finally:
+            livro.close()
+        return [str(c).strip() for c in _nomes_colunas(list(primeira))]
+    if ext == '.csv':
+        codificacao, separador = detectar_formato_csv(caminho)
+        with open(caminho, newline='', encoding=codificacao) as f:
+            primeira = next(csv.reader(f, delimiter=separador), [])
+        return [str(c).strip() for c in _nomes_colunas(primeira)]
+    return None
+
+
+def _ler_xlsx_colunas(caminho, colunas, aba=None):
+    """Percorre as linhas em modo read-only guardando só as colunas pedidas"""
+    from openpyxl import load_workbook
+    livro = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        planilha = _planilha(livro, aba)
+        planilha.reset_dimensions()
+        linhas = planilha.iter_rows(values_only=True)
+        nomes = [str(c).strip() for c in _nomes_colunas(list(next(linhas, ())))]
+        posicoes = [nomes.index(c) for c in colunas]
+        dados = [[] for _ in colunas]
+        ultima_com_dados = 0
+        for numero, linha in enumerate(linhas, 1):
+            for destino, posicao in zip(dados, posicoes):
+                destino.append(_valor_celula(linha[posicao] if posicao < len(linha) else None))
+            # Linhas vazias no fim da planilha são descartadas (como no pandas)
+            if any(v is not None and v != '' for v in linha):
+                ultima_com_dados = numero
+    finally:
+        livro.close()
+    return pd.DataFrame({c: d[:ultima_com_dados] for c, d in zip(colunas, dados)})
+
+
+def ler_csv_em_blocos(caminho, colunas, bloco_bytes=None):
+    """
+    DataFrames sucessivos do CSV (pyarrow, em fluxo) só com `colunas`, todas como
+    texto; o índice continua de um bloco para o outro
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    codificacao, separador = detectar_formato_csv(caminho)
+    with open(caminho, newline='', encoding=codificacao) as f:
+        nomes = [str(c).strip() for c in _nomes_colunas(next(csv.reader(f, delimiter=separador), []))]
+
+    leitor = pacsv.open_csv(
+        caminho,
+        read_options=pacsv.ReadOptions(
+            # O cabeçalho já foi lido (e o BOM, se houver, fica nessa linha pulada)
+            encoding='utf8' if codificacao == 'utf-8-sig' else codificacao,
+            column_names=nomes, skip_rows=1, block_size=bloco_bytes or BLOCO_CSV_BYTES),
+        parse_options=pacsv.ParseOptions(delimiter=separador, newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=[c for c in nomes if c in colunas],
+            column_types={c: pa.string() for c in colunas},
+            strings_can_be_null=True),
+    )
+    inicio = 0
+    for lote in leitor:
+        df = lote.to_pandas()
+        df.index = pd.RangeIndex(inicio, inicio + len(df))
+        inicio += len(df)
+        yield df
+
+
+def _exigir_colunas(cabecalho, segment):
+    missing, required = validar_colunas(cabecalho, 'curriculo', segment)
+    if missing:
+        raise Exception(f'Colunas ausentes no arquivo do currículo: {missing}. Colunas necessárias: {required}. '
+                        f'Colunas disponíveis: {cabecalho}')
+
+
+def conferir_layout(caminho, segment, aba=None):
+    """
+    Valida formato e colunas do currículo só pelo cabeçalho e retorna o cabeçalho
+    (None para .xls, validado depois de lido)
+    """
+    ext = os.path.splitext(caminho)[1].lower()
+    if ext not in ('.xlsx', '.xls', '.csv'):
+        raise Exception('Formato de arquivo não suportado')
+    cabecalho = ler_cabecalho(caminho, aba)
+    if cabecalho is not None:
+        _exigir_colunas(cabecalho, segment)
+    return cabecalho
+
+
+def _colunas_validadas(caminho, segment, aba=None):
+    """
+    Colunas usadas pela análise, validando o layout antes das linhas. Para .xls
+    (sem leitura parcial) retorna também o DataFrame já lido.
+    """
+    df = None
+    cabecalho = conferir_layout(caminho, segment, aba)
+    if cabecalho is None:
+        # .xls não tem leitura parcial: lê tudo e valida depois
+        df = pd.read_excel(caminho, sheet_name=aba if aba is not None else 0)
+        df.columns = df.columns.str.strip()
+        cabecalho = list(df.columns)
+        _exigir_colunas(cabecalho, segment)
+    return [c for c in cabecalho if c in COLUNAS_ANALISE], df
+
+
+def ler_curriculo_enviado(caminho, segment, aba=None):
+    """
+    Lê o currículo enviado (na pasta de trabalho, a aba `aba` ou a primeira)
+    validando o cabeçalho antes das linhas; só as colunas usadas na análise são
+    carregadas
+    """
+    colunas, df = _colunas_validadas(caminho, segment, aba)
+    if df is not None:
+        return df[colunas]
+    if caminho.lower().endswith('.xlsx'):
+        return _ler_xlsx_colunas(caminho, colunas, aba)
+    blocos = list(ler_csv_em_blocos(caminho, colunas))
+    return pd.concat(blocos) if blocos else pd.DataFrame(columns=colunas)
+
+
+def ler_e_codificar_curriculo(caminho, segment, codificar):
+    """
+    (DataFrame, embeddings) do currículo enviado. `codificar(df)` devolve a matriz de
+    embeddings das linhas de `df`; no CSV ela é chamada a cada bloco lido, nos
+    demais formatos uma vez com o arquivo inteiro.
+    """
+    if not caminho.lower().endswith('.csv'):
+        df = ler_curriculo_enviado(caminho, segment)
+        return df, codificar(df)
+
+    colunas, _ = _colunas_validadas(caminho, segment)
+    blocos, embeddings = [], []
+    for bloco in ler_csv_em_blocos(caminho, colunas):
+        blocos.append(bloco)
+        embeddings.append(codificar(bloco))
+    if not blocos:
+        return pd.DataFrame(columns=colunas), np.zeros((0, 0), dtype=np.float32)
+    if len(blocos) > 1:
+        print(f"📥 CSV lido e codificado em {len(blocos)} blocos ({blocos[-1].index[-1] + 1} linhas)")
+    return pd.concat(blocos), np.vstack(embeddings)
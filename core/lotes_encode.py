@@ -0,0 +1,110 @@
+import os
+import time
+import numpy as np
+
+# ==================================================================================
+#           LOTES DINÂMICOS POR COMPRIMENTO (ORÇAMENTO DE TOKENS POR LOTE)
+# ==================================================================================
+# Os textos do currículo variam de poucas palavras a parágrafos inteiros de
+# ORIENTACOES_PEDAGOGICAS. Com lote fixo na ordem do arquivo, cada lote é preenchido
+# (padding) até o texto mais longo dele e a maior parte do processamento é
+# desperdiçada. O agendador ordena os textos pelo número de tokens, forma lotes
+# consecutivos cujo tamanho respeita um orçamento de tokens (lote × maior texto do
+# lote) e devolve os embeddings na ordem original.
+
+ORCAMENTO_TOKENS_PADRAO = int(os.environ.get('BNCC_ENCODE_ORCAMENTO_TOKENS', 8192))
+LOTE_MAXIMO_PADRAO = int(os.environ.get('BNCC_ENCODE_LOTE_MAXIMO', 256))
+LOTES_DINAMICOS = os.environ.get('BNCC_ENCODE_LOTES_DINAMICOS', '1') != '0'
+
+# Lote fixo usado como referência no relatório (padrão do SentenceTransformer)
+LOTE_FIXO_REFERENCIA = 32
+
+
+def comprimentos_tokens(model, textos):
+    """
+    Tokens de cada texto (com tokens especiais e truncamento do modelo). Modelos sem
+    tokenizer (ex.: backend 'hash') usam a contagem de palavras como aproximação.
+    """
+    tokenizer = getattr(model, 'tokenizer', None)
+    if tokenizer is None:
+        return np.array([len(str(t).split()) + 2 for t in textos], dtype=np.int64)
+    maximo = getattr(model, 'max_seq_length', None) or None
+    ids = tokenizer([str(t) for t in textos], add_special_tokens=True,
+                    truncation=maximo is not None, max_length=maximo)['input_ids']
+    return np.array([len(i) for i in ids], dtype=np.int64)
+
+
+def planejar_lotes(comprimentos, orcamento_tokens=None, lote_maximo=None):
+    """
+    Ordem decrescente de comprimento e limites dos lotes: lista de arrays de
+    posições originais, cada lote com tamanho × maior comprimento <= orçamento
+    """
+    orcamento_tokens = orcamento_tokens or ORCAMENTO_TOKENS_PADRAO
+    lote_maximo = lote_maximo or LOTE_MAXIMO_PADRAO
+    comprimentos = np.asarray(comprimentos)
+    # Mais longos primeiro: o lote mais pesado roda logo no início
+    ordem = np.argsort(-comprimentos, kind='stable')
+    lotes = []
+    inicio = 0
+    while inicio < len(ordem):
+        # Em ordem decrescente, o maior texto do lote é o primeiro
+        tamanho = max(1, min(lote_maximo, orcamento_tokens // max(1, comprimentos[ordem[inicio]])))
+        lotes.append(ordem[inicio:inicio + tamanho])
+        inicio += tamanho
+    return lotes
+
+
+def estatisticas_padding(comprimentos, lotes):
+    """Tokens reais, tokens processados (com padding) e fração desperdiçada"""
+    comprimentos = np.asarray(comprimentos)
+    reais = int(comprimentos.sum())
+    processados = int(sum(len(l) * comprimentos[l].max() for l in lotes if len(l)))
+    return {
+        'lotes': len(lotes),
+        'tokens_reais': reais,
+        'tokens_processados': processados,
+        'desperdicio_padding': 1 - reais / processados if processados else 0.0,
+    }
+
+
+def lotes_ordem_arquivo(total, tamanho_lote=LOTE_FIXO_REFERENCIA):
+    """Lotes fixos na ordem original (comportamento anterior, para comparação)"""
+    return [np.arange(i, min(i + tamanho_lote, total)) for i in range(0, total, tamanho_lote)]
+
+
+def codificar_em_lotes(model, textos, orcamento_tokens=None, lote_maximo=None, avanco=None, **kwargs_encode):
+    """
+    model.encode em lotes dinâmicos por comprimento; retorna matriz float32 na
+    ordem de `textos`. `avanco` (core.progresso.Avanco) soma os textos de cada lote.
+    """
+    textos = list(textos)
+    # Sem tokenizer (ex.: backend 'hash') não há padding a economizar
+    if not LOTES_DINAMICOS or len(textos) <= 1 or getattr(model, 'tokenizer', None) is None:
+        resultado = np.asarray(model.encode(textos, **kwargs_encode), dtype=np.float32)
+        if avanco is not None:
+            avanco.somar(len(textos))
+        return resultado
+
+    comprimentos = comprimentos_tokens(model, textos)
+    lotes = planejar_lotes(comprimentos, orcamento_tokens, lote_maximo)
+    kwargs_encode['show_progress_bar'] = False
+    kwargs_encode.pop('batch_size', None)
+
+    inicio = time.perf_counter()
+    resultado = None
+    for lote in lotes:
+        embeddings = np.asarray(model.encode([textos[i] for i in lote], batch_size=len(lote),
+                                             **kwargs_encode), dtype=np.float32)
+        if resultado is None:
+            resultado = np.empty((len(textos), embeddings.shape[1]), dtype=np.float32)
+        resultado[lote] = embeddings
+        if avanco is not None:
+            avanco.somar(len(lote))
+    duracao = time.perf_counter() - inicio
+
+    antes = estatisticas_padding(comprimentos, lotes_ordem_arquivo(len(textos)))
+    depois = estatisticas_padding(comprimentos, lotes)
+    print(f"📦 Lotes por comprimento: {depois['lotes']} lotes, padding "
+          f"{antes['desperdicio_padding']:.0%} → {depois['desperdicio_padding']:.0%}, "
+          f"{len(textos) / max(duracao, 1e-9):.0f} textos/s")
+    return resultado
@@ -0,0 +1,120 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+from core.embeddings_compactos import pontuar
+from core.codigos import IndiceCodigos, indexar_codigos
+
+# ==================================================================================
+#        MATRIZ DE SIMILARIDADE PERSISTIDA (float16 MAPEADA EM MEMÓRIA)
+# ==================================================================================
+# grau_similaridade era descartado ao fim de process_uploaded_file: qualquer
+# detalhamento, novo corte ou heatmap maior exigia recalcular tudo. Cada análise
+# grava agora a matriz BNCC × currículo ao lado do CSV (<prefixo>_similaridade_<ts>.npy,
+# formato .npy comum, float16 por padrão) e um índice JSON com o código de cada
+# linha (BNCC) e de cada coluna (currículo). abrir_matriz mapeia o .npy em memória:
+# só as fatias lidas saem do disco. No modo em blocos/ANN a matriz densa nunca
+# existe na memória; ela é escrita no arquivo mapeado um bloco de linhas por vez.
+
+SALVAR_MATRIZ = os.environ.get('BNCC_SALVAR_MATRIZ', '1') != '0'
+TIPO_MATRIZ = os.environ.get('BNCC_MATRIZ_DTYPE', 'float16')  # float16 ou float32
+# Linhas da BNCC calculadas por vez quando a matriz densa não está em memória
+_LINHAS_POR_BLOCO = 256
+
+
+def gravar_matriz(caminho_base, grau_similaridade, bncc_embeddings, curriculo_embeddings,
+                  bncc_df, curriculo_df, segment, modelo_id, tipo=None,
+                  codigos_bncc=None, codigos_curriculo=None):
+    """
+    Grava <caminho_base>.npy e <caminho_base>_indices.json. `grau_similaridade` é a
+    matriz densa, ou None para calculá-la em blocos a partir dos embeddings;
+    `codigos_bncc`/`codigos_curriculo` são os IndiceCodigos já extraídos, se houver.
+    Retorna o caminho do .npy.
+    """
+    tipo = np.dtype(tipo or TIPO_MATRIZ)
+    forma = (len(bncc_embeddings), len(curriculo_embeddings))
+    caminho_npy = caminho_base + '.npy'
+    matriz = np.lib.format.open_memmap(caminho_npy, mode='w+', dtype=tipo, shape=forma)
+    for inicio in range(0, forma[0], _LINHAS_POR_BLOCO):
+        fim = min(inicio + _LINHAS_POR_BLOCO, forma[0])
+        if grau_similaridade is not None:
+            matriz[inicio:fim] = grau_similaridade[inicio:fim]
+        elif forma[1]:
+            matriz[inicio:fim] = pontuar(bncc_embeddings[inicio:fim], curriculo_embeddings)
+    matriz.flush()
+    del matriz
+
+    if codigos_bncc is None:
+        codigos_bncc = indexar_codigos(bncc_df, 'bncc')
+    if codigos_curriculo is None:
+        codigos_curriculo = indexar_codigos(curriculo_df, 'curriculo')
+    with open(caminho_base + '_indices.json', 'w', encoding='utf-8') as f:
+        json.dump({
+            'forma': list(forma),
+            'tipo': tipo.name,
+            'modelo': modelo_id,
+            'segmento': segment,
+            'linhas_bncc': codigos_bncc.lista(),
+            'colunas_curriculo': codigos_curriculo.lista(),
+        }, f, ensure_ascii=False)
+    return caminho_npy
+
+
+class MatrizSimilaridade:
+    """
+    Matriz gravada por gravar_matriz, aberta sob demanda. `valores` é o memmap;
+    linha()/coluna()/trecho() leem só as fatias pedidas e devolvem float32.
+    """
+
+    def __init__(self, caminho_npy):
+        self.caminho = caminho_npy
+        with open(caminho_npy[:-len('.npy')] + '_indices.json', encoding='utf-8') as f:
+            self.indices = json.load(f)
+        self.valores = np.load(caminho_npy, mmap_mode='r')
+        self.linhas_bncc = self.indices['linhas_bncc']
+        self.colunas_curriculo = self.indices['colunas_curriculo']
+        # Código → posições, para localizar linhas e colunas pelo código
+        self._indices_codigo = {}
+
+    @property
+    def shape(self):
+        return self.valores.shape
+
+    def _posicao(self, chave, eixo):
+        if isinstance(chave, (int, np.integer)):
+            return int(chave)
+        if eixo not in self._indices_codigo:
+            self._indices_codigo[eixo] = IndiceCodigos(getattr(self, eixo))
+        try:
+            return self._indices_codigo[eixo].posicao(chave)
+        except KeyError:
+            raise KeyError(f'Código não encontrado na matriz: {chave}')
+
+    def linha(self, bncc):
+        """Similaridades de uma habilidade BNCC (posição ou código) com todo o currículo"""
+        return np.asarray(self.valores[self._posicao(bncc, 'linhas_bncc')], dtype=np.float32)
+
+    def coluna(self, curriculo):
+        """Similaridades de uma linha do currículo (posição ou código) com toda a BNCC"""
+        return np.asarray(self.valores[:, self._posicao(curriculo, 'colunas_curriculo')], dtype=np.float32)
+
+    def trecho(self, linhas, colunas):
+        """DataFrame com as posições pedidas, rotulado pelos códigos"""
+        linhas, colunas = np.asarray(linhas, dtype=np.int64), np.asarray(colunas, dtype=np.int64)
+        valores = np.asarray(self.valores[linhas][:, colunas], dtype=np.float32)
+        return pd.DataFrame(valores, index=[self.linhas_bncc[i] for i in linhas],
+                            columns=[self.colunas_curriculo[j] for j in colunas])
+
+    def mais_similares(self, bncc=None, curriculo=None, limite=10):
+        """As `limite` maiores similaridades da linha BNCC ou da coluna do currículo"""
+        if (bncc is None) == (curriculo is None):
+            raise ValueError('Informe bncc ou curriculo')
+        valores = self.linha(bncc) if bncc is not None else self.coluna(curriculo)
+        codigos = self.colunas_curriculo if bncc is not None else self.linhas_bncc
+        melhores = np.argsort(-valores, kind='stable')[:limite]
+        return [{'indice': int(i), 'codigo': codigos[i], 'similaridade': float(valores[i])} for i in melhores]
+
+
+def abrir_matriz(caminho_npy):
+    return MatrizSimilaridade(caminho_npy)
@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+
+# ==================================================================================
+#                  REGISTRO DE MODELOS DE EMBEDDINGS (UM POR PROCESSO)
+# ==================================================================================
+# Carregar o SentenceTransformer leva segundos (pesos + tokenizer). O registro
+# carrega cada modelo uma única vez por processo e entrega a mesma instância para
+# o Flask, para os scripts de segmento e para as funções de core.similarity.
+
+MODELO_PADRAO = 'all-MiniLM-L6-v2'
+
+# Backend de inferência: 'torch' (SentenceTransformer fp32), 'onnx-int8' (ONNX
+# quantizado dinamicamente, só CPU; ver core/backend_onnx.py) ou 'hash' (codificador
+# determinístico offline, sem pesos; ver core/codificadores.py). Também pode ser
+# fixado por modelo no nome: 'all-MiniLM-L6-v2@onnx-int8'.
+BACKEND_PADRAO = os.environ.get('BNCC_BACKEND_EMBEDDINGS', 'torch')
+
+# O backend 'hash' não usa o modelo pedido; todos viram o mesmo codificador
+MODELO_HASH = 'ngramas-hash-v1'
+
+_modelos = {}
+_lock_carregamento = threading.Lock()
+
+_estado_aquecimento = {
+    'iniciado': False,
+    'concluido': False,
+    'erro': None,
+    'modelos': [],
+    'duracao_segundos': None,
+}
+
+
+def _carregar_torch(base):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(base)
+
+
+def _carregar_onnx_int8(base):
+    from core.backend_onnx import ModeloOnnxInt8
+    return ModeloOnnxInt8(base)
+
+
+def _carregar_hash(base):
+    from core.codificadores import CodificadorHash
+    return CodificadorHash(base)
+
+
+# Backends registrados: nome -> função que recebe o nome base e devolve o codificador
+BACKENDS = {
+    'torch': _carregar_torch,
+    'onnx-int8': _carregar_onnx_int8,
+    'hash': _carregar_hash,
+}
+
+
+def registrar_backend(nome, carregar):
+    """
+    Registra um backend de embeddings. `carregar(nome_base)` devolve um objeto com
+    encode(textos, batch_size=..., show_progress_bar=...) -> matriz float32.
+    """
+    BACKENDS[nome] = carregar
+
+
+def identificador_modelo(nome=MODELO_PADRAO):
+    """
+    'modelo@backend' ('modelo' no backend torch). Embeddings de backends diferentes
+    não são intercambiáveis, então é essa a chave usada nos caches e artefatos.
+    """
+    base, _, backend = nome.partition('@')
+    backend = backend or BACKEND_PADRAO
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de embeddings desconhecido: {backend}. Use um de {tuple(BACKENDS)}")
+    if backend == 'hash':
+        base = MODELO_HASH
+    return base if backend == 'torch' else f"{base}@{backend}"
+
+
+def _carregar(identificador):
+    base, _, backend = identificador.partition('@')
+    return BACKENDS[backend or 'torch'](base)
+
+
+def obter_modelo(nome=MODELO_PADRAO):
+    """
+    Retorna a instância compartilhada do modelo, carregando-a na primeira chamada
+    """
+    identificador = identificador_modelo(nome)
+    modelo = _modelos.get(identificador)
+    if modelo is not None:
+        return modelo
+
+    with _lock_carregamento:
+        # Outra thread pode ter carregado enquanto esperávamos o lock
+        modelo = _modelos.get(identificador)
+        if modelo is None:
+            print(f"🤖 Carregando modelo {identificador} (uma vez por processo)...")
+            modelo = _carregar(identificador)
+            _modelos[identificador] = modelo
+            print(f"✅ Modelo {identificador} carregado e registrado!")
+    return modelo
+
+
+def modelo_carregado(nome=MODELO_PADRAO):
+    """Indica se o modelo já está no registro (sem disparar o carregamento)"""
+    return identificador_modelo(nome) in _modelos
+
+
+def nome_registrado(modelo):
+    """Nome com que a instância foi registrada (None se não veio do registro)"""
+    for nome, instancia in _modelos.items():
+        if instancia is modelo:
+            return nome
+    return None
+
+
+def aquecer_modelos(nomes=(MODELO_PADRAO,)):
+    """
+    Carrega os modelos e faz um encode de teste para inicializar tokenizer e pesos
+    """
+    _estado_aquecimento.update({
+        'iniciado': True,
+        'concluido': False,
+        'erro': None,
+        'modelos': list(nomes),
+        'duracao_segundos': None,
+    })
+    inicio = time.perf_counter()
+    try:
+        for nome in nomes:
+            modelo = obter_modelo(nome)
+            modelo.encode(["aquecimento do modelo"], show_progress_bar=False)
+        _estado_aquecimento['concluido'] = True
+        print(f"🔥 Aquecimento concluído: {list(nomes)}")
+    except Exception as e:
+        _estado_aquecimento['erro'] = str(e)
+        print(f"❌ Erro no aquecimento dos modelos: {e}")
+    finally:
+        _estado_aquecimento['duracao_segundos'] = round(time.perf_counter() - inicio, 3)
+
+
+def iniciar_aquecimento(nomes=(MODELO_PADRAO,)):
+    """
+    Dispara o aquecimento em uma thread de fundo para não atrasar a subida do servidor
+    """
+    if _estado_aquecimento['iniciado']:
+        return None
+    _estado_aquecimento['iniciado'] = True
+    thread = threading.Thread(target=aquecer_modelos, args=(tuple(nomes),),
+                              name='aquecimento-modelos', daemon=True)
+    thread.start()
+    return thread
+
+
+def estado_aquecimento():
+    """Cópia do estado do aquecimento para o endpoint de prontidão"""
+    return dict(_estado_aquecimento)
+
+
+def modelos_prontos():
+    return _estado_aquecimento['concluido']
@@ -0,0 +1,278 @@
+import numpy as np
+import pandas as pd
+
+from core.codigos import indexar_codigos
+from core.similarity import imprimir_estatisticas_distribuicao, primeiro_corte_adaptativo
+
+# ==================================================================================
+#            MOTOR VETORIZADO DO ALGORITMO BALANCEADO (NUMPY SOBRE A MATRIZ)
+# ==================================================================================
+# Reproduz exatamente encontrar_similaridade_balanceada_referencia(), mas em vez de
+# montar e ordenar, para cada habilidade BNCC, uma lista de dicionários com todas as
+# linhas do currículo, trabalha direto na linha da matriz de similaridade:
+#
+#   - as colunas do currículo são agrupadas por disciplina uma única vez (vetor de
+#     permutação + início/fim de cada disciplina);
+#   - "já usada" é uma máscara booleana por código (o algoritmo evita códigos
+#     repetidos, não linhas repetidas);
+#   - "melhor candidata da disciplina" é um argmax mascarado. O argmax devolve a
+#     primeira ocorrência do máximo, o mesmo desempate da ordenação estável
+#     decrescente da referência (empates ficam na ordem original das linhas).
+
+
+class CurriculoPreparado:
+    """
+    Estruturas do currículo que não mudam entre as habilidades BNCC. `codigos` é o
+    IndiceCodigos do currículo, se já extraído.
+    """
+
+    def __init__(self, curriculo_df, codigos=None):
+        colunas = curriculo_df.columns
+        self.total = len(curriculo_df)
+        # df.values reproduz os mesmos objetos que iterrows() entrega linha a linha
+        self.valores = curriculo_df.values
+        self.posicao_coluna = {c: i for i, c in enumerate(colunas)}
+
+        # Disciplina de cada linha (mesma regra de row.get da referência)
+        if 'DISCIPLINA' in colunas:
+            disciplinas = self.valores[:, self.posicao_coluna['DISCIPLINA']]
+        elif 'EIXO' in colunas:
+            disciplinas = self.valores[:, self.posicao_coluna['EIXO']]
+        else:
+            disciplinas = ['SEM_DISCIPLINA'] * self.total
+
+        # Colunas do objetivo e dos exemplos de cada linha
+        if 'HABILIDADES' in colunas:
+            self.coluna_objetivo, self.coluna_exemplos = 'HABILIDADES', 'ORIENTACOES_PEDAGOGICAS'
+        elif 'OBJETIVO DE APRENDIZAGEM' in colunas:
+            self.coluna_objetivo, self.coluna_exemplos = 'OBJETIVO DE APRENDIZAGEM', 'EXEMPLOS'
+        elif 'HABILIDADE' in colunas:
+            self.coluna_objetivo, self.coluna_exemplos = 'HABILIDADE', 'ORIENTACOES_PEDAGOGICAS'
+        else:
+            self.coluna_objetivo, self.coluna_exemplos = None, None
+
+        # Código de cada linha, extraído da coluna inteira de uma vez
+        self.indice_codigos = codigos if codigos is not None else indexar_codigos(curriculo_df, 'curriculo')
+        self.codigos = self.indice_codigos.lista()
+
+        # Agrupamento por disciplina na ordem de primeira aparição (dict, como na referência)
+        grupos = {}
+        for posicao, disciplina in enumerate(disciplinas):
+            grupos.setdefault(disciplina, []).append(posicao)
+        self.disciplinas = list(grupos.keys())
+        self.tamanhos = {d: len(p) for d, p in grupos.items()}
+
+        self.ordem = np.fromiter(
+            (p for posicoes in grupos.values() for p in posicoes), dtype=np.intp, count=self.total
+        )
+        limites = np.cumsum([0] + [len(p) for p in grupos.values()])
+        self.inicios = limites[:-1]
+        self.fins = limites[1:]
+
+        # Códigos numerados (ids do índice) para a máscara de "já usada"
+        self.codigos_unicos = self.indice_codigos.unicos
+        self.codigo_id = self.indice_codigos.ids
+        self.codigo_id_ordenado = self.codigo_id[self.ordem]
+        # Posição de cada linha dentro da ordem agrupada (inversa de `ordem`)
+        self.posicao_ordenada = np.empty(self.total, dtype=np.intp)
+        self.posicao_ordenada[self.ordem] = np.arange(self.total)
+
+    def detalhes(self, posicao):
+        """Objetivo e exemplos da linha, como a referência lê de row[...]/row.get(...)"""
+        if self.coluna_objetivo is None:
+            return "OBJETIVO NÃO ENCONTRADO", "N/A"
+        linha = self.valores[posicao]
+        objetivo = linha[self.posicao_coluna[self.coluna_objetivo]]
+        if self.coluna_exemplos in self.posicao_coluna:
+            exemplos = linha[self.posicao_coluna[self.coluna_exemplos]]
+        else:
+            exemplos = 'N/A'
+        return objetivo, exemplos
+
+
+def _indice_padrao(df):
+    return isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1
+
+
+def suporta_motor_vetorizado(bncc_df, curriculo_df):
+    """
+    A referência usa o rótulo do índice como posição na matriz; o motor vetorizado
+    trabalha com posições. Os dois coincidem no índice padrão (0..n-1).
+    """
+    return _indice_padrao(bncc_df) and _indice_padrao(curriculo_df)
+
+
+class LinhaDensa:
+    """
+    Consultas do algoritmo sobre uma linha completa da matriz de similaridade
+    """
+
+    def __init__(self, prep, similaridades, usado):
+        self.prep = prep
+        self.usado = usado
+        # Similaridades na ordem agrupada por disciplina
+        self.valores_ordenados = np.asarray(similaridades)[prep.ordem]
+
+    def melhor_disponivel(self, d, excluir=-1):
+        """
+        (posição, similaridade) da melhor linha da disciplina `d` cujo código ainda
+        não foi usado, ignorando a posição `excluir`; (-1, None) se não houver
+        """
+        prep = self.prep
+        return melhor_no_trecho(prep, self.valores_ordenados[prep.inicios[d]:prep.fins[d]], self.usado, d, excluir)
+
+
+def melhor_no_trecho(prep, valores, usado, d, excluir=-1):
+    """
+    melhor_disponivel sobre `valores`, as similaridades só das linhas da disciplina
+    `d` (trecho inicios[d]:fins[d] da ordem agrupada)
+    """
+    inicio, fim = prep.inicios[d], prep.fins[d]
+    vivos = ~usado[prep.codigo_id_ordenado[inicio:fim]]
+    if excluir >= 0:
+        vivos[prep.posicao_ordenada[excluir] - inicio] = False
+    segmento = np.where(vivos, valores, -np.inf)
+    j = int(np.argmax(segmento))
+    if not vivos[j]:
+        return -1, None
+    return int(prep.ordem[inicio + j]), valores[j]
+
+
+def encontrar_similaridade_balanceada_vetorizada(grau_similaridade, bncc_df, curriculo_df, nota_corte_inicial,
+                                                codigos_bncc=None, codigos_curriculo=None, avanco=None):
+    """
+    Versão vetorizada de encontrar_similaridade_balanceada (mesma saída, mesmo desempate).
+    `grau_similaridade` pode ser a matriz densa ou um CandidatosTopK (modo em blocos);
+    `codigos_bncc`/`codigos_curriculo` são os IndiceCodigos já extraídos, se houver;
+    `avanco` (core.progresso.Avanco) conta as habilidades processadas.
+    """
+    from core.similaridade_blocos import CandidatosTopK
+
+    if isinstance(grau_similaridade, CandidatosTopK):
+        prep = grau_similaridade.curriculo
+        linha_similaridade = grau_similaridade.linha
+    else:
+        prep = CurriculoPreparado(curriculo_df, codigos_curriculo)
+        linha_similaridade = lambda idx, usado: LinhaDensa(prep, grau_similaridade[idx], usado)
+    usado = np.zeros(len(prep.codigos_unicos), dtype=bool)
+
+    print(f"🎯 Disciplinas encontradas: {prep.disciplinas}")
+    print(f"📊 Distribuição por disciplina: {[(d, prep.tamanhos[d]) for d in prep.disciplinas]}")
+
+    valores_bncc = bncc_df.values
+    colunas_bncc = {c: i for i, c in enumerate(bncc_df.columns)}
+    if 'HABILIDADE' in colunas_bncc:
+        coluna_objetivo_bncc = colunas_bncc['HABILIDADE']
+    elif 'OBJETIVO DE APRENDIZAGEM' in colunas_bncc:
+        coluna_objetivo_bncc = colunas_bncc['OBJETIVO DE APRENDIZAGEM']
+    else:
+        coluna_objetivo_bncc = None
+    if codigos_bncc is None:
+        codigos_bncc = indexar_codigos(bncc_df, 'bncc')
+
+    relatorio_completo = []
+    total_bncc = len(bncc_df)
+    total_disciplinas = len(prep.disciplinas)
+
+    for idx_bncc in range(total_bncc):
+        linha_bncc = valores_bncc[idx_bncc]
+        linha = linha_similaridade(idx_bncc, usado)
+
+        bncc_codigo = codigos_bncc[idx_bncc]
+        if coluna_objetivo_bncc is not None:
+            bncc_objetivo = linha_bncc[coluna_objetivo_bncc]
+        else:
+            bncc_objetivo = "OBJETIVO NÃO ENCONTRADO"
+
+        # Melhor candidata de cada disciplina no início desta habilidade (candidatos[0])
+        melhores = [linha.melhor_disponivel(d) for d in range(total_disciplinas)]
+
+        selecionadas = []  # (posição, similaridade, disciplina)
+        nota_corte_usada = nota_corte_inicial
+
+        def adicionar(posicao, valor, d):
+            selecionadas.append((posicao, valor, prep.disciplinas[d]))
+            usado[prep.codigo_id[posicao]] = True
+
+        # ESTRATÉGIA 1: melhor de cada disciplina com a nota de corte original
+        for d, (posicao, valor) in enumerate(melhores):
+            if posicao >= 0 and valor >= nota_corte_inicial:
+                adicionar(posicao, valor, d)
+
+        # ESTRATÉGIA 2: busca adaptativa. Nada foi usado ainda nesta habilidade, então a
+        # primeira nota do laço de decrementos que dá resultado é a primeira atingida
+        # pela maior similaridade disponível, calculada direto (sem iterar de 0.01 em 0.01)
+        if not selecionadas:
+            validos = [valor for posicao, valor in melhores if posicao >= 0]
+            corte = primeiro_corte_adaptativo(max(validos), nota_corte_inicial) if validos else None
+            if corte is not None:
+                nota_corte_atual = corte[1]
+                for d in range(total_disciplinas):
+                    posicao, valor = linha.melhor_disponivel(d)
+                    if posicao >= 0 and valor >= nota_corte_atual:
+                        adicionar(posicao, valor, d)
+                if selecionadas:
+                    nota_corte_usada = nota_corte_atual
+
+        # ESTRATÉGIA 3: melhor geral disponível (primeira disciplina em caso de empate)
+        if not selecionadas:
+            escolhido = None
+            for d, (posicao, valor) in enumerate(melhores):
+                if posicao >= 0 and (escolhido is None or valor > escolhido[1]):
+                    escolhido = (posicao, valor, d)
+            if escolhido is not None:
+                adicionar(*escolhido)
+                nota_corte_usada = escolhido[1]
+
+        # ESTRATÉGIA 4: completar até 3 (pula candidatos[0] de cada disciplina)
+        if len(selecionadas) < 3:
+            limite = nota_corte_usada * 0.9
+            for d in range(total_disciplinas):
+                if len(selecionadas) >= 3:
+                    break
+                posicao_topo = melhores[d][0]
+                if posicao_topo < 0:
+                    continue
+                posicao, valor = linha.melhor_disponivel(d, excluir=posicao_topo)
+                if posicao >= 0 and valor >= limite:
+                    adicionar(posicao, valor, d)
+
+        # Ordenar por similaridade (sort estável, como na referência)
+        selecionadas.sort(key=lambda x: x[1], reverse=True)
+
+        similaridades = [s for _, s, _ in selecionadas]
+        habilidade_bncc = {
+            'bncc_indice': idx_bncc + 1,
+            'bncc_codigo': bncc_codigo,
+            'bncc_eixo': linha_bncc[colunas_bncc['EIXO']],
+            'bncc_objetivo': bncc_objetivo,
+            'bncc_exemplos': linha_bncc[colunas_bncc['EXEMPLOS']] if 'EXEMPLOS' in colunas_bncc else 'N/A',
+            'habilidades_similares': [],
+            'tem_similaridade_original': any(s >= nota_corte_inicial for s in similaridades),
+            'nota_corte_usada': nota_corte_usada,
+            'quantidade_similares': len(selecionadas),
+            'maior_similaridade': max(similaridades) if similaridades else 0,
+            'disciplinas_envolvidas': len(set(d for _, _, d in selecionadas))
+        }
+
+        for posicao, similaridade, disciplina in selecionadas:
+            curriculo_objetivo, curriculo_exemplos = prep.detalhes(posicao)
+            habilidade_bncc['habilidades_similares'].append({
+                'curriculo_indice': posicao + 1,
+                'curriculo_codigo': prep.codigos[posicao],
+                'curriculo_eixo': disciplina,
+                'curriculo_objetivo': curriculo_objetivo,
+                'curriculo_exemplos': curriculo_exemplos,
+                'similaridade': similaridade
+            })
+
+        relatorio_completo.append(habilidade_bncc)
+
+        # Log de progresso
+        if avanco is not None:
+            avanco(idx_bncc + 1)
+        if (idx_bncc + 1) % 10 == 0:
+            print(f"📈 Processadas {idx_bncc + 1}/{total_bncc} habilidades BNCC")
+
+    imprimir_estatisticas_distribuicao(relatorio_completo, int(usado.sum()), prep.total, prep.tamanhos)
+    return relatorio_completo
@@ -0,0 +1,126 @@
+import os
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from core.lotes_encode import codificar_em_lotes
+
+# ==================================================================================
+#              POOL DE PROCESSOS PARA CODIFICAR UPLOADS GRANDES
+# ==================================================================================
+# Um único model.encode usa um processo Python e deixa a maior parte dos núcleos
+# ociosa. No modo pool, a lista de textos é dividida em fatias contíguas entre
+# processos persistentes; cada processo carrega o modelo uma vez (pelo registro de
+# core/modelos.py) com um número fixo de threads intra-op, para os processos não
+# disputarem os mesmos núcleos. Os resultados voltam na ordem original. Abaixo de
+# um número mínimo de linhas o encode continua no próprio processo (sem IPC).
+
+PROCESSOS_PADRAO = int(os.environ.get('BNCC_ENCODE_PROCESSOS', 0))  # 0 = desativado
+THREADS_POR_PROCESSO = int(os.environ.get('BNCC_ENCODE_THREADS_POR_PROCESSO', 0))  # 0 = núcleos / processos
+MIN_LINHAS_POOL = int(os.environ.get('BNCC_ENCODE_POOL_MIN_LINHAS', 2000))
+
+# Fatias por processo: equilibra a carga quando as fatias têm custos diferentes
+_FATIAS_POR_PROCESSO = 4
+
+# Estado de cada processo trabalhador
+_modelo_trabalhador = None
+
+
+def _limitar_threads(threads):
+    """Fixa as threads intra-op antes de o torch/onnxruntime serem carregados"""
+    for variavel in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'BNCC_ONNX_THREADS'):
+        os.environ[variavel] = str(threads)
+
+
+def _inicializar_trabalhador(identificador, threads):
+    global _modelo_trabalhador
+    _limitar_threads(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    from core.modelos import obter_modelo
+    _modelo_trabalhador = obter_modelo(identificador)
+
+
+def _codificar_fatia(textos):
+    return codificar_em_lotes(_modelo_trabalhador, textos)
+
+
+class PoolCodificacao:
+    """
+    Processos persistentes com o modelo `identificador` carregado em cada um
+    """
+
+    def __init__(self, identificador, processos=None, threads_por_processo=None):
+        self.identificador = identificador
+        self.processos = processos or PROCESSOS_PADRAO or os.cpu_count() or 1
+        self.threads_por_processo = (threads_por_processo or THREADS_POR_PROCESSO or
+                                     max(1, (os.cpu_count() or 1) // self.processos))
+        # spawn: fork de um processo com torch/threads já iniciados não é seguro
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processos,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_inicializar_trabalhador,
+            initargs=(identificador, self.threads_por_processo),
+        )
+        print(f"🧵 Pool de codificação: {self.processos} processos × "
+              f"{self.threads_por_processo} threads ({identificador})")
+
+    def codificar(self, textos, avanco=None):
+        textos = list(textos)
+        if not textos:
+            return np.zeros((0, 0), dtype=np.float32)
+        n_fatias = min(len(textos), self.processos * _FATIAS_POR_PROCESSO)
+        limites = np.linspace(0, len(textos), n_fatias + 1).astype(int)
+        fatias = [textos[a:b] for a, b in zip(limites[:-1], limites[1:])]
+        # map preserva a ordem das fatias
+        resultados = []
+        for fatia, embeddings in zip(fatias, self._executor.map(_codificar_fatia, fatias)):
+            resultados.append(embeddings)
+            if avanco is not None:
+                avanco.somar(len(fatia))
+        return np.vstack(resultados)
+
+    def encerrar(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+_pools = {}
+_lock_pools = threading.Lock()
+
+
+def obter_pool(identificador, processos=None):
+    """Pool compartilhado pelo processo para o modelo (criado na primeira chamada)"""
+    with _lock_pools:
+        pool = _pools.get(identificador)
+        if pool is None:
+            pool = PoolCodificacao(identificador, processos)
+            _pools[identificador] = pool
+    return pool
+
+
+@atexit.register
+def encerrar_pools():
+    with _lock_pools:
+        for pool in _pools.values():
+            pool.encerrar()
+        _pools.clear()
+
+
+def codificar_paralelo(model, textos, identificador, processos=None, min_linhas=None, avanco=None,
+                       **kwargs_encode):
+    """
+    Codifica no pool de processos quando ativado e a lista é grande; caso contrário,
+    no próprio processo. Retorna matriz float32 na ordem de `textos`; `avanco`
+    (core.progresso.Avanco) soma os textos codificados.
+    """
+    textos = list(textos)
+    processos = PROCESSOS_PADRAO if processos is None else processos
+    min_linhas = MIN_LINHAS_POOL if min_linhas is None else min_linhas
+    if processos <= 1 or identificador is None or len(textos) < min_linhas:
+        return codificar_em_lotes(model, textos, avanco=avanco, **kwargs_encode)
+    return obter_pool(identificador, processos).codificar(textos, avanco)
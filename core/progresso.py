@@ -0,0 +1,50 @@
+import os
+import time
+
+# ==================================================================================
+#                  PROGRESSO DAS ETAPAS DE UMA ANÁLISE (AVISOS LIMITADOS)
+# ==================================================================================
+# Cada etapa da análise avisa `progresso(etapa, feito, total)`: a fila de análises
+# (core/fila_analises.py) guarda o último aviso e o publica em /jobs/<id> e no fluxo
+# SSE /jobs/<id>/eventos. Dentro dos laços (lotes de embeddings, blocos de
+# similaridade, habilidades do algoritmo balanceado) o aviso passa por Avanco,
+# que só repassa a contagem a cada INTERVALO_PROGRESSO segundos e ao completar:
+# o custo por iteração é uma leitura de relógio, e as contagens intermediárias
+# são agregadas no aviso seguinte.
+
+INTERVALO_PROGRESSO = float(os.environ.get('BNCC_PROGRESSO_INTERVALO', 0.25))
+
+
+def avisar_etapa(progresso, etapa, feito=None, total=None):
+    """Avisa o início (ou o andamento) de `etapa`, se houver quem acompanhe"""
+    if progresso is not None:
+        progresso(etapa, feito, total)
+
+
+class Avanco:
+    """
+    Contagem de itens concluídos de uma etapa (`total` pode ser None, se
+    desconhecido), repassada a `progresso` no máximo a cada `intervalo` segundos
+    """
+
+    def __init__(self, progresso, etapa, total=None, intervalo=None):
+        self.progresso = progresso
+        self.etapa = etapa
+        self.total = total
+        self.intervalo = INTERVALO_PROGRESSO if intervalo is None else intervalo
+        self.feito = 0
+        self._ultimo = float('-inf')
+
+    def __call__(self, feito):
+        """Itens concluídos até agora"""
+        self.feito = feito
+        if self.progresso is None:
+            return
+        agora = time.monotonic()
+        if agora - self._ultimo >= self.intervalo or (self.total is not None and feito >= self.total):
+            self._ultimo = agora
+            self.progresso(self.etapa, feito, self.total)
+
+    def somar(self, quantidade):
+        """Mais `quantidade` itens concluídos"""
+        self(self.feito + quantidade)
@@ -0,0 +1,245 @@
+import os
+import json
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from core.modelos import obter_modelo, identificador_modelo, MODELO_PADRAO
+from core.cache_embeddings import codificar_com_cache, hash_texto
+from core.embeddings_compactos import EmbeddingsCompactos, normalizar, pontuar
+from core.artefatos_bncc import resolver_arquivo_bncc, carregar_referencia_bncc, segmento_normalizado
+from core.leitura_upload import conferir_layout, ler_curriculo_enviado, validar_colunas
+from core.analise_abas import _rotulos_arquivo
+from core.progresso import avisar_etapa, Avanco
+
+# ==================================================================================
+#              REANÁLISE INCREMENTAL DE UMA NOVA VERSÃO DO CURRÍCULO
+# ==================================================================================
+# Quando um município envia a versão 2 do currículo, quase todas as linhas são as
+# mesmas da versão 1. Cada análise com uma chave (ex.: o nome do município) guarda
+# em artefatos/versoes/<segmento>/<chave>/ o hash do texto de cada linha, os
+# embeddings, as colunas da matriz de similaridade e os matches. Na versão seguinte
+# as linhas cujo hash já existia reaproveitam embedding e coluna de similaridade;
+# só as linhas novas ou alteradas são codificadas e comparadas com a BNCC. O
+# algoritmo balanceado roda de novo sobre a matriz completa (a distribuição por
+# disciplinas depende de todas as linhas) e o relatório de mudanças lista os
+# matches BNCC ↔ currículo que entraram ou saíram.
+#
+# A versão guardada só é aproveitada com o mesmo modelo e o mesmo artefato BNCC;
+# acima do orçamento da matriz densa (modo em blocos/ANN) só os embeddings são
+# reaproveitados.
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_VERSOES = os.path.join(BASE_DIR, 'artefatos', 'versoes')
+VERSAO_FORMATO = 2
+
+COLUNAS_MUDANCAS = ['bncc_indice', 'bncc_codigo', 'situacao', 'curriculo_codigo', 'similaridade', 'linha']
+
+_locks_versoes = {}
+_lock_locks = threading.Lock()
+
+
+def _diretorio_versao(segment, rotulo):
+    return os.path.join(DIRETORIO_VERSOES, segmento_normalizado(segment).replace(' ', '_'), rotulo)
+
+
+def _lock_versao(diretorio):
+    """
+    Lock (reentrante) da pasta de versões de uma chave: reanálises simultâneas
+    rodam em threads do mesmo processo
+    """
+    with _lock_locks:
+        return _locks_versoes.setdefault(diretorio, threading.RLock())
+
+
+def carregar_versao(diretorio, modelo_id, chave_bncc):
+    """Versão guardada em `diretorio`, ou None se ausente ou de outro modelo/BNCC"""
+    try:
+        with open(os.path.join(diretorio, 'versao.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (meta.get('formato') != VERSAO_FORMATO or meta.get('modelo') != modelo_id or
+            meta.get('bncc') != chave_bncc):
+        print("⚠️ Versão anterior gerada com outro modelo ou outra BNCC: análise completa")
+        return None
+    caminho_similaridade = os.path.join(diretorio, 'similaridade.npy')
+    return {
+        'meta': meta,
+        'hashes': pd.read_parquet(os.path.join(diretorio, 'linhas.parquet'))['hash'].tolist(),
+        'embeddings': EmbeddingsCompactos.abrir(diretorio),
+        'similaridade': (np.load(caminho_similaridade, mmap_mode='r')
+                         if os.path.exists(caminho_similaridade) else None),
+        'matches': pd.read_parquet(os.path.join(diretorio, 'matches.parquet')),
+    }
+
+
+def gravar_versao(diretorio, meta, hashes, embeddings, grau_similaridade, matches):
+    """Substitui a versão guardada (gravada ao lado e trocada no fim)"""
+    with _lock_versao(diretorio):
+        _gravar_versao(diretorio, meta, hashes, embeddings, grau_similaridade, matches)
+
+
+def _gravar_versao(diretorio, meta, hashes, embeddings, grau_similaridade, matches):
+    os.makedirs(os.path.dirname(diretorio), exist_ok=True)
+    temporario = tempfile.mkdtemp(prefix='.tmp_versao_', dir=os.path.dirname(diretorio))
+    try:
+        pd.DataFrame({'hash': hashes}).to_parquet(os.path.join(temporario, 'linhas.parquet'), index=False)
+        EmbeddingsCompactos.compactar(embeddings).gravar(temporario)
+        if grau_similaridade is not None:
+            np.save(os.path.join(temporario, 'similaridade.npy'), np.asarray(grau_similaridade))
+        matches.to_parquet(os.path.join(temporario, 'matches.parquet'), index=False)
+        with open(os.path.join(temporario, 'versao.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        # A versão antiga sai por renomeação (apagada depois): a pasta fica sem versão
+        # só entre os dois os.replace, não durante o rmtree
+        antiga = None
+        if os.path.exists(diretorio):
+            antiga = tempfile.mkdtemp(prefix='.antiga_', dir=os.path.dirname(diretorio))
+            os.replace(diretorio, os.path.join(antiga, 'versao'))
+        os.replace(temporario, diretorio)
+    except Exception:
+        shutil.rmtree(temporario, ignore_errors=True)
+        raise
+    if antiga is not None:
+        shutil.rmtree(antiga, ignore_errors=True)
+
+
+def relatorio_mudancas(matches_anteriores, matches_novos, hashes_anteriores, hashes_novos):
+    """
+    Matches (bncc_indice, linha do currículo pelo hash) que saíram ou entraram; a
+    coluna `linha` diz se a linha do currículo é nova, foi removida ou foi mantida
+    """
+    chave = ['bncc_indice', 'curriculo_hash']
+    saiu = matches_anteriores.merge(matches_novos[chave], on=chave, how='left', indicator=True)
+    saiu = saiu[saiu['_merge'] == 'left_only'].assign(situacao='saiu')
+    entrou = matches_novos.merge(matches_anteriores[chave], on=chave, how='left', indicator=True)
+    entrou = entrou[entrou['_merge'] == 'left_only'].assign(situacao='entrou')
+
+    anteriores, novos = set(hashes_anteriores), set(hashes_novos)
+    mudancas = pd.concat([saiu, entrou], ignore_index=True)
+    mudancas['linha'] = [
+        'nova' if h not in anteriores else 'removida' if h not in novos else 'mantida'
+        for h in mudancas['curriculo_hash']
+    ]
+    mudancas['ordem'] = (mudancas['situacao'] == 'entrou').astype(int)
+    mudancas = mudancas.sort_values(['bncc_indice', 'ordem'], kind='stable')
+    return mudancas[COLUNAS_MUDANCAS].reset_index(drop=True)
+
+
+def reanalisar_curriculo(caminho, segment, nota_corte, chave, progresso=None):
+    """
+    process_uploaded_file para uma nova versão do currículo identificado por
+    `chave`: reaproveita o que não mudou desde a versão guardada, acrescenta o
+    relatório de mudanças e guarda esta versão para a próxima
+    """
+    from core.similarity import concat_features_curriculo, analisar_curriculo_codificado
+    from core.similaridade_blocos import escolher_modo_similaridade
+
+    avisar_etapa(progresso, 'validacao')
+    conferir_layout(caminho, segment)
+    bncc_path = resolver_arquivo_bncc(segment)
+    if not os.path.exists(bncc_path):
+        raise Exception(f'Arquivo BNCC não encontrado: {bncc_path}')
+    modelo_id = identificador_modelo(MODELO_PADRAO)
+    referencia = carregar_referencia_bncc(bncc_path, modelo_id)
+    bncc_df = referencia.dataframe()
+    bncc_df.columns = bncc_df.columns.str.strip()
+    missing_bncc, required_bncc = validar_colunas(bncc_df.columns, 'bncc', segment)
+    if missing_bncc:
+        raise Exception(f'Colunas ausentes no arquivo BNCC: {missing_bncc}. Colunas necessárias: {required_bncc}.')
+
+    rotulo = _rotulos_arquivo([chave])[chave]
+    diretorio = _diretorio_versao(segment, rotulo)
+    # Uma reanálise por chave de cada vez: a próxima versão parte da que a
+    # anterior acabou de gravar, e nenhuma lê a pasta no meio da troca
+    with _lock_versao(diretorio):
+        anterior = carregar_versao(diretorio, modelo_id, referencia.chave)
+
+        avisar_etapa(progresso, 'leitura')
+        curriculo_df = ler_curriculo_enviado(caminho, segment)
+        textos = concat_features_curriculo(curriculo_df).tolist()
+        hashes = [hash_texto(t) for t in textos]
+
+        # Linha da versão anterior com o mesmo texto (a primeira, se repetido)
+        posicoes_anteriores = {}
+        for posicao, h in enumerate(anterior['hashes'] if anterior else []):
+            posicoes_anteriores.setdefault(h, posicao)
+        origem = np.array([posicoes_anteriores.get(h, -1) for h in hashes], dtype=np.int64)
+        mantidas = np.flatnonzero(origem >= 0)
+        novas = np.flatnonzero(origem < 0)
+        print(f"♻️ Reanálise '{chave}': {len(mantidas)} linhas reaproveitadas, {len(novas)} novas ou alteradas")
+
+        avanco = Avanco(progresso, 'embeddings', len(textos))
+        avisar_etapa(progresso, 'embeddings', 0, len(textos))
+        embeddings = np.empty((len(textos), referencia.embeddings.shape[1]), dtype=np.float32)
+        if len(mantidas):
+            embeddings[mantidas] = anterior['embeddings'].float32()[origem[mantidas]]
+            avanco.somar(len(mantidas))
+        if len(novas):
+            model = obter_modelo(modelo_id)
+            embeddings[novas] = normalizar(codificar_com_cache(model, [textos[i] for i in novas], modelo_id,
+                                                               avanco=avanco))
+
+        # Só as colunas das linhas novas são comparadas com a BNCC
+        avisar_etapa(progresso, 'similaridade')
+        grau_similaridade = None
+        if escolher_modo_similaridade(len(referencia.embeddings), len(textos)) == 'densa':
+            sem_colunas = anterior is None or anterior['similaridade'] is None
+            calcular = np.arange(len(textos)) if sem_colunas else novas
+            grau_similaridade = np.empty((len(referencia.embeddings), len(textos)), dtype=np.float32)
+            if not sem_colunas and len(mantidas):
+                grau_similaridade[:, mantidas] = anterior['similaridade'][:, origem[mantidas]]
+            if len(calcular):
+                grau_similaridade[:, calcular] = pontuar(referencia.embeddings, embeddings[calcular])
+
+        resultado = analisar_curriculo_codificado(curriculo_df, embeddings, bncc_df, referencia.embeddings, segment,
+                                                  nota_corte, modelo_id, rotulo, grau_similaridade,
+                                                  codigos_bncc=referencia.indice_codigos(), progresso=progresso)
+
+        try:
+            matches = pd.read_csv(os.path.join(BASE_DIR, resultado['files']['csv']), encoding='utf-8-sig',
+                                  dtype={'bncc_codigo': str, 'curriculo_codigo': str})
+        except pd.errors.EmptyDataError:
+            matches = pd.DataFrame(columns=['bncc_indice', 'bncc_codigo', 'curriculo_indice', 'curriculo_codigo',
+                                            'similaridade'])
+        matches = matches[['bncc_indice', 'bncc_codigo', 'curriculo_indice', 'curriculo_codigo', 'similaridade']]
+        # curriculo_indice é a posição da linha a partir de 1
+        matches = matches.assign(curriculo_hash=[hashes[int(i) - 1] for i in matches['curriculo_indice']])
+
+        caminho_mudancas = None
+        bncc_com_mudanca = 0
+        if anterior is not None:
+            mudancas = relatorio_mudancas(anterior['matches'], matches, anterior['hashes'], hashes)
+            bncc_com_mudanca = int(mudancas['bncc_indice'].nunique())
+            output_dir = os.path.join(BASE_DIR, 'docs', segment.replace(' ', '_'))
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            caminho_mudancas = os.path.join(output_dir,
+                                            f"{segment.replace(' ', '_')}_{rotulo}_mudancas_{timestamp}.csv")
+            mudancas.to_csv(caminho_mudancas, index=False, encoding='utf-8-sig')
+            caminho_mudancas = os.path.relpath(caminho_mudancas, BASE_DIR)
+            print(f"🔀 {bncc_com_mudanca} habilidades BNCC com matches alterados desde {anterior['meta']['data']}")
+
+        gravar_versao(diretorio, {
+            'formato': VERSAO_FORMATO,
+            'chave': chave,
+            'modelo': modelo_id,
+            'bncc': referencia.chave,
+            'arquivo': os.path.basename(caminho),
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'linhas': len(textos),
+        }, hashes, embeddings, grau_similaridade, matches)
+
+    resultado['files']['mudancas'] = caminho_mudancas
+    resultado['resumo'].update({
+        'versao_anterior': anterior['meta']['data'] if anterior else None,
+        'linhas_reaproveitadas': int(len(mantidas)),
+        'linhas_novas': int(len(novas)),
+        'linhas_removidas': len(set(anterior['hashes']) - set(hashes)) if anterior else 0,
+        'bncc_com_mudanca': bncc_com_mudanca,
+        'mudancas': caminho_mudancas,
+    })
+    return resultado
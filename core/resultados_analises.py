@@ -0,0 +1,117 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+
+# ==================================================================================
+#            RESULTADOS POR ANÁLISE EM MEMÓRIA (TTL + LRU COM LIMITE DE MEMÓRIA)
+# ==================================================================================
+# app.config['LAST_ANALYSIS'] guardava um único resultado global: com usuários
+# simultâneos, /get_report servia a análise de quem terminou por último, e cada
+# abertura das abas de relatório relia os .txt do disco. Aqui cada análise fica
+# guardada pelo seu id (o da tarefa da fila) com o resumo, os top matches e o texto
+# dos relatórios já renderizado; /get_report/<id>/<tipo> responde da memória.
+#
+# Relatórios de texto maiores que LIMITE_TEXTO não ocupam a memória: ficam só no
+# arquivo já gravado em docs/ e são lidos dele. Heatmap, CSV e matriz nunca passam
+# por aqui (são servidos de docs/). Entradas expiram após TTL_RESULTADOS segundos e,
+# acima de LIMITE_MEMORIA, as menos usadas recentemente são descartadas.
+
+TTL_RESULTADOS = int(os.environ.get('BNCC_RESULTADOS_TTL', 6 * 3600))
+LIMITE_MEMORIA = int(float(os.environ.get('BNCC_RESULTADOS_MEMORIA_MB', 128)) * 1024 * 1024)
+LIMITE_TEXTO = int(float(os.environ.get('BNCC_RESULTADOS_TEXTO_MAX_KB', 1024)) * 1024)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Relatórios de texto do resultado: tipo -> chave em resultado['files']
+TIPOS_RELATORIO = {
+    'executive': 'resumo_executivo',
+    'detailed': 'relatorio_detalhado',
+}
+
+
+def _tamanho(valor):
+    """Bytes aproximados de um resumo/lista de matches (tamanho do JSON)"""
+    return len(json.dumps(valor, default=str, ensure_ascii=False).encode('utf-8'))
+
+
+class ResultadoGuardado:
+    """Resultado de uma análise: resumo, arquivos, top matches e relatórios em texto"""
+
+    def __init__(self, id_analise, resultado, parametros, limite_texto, agora):
+        self.id = id_analise
+        self.resumo = resultado.get('resumo')
+        self.files = resultado.get('files') or {}
+        self.top_matches = resultado.get('top_matches')
+        self.parametros = dict(parametros)
+        # Texto de cada relatório em memória; os maiores que o limite ficam só no disco
+        self.relatorios = {}
+        for tipo, chave in TIPOS_RELATORIO.items():
+            texto = (resultado.get('relatorios') or {}).get(chave)
+            if texto is not None and len(texto.encode('utf-8')) <= limite_texto:
+                self.relatorios[tipo] = texto
+        self.tamanho = (_tamanho(self.resumo) + _tamanho(self.top_matches) + _tamanho(self.files)
+                        + sum(len(t.encode('utf-8')) for t in self.relatorios.values()))
+        self.criado_em = agora
+
+    def relatorio(self, tipo):
+        """Texto do relatório `tipo` ('executive' ou 'detailed'); None se não houver"""
+        if tipo in self.relatorios:
+            return self.relatorios[tipo]
+        caminho = self.files.get(TIPOS_RELATORIO[tipo])
+        if caminho and os.path.exists(os.path.join(BASE_DIR, caminho)):
+            with open(os.path.join(BASE_DIR, caminho), 'r', encoding='utf-8') as f:
+                return f.read()
+        return None
+
+
+class ResultadosAnalises:
+    """Resultados por id de análise, com expiração (TTL) e descarte LRU por memória"""
+
+    def __init__(self, ttl=None, limite_memoria=None, limite_texto=None, relogio=time.monotonic):
+        self.ttl = ttl or TTL_RESULTADOS
+        self.limite_memoria = limite_memoria or LIMITE_MEMORIA
+        self.limite_texto = LIMITE_TEXTO if limite_texto is None else limite_texto
+        self._relogio = relogio
+        self._resultados = OrderedDict()  # do menos para o mais recentemente usado
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def guardar(self, id_analise, resultado, parametros=None):
+        """Guarda o resultado de process_uploaded_file (ou da reanálise) da análise `id_analise`"""
+        guardado = ResultadoGuardado(id_analise, resultado, parametros or {}, self.limite_texto, self._relogio())
+        with self._lock:
+            self._remover(id_analise)
+            self._resultados[id_analise] = guardado
+            self._bytes += guardado.tamanho
+            self._descartar()
+        return guardado
+
+    def obter(self, id_analise):
+        """Resultado guardado, ou None (desconhecido, expirado ou descartado)"""
+        with self._lock:
+            guardado = self._resultados.get(id_analise)
+            if guardado is None:
+                return None
+            if self._relogio() - guardado.criado_em > self.ttl:
+                self._remover(id_analise)
+                return None
+            self._resultados.move_to_end(id_analise)
+            return guardado
+
+    def _remover(self, id_analise):
+        guardado = self._resultados.pop(id_analise, None)
+        if guardado is not None:
+            self._bytes -= guardado.tamanho
+
+    def _descartar(self):
+        """Remove os expirados e, acima do limite de memória, os menos usados (o último fica)"""
+        agora = self._relogio()
+        for id_analise in [i for i, g in self._resultados.items() if agora - g.criado_em > self.ttl]:
+            self._remover(id_analise)
+        while self._bytes > self.limite_memoria and len(self._resultados) > 1:
+            self._remover(next(iter(self._resultados)))
+
+    def __len__(self):
+        return len(self._resultados)
@@ -0,0 +1,193 @@
+import os
+import numpy as np
+
+from core.motor_balanceado import CurriculoPreparado, melhor_no_trecho
+from core.embeddings_compactos import pontuar
+
+# ==================================================================================
+#          SIMILARIDADE EM BLOCOS COM TOP-K POR DISCIPLINA (CURRÍCULOS GRANDES)
+# ==================================================================================
+# cosine_similarity(bncc, curriculo) materializa a matriz densa B×C inteira. Para um
+# currículo estadual consolidado (dezenas de milhares de linhas) isso não cabe na
+# memória. No modo em blocos as linhas da BNCC são processadas em lotes e, de cada
+# linha, só ficam as k melhores candidatas de cada disciplina (vetores compactos de
+# posições int32 e notas float32). O algoritmo balanceado roda sobre essas listas;
+# quando todas as candidatas de uma disciplina já foram usadas (ou há empate com a
+# última da lista), só o trecho daquela disciplina na linha é recalculado, de modo
+# que o resultado é o mesmo do modo denso.
+
+K_PADRAO = int(os.environ.get('BNCC_TOPK_POR_DISCIPLINA', 64))
+ORCAMENTO_MEMORIA_MB = float(os.environ.get('BNCC_ORCAMENTO_SIMILARIDADE_MB', 256))
+# 'auto' escolhe pelo orçamento; 'densa' e 'blocos' forçam o modo; 'ann' usa o índice
+# aproximado de core/indice_ann.py (nunca escolhido automaticamente)
+MODO_SIMILARIDADE = os.environ.get('BNCC_MODO_SIMILARIDADE', 'auto')
+
+
+def estimar_bytes_matriz_densa(total_bncc, total_curriculo, tipo=np.float32):
+    """Memória da matriz de similaridade densa B×C"""
+    return total_bncc * total_curriculo * np.dtype(tipo).itemsize
+
+
+def escolher_modo_similaridade(total_bncc, total_curriculo, tipo=np.float32,
+                               orcamento_mb=None, modo=None):
+    """
+    'densa' enquanto a matriz couber no orçamento de memória, 'blocos' depois disso
+    """
+    modo = modo or MODO_SIMILARIDADE
+    if modo in ('densa', 'blocos', 'ann'):
+        return modo
+    if modo != 'auto':
+        raise ValueError(f"Modo de similaridade desconhecido: {modo}. Use 'auto', 'densa', 'blocos' ou 'ann'")
+    orcamento_mb = ORCAMENTO_MEMORIA_MB if orcamento_mb is None else orcamento_mb
+    estimado = estimar_bytes_matriz_densa(total_bncc, total_curriculo, tipo)
+    return 'blocos' if estimado > orcamento_mb * 1024 * 1024 else 'densa'
+
+
+class CandidatosTopK:
+    """
+    Top-k candidatas por disciplina de cada linha da BNCC.
+
+    colunas[d] e notas[d] têm forma (B, k_d), k_d = min(k, linhas da disciplina d),
+    ordenadas por nota decrescente e, nos empates, pela posição no currículo.
+    Posições -1 (nota -inf) completam listas mais curtas. Com exato=False (listas
+    vindas de um índice aproximado) a disciplina sem linhas nas listas sondadas fica
+    sem candidata, e só é recalculada se a lista estiver cheia ou se a linha da BNCC
+    não tiver nenhuma candidata livre.
+    """
+
+    def __init__(self, curriculo, colunas, notas, bncc_embeddings, curriculo_embeddings, exato=True):
+        self.curriculo = curriculo
+        self.colunas = colunas
+        self.notas = notas
+        self.bncc_embeddings = bncc_embeddings
+        self.curriculo_embeddings = curriculo_embeddings
+        self.exato = exato
+        # Listas que podem não conter todas as linhas da disciplina (mais linhas que k,
+        # ou vindas de um índice aproximado)
+        self.truncada = [not exato or c.shape[1] < curriculo.tamanhos[disc]
+                         for c, disc in zip(colunas, curriculo.disciplinas)]
+        # Trechos de disciplina recalculados e linhas do currículo pontuadas neles
+        self.recalculos = 0
+        self.pontuadas_recalculo = 0
+
+    @property
+    def shape(self):
+        return (len(self.bncc_embeddings), len(self.curriculo_embeddings))
+
+    def nbytes(self):
+        return sum(c.nbytes + n.nbytes for c, n in zip(self.colunas, self.notas))
+
+    def segmento_disciplina(self, idx_bncc, d):
+        """
+        Notas exatas da linha nas linhas da disciplina `d`, na ordem agrupada do
+        currículo (caminho de exceção)
+        """
+        curriculo = self.curriculo
+        posicoes = curriculo.ordem[curriculo.inicios[d]:curriculo.fins[d]]
+        self.recalculos += 1
+        self.pontuadas_recalculo += len(posicoes)
+        return pontuar(self.bncc_embeddings[idx_bncc:idx_bncc + 1], self.curriculo_embeddings[posicoes])[0]
+
+    def amostra(self, linhas, colunas):
+        """Canto superior esquerdo da matriz densa (para o heatmap)"""
+        return pontuar(self.bncc_embeddings[:linhas], self.curriculo_embeddings[:colunas])
+
+    def linha(self, idx_bncc, usado):
+        return LinhaTopK(self, idx_bncc, usado)
+
+
+class LinhaTopK:
+    """
+    Consultas do algoritmo sobre as listas top-k de uma linha da BNCC
+    """
+
+    def __init__(self, candidatos, idx_bncc, usado):
+        self.candidatos = candidatos
+        self.idx_bncc = idx_bncc
+        self.usado = usado
+        self._segmentos = {}
+        self._sem_livres = None
+
+    def _livres(self, d, excluir=-1):
+        colunas = self.candidatos.colunas[d][self.idx_bncc]
+        livres = (colunas >= 0) & ~self.usado[self.candidatos.curriculo.codigo_id[colunas]]
+        if excluir >= 0:
+            livres &= colunas != excluir
+        return livres
+
+    def melhor_disponivel(self, d, excluir=-1):
+        candidatos = self.candidatos
+        colunas = candidatos.colunas[d][self.idx_bncc]
+        notas = candidatos.notas[d][self.idx_bncc]
+        livres = self._livres(d, excluir)
+
+        if livres.any():
+            j = int(np.argmax(livres))
+            # Empatada com a última da lista: pode haver outra de posição menor fora dela
+            if not (candidatos.exato and candidatos.truncada[d] and notas[j] <= notas[-1]):
+                return int(colunas[j]), notas[j]
+        elif not candidatos.truncada[d]:
+            return -1, None
+        elif not candidatos.exato and colunas[-1] < 0:
+            # Lista aproximada incompleta: as listas sondadas não têm outra linha da
+            # disciplina. Sem candidata, a menos que a linha não tenha nenhuma livre
+            if self._sem_livres is None:
+                self._sem_livres = not any(self._livres(outra).any() for outra in range(len(candidatos.colunas)))
+            if not self._sem_livres:
+                return -1, None
+
+        if d not in self._segmentos:
+            self._segmentos[d] = candidatos.segmento_disciplina(self.idx_bncc, d)
+        return melhor_no_trecho(candidatos.curriculo, self._segmentos[d], self.usado, d, excluir)
+
+
+def calcular_candidatos_topk(bncc_embeddings, curriculo_embeddings, curriculo_df,
+                             k=K_PADRAO, orcamento_mb=None, codigos=None, avanco=None):
+    """
+    Calcula a similaridade em blocos de linhas da BNCC (cada bloco cabe no orçamento)
+    e guarda só as k melhores candidatas por disciplina. Os embeddings chegam
+    normalizados (a nota é o produto interno); `codigos` é o IndiceCodigos do currículo
+    e `avanco` (core.progresso.Avanco) conta as linhas BNCC calculadas.
+    """
+    curriculo = CurriculoPreparado(curriculo_df, codigos)
+    orcamento_mb = ORCAMENTO_MEMORIA_MB if orcamento_mb is None else orcamento_mb
+    total_bncc = len(bncc_embeddings)
+    total_curriculo = len(curriculo_embeddings)
+
+    # Bloco + cópia reordenada por disciplina
+    bytes_por_linha = max(1, 2 * estimar_bytes_matriz_densa(1, total_curriculo))
+    linhas_por_bloco = max(1, int(orcamento_mb * 1024 * 1024 // bytes_por_linha))
+
+    tamanhos_k = [min(k, curriculo.tamanhos[d]) for d in curriculo.disciplinas]
+    colunas = [np.empty((total_bncc, kd), dtype=np.int32) for kd in tamanhos_k]
+    notas = [np.empty((total_bncc, kd), dtype=np.float32) for kd in tamanhos_k]
+
+    print(f"🧱 Similaridade em blocos: {total_bncc}×{total_curriculo}, "
+          f"{linhas_por_bloco} linhas BNCC por bloco, top-{k} por disciplina")
+
+    for inicio in range(0, total_bncc, linhas_por_bloco):
+        fim = min(inicio + linhas_por_bloco, total_bncc)
+        bloco = pontuar(bncc_embeddings[inicio:fim], curriculo_embeddings)
+        ordenado = bloco[:, curriculo.ordem]
+        del bloco
+
+        for d, kd in enumerate(tamanhos_k):
+            ini_d, fim_d = curriculo.inicios[d], curriculo.fins[d]
+            segmento = ordenado[:, ini_d:fim_d]
+            if kd < segmento.shape[1]:
+                escolhidos = np.argpartition(-segmento, kd - 1, axis=1)[:, :kd]
+            else:
+                escolhidos = np.broadcast_to(np.arange(segmento.shape[1]), segmento.shape)
+            valores = np.take_along_axis(segmento, escolhidos, axis=1)
+            posicoes = curriculo.ordem[ini_d + escolhidos]
+            # Nota decrescente; empate pela posição (mesmo desempate do argmax denso)
+            ordem_final = np.lexsort((posicoes, -valores), axis=1)
+            colunas[d][inicio:fim] = np.take_along_axis(posicoes, ordem_final, axis=1)
+            notas[d][inicio:fim] = np.take_along_axis(valores, ordem_final, axis=1)
+        if avanco is not None:
+            avanco(fim)
+
+    candidatos = CandidatosTopK(curriculo, colunas, notas, bncc_embeddings, curriculo_embeddings)
+    densa_mb = estimar_bytes_matriz_densa(total_bncc, total_curriculo) / 1024 / 1024
+    print(f"✅ Candidatas top-k: {candidatos.nbytes() / 1024 / 1024:.1f} MB (matriz densa: {densa_mb:.1f} MB)")
+    return candidatos
@@ -0,0 +1,136 @@
+import os
+import json
+import hashlib
+import threading
+import pandas as pd
+
+# ==================================================================================
+#            CACHE PARQUET DAS PLANILHAS DE REFERÊNCIA (BNCC E CURRÍCULOS)
+# ==================================================================================
+# pd.read_excel (openpyxl) é um dos passos mais lentos medidos. As planilhas de
+# referência (bncc_df_*.xlsx e os currículos normalizados de data/) quase nunca
+# mudam, então a primeira leitura grava uma cópia Parquet em artefatos/parquet/ e as
+# seguintes leem dela, só com as colunas pedidas. A cópia é invalidada pelo mtime/
+# tamanho do .xlsx e, quando eles mudam, pelo hash do conteúdo (um arquivo só
+# copiado ou "tocado" continua usando o Parquet existente).
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_PARQUET = os.path.join(BASE_DIR, 'artefatos', 'parquet')
+CACHE_PARQUET_ATIVO = os.environ.get('BNCC_CACHE_PARQUET', '1') != '0'
+VERSAO_CACHE = 1
+
+# Colunas lidas pelo algoritmo, pelos textos de embedding e pelos relatórios
+COLUNAS_ANALISE = (
+    'SEGMENTO', 'ANO', 'EIXO', 'DISCIPLINA',
+    'OBJETIVO DE APRENDIZAGEM', 'HABILIDADE', 'HABILIDADES',
+    'EXEMPLOS', 'ORIENTACOES_PEDAGOGICAS',
+)
+
+_lock_conversao = threading.Lock()
+
+
+def _hash_conteudo(caminho, tamanho_bloco=1024 * 1024):
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def _caminhos_cache(caminho_xlsx):
+    """(parquet, meta.json) da planilha; o hash do caminho evita colisão de nomes"""
+    caminho_abs = os.path.abspath(caminho_xlsx)
+    nome_base = os.path.splitext(os.path.basename(caminho_abs))[0]
+    nome_base = ''.join(c if c.isalnum() else '_' for c in nome_base).strip('_')
+    sufixo = hashlib.sha1(caminho_abs.encode('utf-8')).hexdigest()[:10]
+    base = os.path.join(DIRETORIO_PARQUET, f"{nome_base}-{sufixo}")
+    return base + '.parquet', base + '.json'
+
+
+def _ler_meta(caminho_meta):
+    try:
+        with open(caminho_meta, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _gravar_meta(caminho_meta, meta):
+    temporario = caminho_meta + f".tmp-{os.getpid()}"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho_meta)
+
+
+def _tipos_serializaveis(df):
+    """Colunas object com tipos misturados viram texto (Parquet exige um tipo por coluna)"""
+    df = df.copy()
+    for coluna in df.columns:
+        if df[coluna].dtype == object:
+            tipos = {type(v) for v in df[coluna].dropna()}
+            if len(tipos) > 1:
+                valores = df[coluna]
+                df[coluna] = valores.where(valores.isna(), valores.astype(str))
+    return df
+
+
+def _converter(caminho_xlsx, caminho_parquet, caminho_meta, estado, hash_xlsx):
+    df = pd.read_excel(caminho_xlsx)
+    os.makedirs(DIRETORIO_PARQUET, exist_ok=True)
+    temporario = caminho_parquet + f".tmp-{os.getpid()}"
+    _tipos_serializaveis(df).to_parquet(temporario, index=False)
+    os.replace(temporario, caminho_parquet)
+    _gravar_meta(caminho_meta, {
+        'versao': VERSAO_CACHE,
+        'arquivo_origem': os.path.abspath(caminho_xlsx),
+        'mtime_ns': estado.st_mtime_ns,
+        'tamanho': estado.st_size,
+        'hash': hash_xlsx,
+        'linhas': int(len(df)),
+    })
+    print(f"📦 Cache Parquet criado: {os.path.basename(caminho_xlsx)} ({len(df)} linhas)")
+
+
+def _parquet_valido(caminho_xlsx, caminho_parquet, caminho_meta, estado):
+    """
+    Garante que o Parquet corresponde ao conteúdo atual da planilha, convertendo
+    de novo se necessário
+    """
+    meta = _ler_meta(caminho_meta)
+    if (meta and meta.get('versao') == VERSAO_CACHE and os.path.exists(caminho_parquet) and
+            meta['mtime_ns'] == estado.st_mtime_ns and meta['tamanho'] == estado.st_size):
+        return
+
+    with _lock_conversao:
+        hash_xlsx = _hash_conteudo(caminho_xlsx)
+        meta = _ler_meta(caminho_meta)
+        if (meta and meta.get('versao') == VERSAO_CACHE and os.path.exists(caminho_parquet) and
+                meta['hash'] == hash_xlsx):
+            # Mesmo conteúdo com mtime novo: só atualiza a meta
+            meta.update({'mtime_ns': estado.st_mtime_ns, 'tamanho': estado.st_size})
+            _gravar_meta(caminho_meta, meta)
+            return
+        _converter(caminho_xlsx, caminho_parquet, caminho_meta, estado, hash_xlsx)
+
+
+def ler_planilha(caminho_xlsx, colunas=None):
+    """
+    pd.read_excel com cache Parquet. `colunas` limita a leitura às colunas existentes
+    entre as pedidas (na ordem da planilha); None lê todas. Os cabeçalhos são
+    comparados sem espaços nas pontas ('HABILIDADE ' atende a 'HABILIDADE') e
+    devolvidos como estão na planilha: quem chama aplica .str.strip().
+    """
+    if colunas is not None:
+        pedidas = {str(c).strip() for c in colunas}
+    if not CACHE_PARQUET_ATIVO:
+        df = pd.read_excel(caminho_xlsx)
+        return df[[c for c in df.columns if str(c).strip() in pedidas]] if colunas is not None else df
+
+    caminho_parquet, caminho_meta = _caminhos_cache(caminho_xlsx)
+    _parquet_valido(caminho_xlsx, caminho_parquet, caminho_meta, os.stat(caminho_xlsx))
+
+    if colunas is not None:
+        import pyarrow.parquet as pq
+        existentes = pq.read_schema(caminho_parquet).names
+        colunas = [c for c in existentes if str(c).strip() in pedidas]
+    return pd.read_parquet(caminho_parquet, columns=colunas)
@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env'))
 
 import pandas as pd
+from core.tabelas_parquet import ler_planilha, COLUNAS_ANALISE
 import numpy as np
 import matplotlib
 matplotlib.use('Agg')  # Garante que matplotlib só salve imagens, sem abrir janelas
@@ -18,7 +19,6 @@ from datetime import datetime
 
 # Importar funções do módulo de similaridade refatorado
 from core.similarity import (
-    extrair_codigo,
     concat_features_bncc,
     concat_features_curriculo,
     encontrar_similaridade_balanceada,
@@ -26,6 +26,9 @@ from core.similarity import (
     gerar_embeddings,
     calcular_similaridades
 )
+from core.modelos import nome_registrado
+from core.codigos import indexar_codigos
+from core.consolidacao import normalizar_disciplina
 
 print("🔧 Módulo infantil carregado com algoritmo balanceado")
 
@@ -61,8 +64,9 @@ print("="*80)
 
 # Carregamento dos dados
 try:
-    bncc_df_inf = pd.read_excel(CONFIGURACOES['ARQUIVO_BNCC'])
-    curriculo_df_inf = pd.read_excel(CONFIGURACOES['ARQUIVO_CURRICULO'])
+    # Planilhas de referência via cache Parquet (só as colunas usadas na análise)
+    bncc_df_inf = ler_planilha(CONFIGURACOES['ARQUIVO_BNCC'], COLUNAS_ANALISE)
+    curriculo_df_inf = ler_planilha(CONFIGURACOES['ARQUIVO_CURRICULO'], COLUNAS_ANALISE)
     print(f"✅ Dados carregados: {len(bncc_df_inf)} habilidades BNCC, {len(curriculo_df_inf)} habilidades currículo")
 except Exception as e:
     print(f"❌ Erro ao carregar dados: {e}")
@@ -82,24 +86,6 @@ checar_colunas(curriculo_df_inf, 'Currículo')
 curriculo_df_inf.columns = curriculo_df_inf.columns.str.strip()
 bncc_df_inf.columns = bncc_df_inf.columns.str.strip()
 
-# Normalizar nomes das disciplinas (EIXOS) no currículo para evitar duplicatas
-def normalizar_disciplina(nome):
-    """Normaliza nomes de disciplinas removendo variações desnecessárias"""
-    if pd.isna(nome):
-        return "SEM_DISCIPLINA"
-    
-    nome_str = str(nome).strip().upper()
-    
-    # Mapear variações para nomes consistentes
-    mapeamento = {
-        "ESPAÇOS, TEMPOS, QUANTIDADES E RELAÇÕES": "ESPAÇOS, TEMPOS, QUANTIDADES, RELAÇÕES",
-        "ESCUTA, FALA, PENSAMENTOS E IMAGINAÇÃO": "ESCUTA, FALA, PENSAMENTO E IMAGINAÇÃO",
-        "TRAÇOS, SONS, CORES E FROMAS": "TRAÇOS, SONS, CORES E FORMAS",
-        "O EU, O OUTRO E O NÓS": "O EU, O OUTRO E O NÓS"
-    }
-    
-    return mapeamento.get(nome_str, nome_str)
-
 # Aplicar normalização
 print("� Normalizando nomes das disciplinas/eixos...")
 bncc_df_inf['EIXO'] = bncc_df_inf['EIXO'].apply(normalizar_disciplina)
@@ -108,6 +94,11 @@ curriculo_df_inf['EIXO'] = curriculo_df_inf['EIXO'].apply(normalizar_disciplina)
 print("📊 Disciplinas BNCC após normalização:", bncc_df_inf['EIXO'].unique())
 print("📊 Disciplinas Currículo após normalização:", curriculo_df_inf['EIXO'].unique())
 
+# Códigos de cada linha extraídos uma vez por tabela (core/codigos.py), reaproveitados
+# no algoritmo balanceado e no heatmap
+codigos_bncc = indexar_codigos(bncc_df_inf, 'bncc')
+codigos_curriculo = indexar_codigos(curriculo_df_inf, 'curriculo')
+
 # Carregar modelo e gerar embeddings usando o módulo refatorado
 print("🤖 Carregando modelo de embeddings...")
 model = carregar_modelo_embeddings(CONFIGURACOES['MODELO_EMBEDDINGS'])
@@ -137,14 +128,14 @@ print(f"\n🔍 DEBUG - VERIFICANDO ESTRUTURA DOS DADOS:")
 print(f"📊 BNCC - Primeiras 2 linhas da coluna 'OBJETIVO DE APRENDIZAGEM':")
 for i, (idx, linha) in enumerate(bncc_df_inf.head(2).iterrows()):
     obj_aprendizagem = linha['OBJETIVO DE APRENDIZAGEM']
-    codigo_extraido = extrair_codigo(obj_aprendizagem)
+    codigo_extraido = codigos_bncc[i]
     print(f"   {i+1}. {str(obj_aprendizagem)[:60]}...")
     print(f"      Código extraído: {codigo_extraido}")
 
 print(f"\n📊 CURRÍCULO - Primeiras 2 linhas da coluna 'OBJETIVO DE APRENDIZAGEM':")
 for i, (idx, linha) in enumerate(curriculo_df_inf.head(2).iterrows()):
     obj_aprendizagem = linha['OBJETIVO DE APRENDIZAGEM']
-    codigo_extraido = extrair_codigo(obj_aprendizagem)
+    codigo_extraido = codigos_curriculo[i]
     print(f"   {i+1}. {str(obj_aprendizagem)[:60]}...")
     print(f"      Código extraído: {codigo_extraido}")
 
@@ -155,7 +146,9 @@ relatorio_completo = encontrar_similaridade_balanceada(
     grau_similaridade, 
     bncc_df_inf, 
     curriculo_df_inf, 
-    NOTA_CORTE
+    NOTA_CORTE,
+    codigos_bncc=codigos_bncc,
+    codigos_curriculo=codigos_curriculo
 )
 
 # Calcular estatísticas
@@ -165,7 +158,7 @@ estatisticas = {
     'bncc_com_similaridade_balanceada': len(relatorio_completo),
     'total_matches_acima_corte': sum(len([s for s in h['habilidades_similares'] if s['similaridade'] >= NOTA_CORTE]) for h in relatorio_completo),
     'nota_corte_original': NOTA_CORTE,
-    'modelo_usado': CONFIGURACOES['MODELO_EMBEDDINGS'],
+    'modelo_usado': nome_registrado(model),
     'data_analise': data_relatorio,
     'habilidades_unicas_usadas': len(set(s['curriculo_codigo'] for h in relatorio_completo for s in h['habilidades_similares'])),
     'distribuicao_por_disciplina': {}
@@ -412,9 +405,9 @@ except Exception as e:
 # Gerar heatmap se configurado
 if CONFIGURACOES['GERAR_HEATMAP']:
     try:
-        # Extrai códigos para usar como índices
-        bncc_codigos = bncc_df_inf['OBJETIVO DE APRENDIZAGEM'].apply(extrair_codigo).tolist()
-        curriculo_codigos = curriculo_df_inf['OBJETIVO DE APRENDIZAGEM'].apply(extrair_codigo).tolist()
+        # Códigos extraídos no início como índices
+        bncc_codigos = codigos_bncc.lista()
+        curriculo_codigos = codigos_curriculo.lista()
         
         # Cria DataFrame de similaridade
         sim_df = pd.DataFrame(grau_similaridade, 
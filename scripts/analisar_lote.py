@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Analisa em uma execução os currículos de várias redes contra a BNCC.
+
+Uso: python scripts/analisar_lote.py <diretório> --segmento "anos iniciais" [--nota-corte 0.8]
+     python scripts/analisar_lote.py --manifesto lote.csv [--processos N] [--saida DIR]
+
+O manifesto é um CSV com as colunas `arquivo` e `segmento` (e, opcional,
+`nota_corte`). O modelo e a BNCC de cada segmento são carregados uma vez; a
+saída tem os relatórios de cada arquivo em docs/, os matches de todos em um
+dataset Parquet particionado por segmento e arquivo e o resumos.csv.
+"""
+
+import os
+import sys
+import argparse
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from core.analise_lote import analisar_lote, listar_diretorio, ler_manifesto
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('diretorio', nargs='?', help='pasta com os currículos (.xlsx, .xls, .csv)')
+    parser.add_argument('--manifesto', help='CSV com arquivo, segmento e nota_corte de cada currículo')
+    parser.add_argument('--segmento', help='segmento de todos os arquivos do diretório')
+    parser.add_argument('--nota-corte', type=float, default=0.8, help='nota de corte padrão (0.8)')
+    parser.add_argument('--processos', type=int, default=None, help='processos do pool (padrão: núcleos)')
+    parser.add_argument('--saida', default=None, help='pasta de saída (padrão: artefatos/lotes/<timestamp>)')
+    args = parser.parse_args()
+    if bool(args.diretorio) == bool(args.manifesto):
+        parser.error('informe um diretório ou --manifesto')
+    if args.diretorio and not args.segmento:
+        parser.error('--segmento é obrigatório com um diretório')
+
+    if args.manifesto:
+        itens = ler_manifesto(args.manifesto, args.nota_corte)
+    else:
+        itens = listar_diretorio(args.diretorio, args.segmento, args.nota_corte)
+    resultado = analisar_lote(itens, saida=args.saida, processos=args.processos)
+    print(f"💾 Matches: {resultado['matches']}")
+    print(f"💾 Resumos: {resultado['resumos_csv']}")
+    return 1 if resultado['erros'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
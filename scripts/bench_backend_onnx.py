@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark do backend ONNX int8 contra o SentenceTransformer fp32 (PyTorch, CPU),
+usando os textos das planilhas BNCC de referência dos três segmentos.
+
+Uso: python scripts/bench_backend_onnx.py [--modelo NOME] [--lote 32] [--repeticoes 3]
+
+Mede textos/s de cada backend e a fidelidade do int8: cosseno entre o embedding
+fp32 e o int8 de cada texto, diferença máxima entre as matrizes de notas BNCC ×
+BNCC e concordância do top-1 de cada linha.
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from core.similarity import concat_features_bncc
+from core.artefatos_bncc import resolver_arquivo_bncc
+from core.modelos import MODELO_PADRAO
+
+SEGMENTOS = ('infantil', 'anos iniciais', 'anos finais')
+
+
+def _textos_bncc():
+    textos = []
+    for segmento in SEGMENTOS:
+        bncc_df = pd.read_excel(resolver_arquivo_bncc(segmento))
+        textos.extend(concat_features_bncc(bncc_df).fillna('').tolist())
+    return textos
+
+
+def _medir(modelo, textos, lote, repeticoes):
+    modelo.encode(textos[:lote], batch_size=lote)  # aquecimento
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        embeddings = modelo.encode(textos, batch_size=lote, show_progress_bar=False)
+        tempos.append(time.perf_counter() - inicio)
+    return np.asarray(embeddings, dtype=np.float32), min(tempos)
+
+
+def _unitarios(embeddings):
+    return embeddings / np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modelo', default=MODELO_PADRAO)
+    parser.add_argument('--lote', type=int, default=32)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    try:
+        import onnxruntime  # noqa: F401
+        from sentence_transformers import SentenceTransformer
+        from core.backend_onnx import ModeloOnnxInt8
+    except ImportError as e:
+        print(f"❌ Dependência ausente ({e.name}): pip install -r requirements-onnx.txt")
+        sys.exit(1)
+
+    textos = _textos_bncc()
+    print(f"📊 {len(textos)} textos da BNCC, modelo {args.modelo}, lote {args.lote}")
+
+    fp32, tempo_fp32 = _medir(SentenceTransformer(args.modelo, device='cpu'), textos, args.lote, args.repeticoes)
+    int8, tempo_int8 = _medir(ModeloOnnxInt8(args.modelo), textos, args.lote, args.repeticoes)
+
+    fp32, int8 = _unitarios(fp32), _unitarios(int8)
+    cossenos = np.einsum('ij,ij->i', fp32, int8)
+    notas_fp32 = fp32 @ fp32.T
+    notas_int8 = int8 @ int8.T
+    np.fill_diagonal(notas_fp32, -np.inf)
+    np.fill_diagonal(notas_int8, -np.inf)
+    finitas = np.isfinite(notas_fp32)
+    diferenca = np.abs(notas_fp32[finitas] - notas_int8[finitas])
+    top1 = np.mean(np.argmax(notas_fp32, axis=1) == np.argmax(notas_int8, axis=1))
+
+    print(f"\n   {'backend':<12} {'textos/s':>10} {'tempo':>9}")
+    print(f"   {'torch fp32':<12} {len(textos) / tempo_fp32:>10.1f} {tempo_fp32:>8.2f}s")
+    print(f"   {'onnx int8':<12} {len(textos) / tempo_int8:>10.1f} {tempo_int8:>8.2f}s")
+    print(f"\n⚡ Aceleração: {tempo_fp32 / tempo_int8:.2f}x")
+    print(f"🎯 Cosseno fp32 × int8 por texto: média {cossenos.mean():.4f}, mínimo {cossenos.min():.4f}")
+    print(f"🎯 Notas BNCC × BNCC: diferença máxima {diferenca.max():.4f}, média {diferenca.mean():.4f}")
+    print(f"🎯 Top-1 igual ao fp32: {top1:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark da busca adaptativa (estratégia 2): laço de 0.01 em 0.01 x busca direta.
+
+Uso: python scripts/bench_corte_adaptativo.py [linhas] [colunas] [disciplinas]
+"""
+
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.similarity import encontrar_similaridade_adaptativa, primeiro_corte_adaptativo
+
+NOTA_CORTE = 0.8
+
+
+def adaptativa_laco(similaridades, nota_corte_inicial):
+    """Implementação anterior de encontrar_similaridade_adaptativa"""
+    nota_corte_atual = nota_corte_inicial
+    indices = np.where(similaridades >= nota_corte_atual)[0]
+    while len(indices) == 0 and nota_corte_atual > 0.1:
+        nota_corte_atual -= 0.01
+        indices = np.where(similaridades >= nota_corte_atual)[0]
+    if len(indices) == 0:
+        idx_melhor = np.argmax(similaridades)
+        indices = np.array([idx_melhor])
+        nota_corte_atual = similaridades[idx_melhor]
+    return indices, nota_corte_atual
+
+
+def estrategia2_laco(segmentos, nota_corte_inicial):
+    """Estratégia 2 do algoritmo balanceado: reexamina todas as disciplinas a cada 0.01"""
+    nota_corte_atual = nota_corte_inicial
+    escolhidos = []
+    while not escolhidos and nota_corte_atual > 0.1:
+        nota_corte_atual -= 0.01
+        for segmento in segmentos:
+            j = int(np.argmax(segmento))
+            if segmento[j] >= nota_corte_atual:
+                escolhidos.append(j)
+    return escolhidos, nota_corte_atual
+
+
+def estrategia2_direta(segmentos, nota_corte_inicial):
+    """Estratégia 2 com a nota calculada direto a partir do maior valor por disciplina"""
+    maximos = [segmento.max() for segmento in segmentos]
+    corte = primeiro_corte_adaptativo(max(maximos), nota_corte_inicial)
+    if corte is None:
+        return [], nota_corte_inicial
+    escolhidos = []
+    for segmento, maximo in zip(segmentos, maximos):
+        if maximo >= corte[1]:
+            escolhidos.append(int(np.argmax(segmento)))
+    return escolhidos, corte[1]
+
+
+def cronometrar(funcao, linhas, repeticoes=3):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultados = [funcao(linha) for linha in linhas]
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultados
+
+
+def main():
+    n_linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    n_colunas = int(sys.argv[2]) if len(sys.argv) > 2 else 1800
+    n_disciplinas = int(sys.argv[3]) if len(sys.argv) > 3 else 9
+
+    # Linhas que caem na estratégia 2: nenhuma similaridade alcança a nota de corte
+    rng = np.random.default_rng(0)
+    matriz = (rng.uniform(0.0, 1.0, size=(n_linhas, n_colunas)) *
+              rng.uniform(0.2, 0.75, size=(n_linhas, 1))).astype(np.float32)
+    divisoes = np.linspace(0, n_colunas, n_disciplinas + 1).astype(int)[1:-1]
+
+    print(f"📐 {n_linhas} linhas x {n_colunas} colunas, {n_disciplinas} disciplinas, nota de corte {NOTA_CORTE}")
+    passos = [primeiro_corte_adaptativo(linha.max(), NOTA_CORTE) for linha in matriz]
+    passos = [p[0] for p in passos if p is not None]
+    print(f"🔁 Iterações do laço por linha: média {np.mean(passos):.1f}, máx {max(passos)}")
+
+    t_laco, r_laco = cronometrar(lambda l: adaptativa_laco(l, NOTA_CORTE), matriz)
+    t_direta, r_direta = cronometrar(lambda l: encontrar_similaridade_adaptativa(l, NOTA_CORTE), matriz)
+    assert all(np.array_equal(a[0], b[0]) and a[1] == b[1] for a, b in zip(r_laco, r_direta))
+    print(f"\n⏱️ encontrar_similaridade_adaptativa (por linha)")
+    print(f"   laço 0.01: {t_laco / n_linhas * 1e6:9.1f} µs")
+    print(f"   direta:    {t_direta / n_linhas * 1e6:9.1f} µs   ({t_laco / t_direta:.1f}x)")
+
+    segmentos = [np.split(linha, divisoes) for linha in matriz]
+    t_laco, r_laco = cronometrar(lambda s: estrategia2_laco(s, NOTA_CORTE), segmentos)
+    t_direta, r_direta = cronometrar(lambda s: estrategia2_direta(s, NOTA_CORTE), segmentos)
+    assert r_laco == r_direta
+    print(f"\n⏱️ Estratégia 2 do algoritmo balanceado (por linha)")
+    print(f"   laço 0.01: {t_laco / n_linhas * 1e6:9.1f} µs")
+    print(f"   direta:    {t_direta / n_linhas * 1e6:9.1f} µs   ({t_laco / t_direta:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Relatório de padding e vazão: lote fixo na ordem do arquivo x lotes dinâmicos por
+comprimento, sobre os currículos de data/curriculo/.
+
+Uso: python scripts/bench_lotes_encode.py [--modelo NOME] [--orcamento 8192] [--sem-encode]
+
+Os comprimentos vêm do tokenizer do modelo. Sem o modelo (ambiente offline) o
+relatório de padding usa a contagem de palavras como aproximação e a vazão não é
+medida.
+"""
+
+import os
+import sys
+import glob
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from core.similarity import concat_features_curriculo
+from core.modelos import obter_modelo, identificador_modelo, MODELO_PADRAO
+from core.lotes_encode import (comprimentos_tokens, planejar_lotes, estatisticas_padding,
+                               lotes_ordem_arquivo, codificar_em_lotes, LOTE_FIXO_REFERENCIA)
+
+
+class _SemModelo:
+    """Só para os comprimentos aproximados (sem tokenizer)"""
+    tokenizer = None
+
+
+def _vazao(funcao, total):
+    inicio = time.perf_counter()
+    funcao()
+    return total / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modelo', default=MODELO_PADRAO)
+    parser.add_argument('--orcamento', type=int, default=None, help='tokens por lote')
+    parser.add_argument('--sem-encode', action='store_true', help='só o relatório de padding')
+    args = parser.parse_args()
+
+    try:
+        modelo = obter_modelo(args.modelo)
+        nome = identificador_modelo(args.modelo)
+    except Exception as e:
+        print(f"⚠️ Modelo indisponível ({e.__class__.__name__}); comprimentos aproximados por palavras")
+        modelo, nome = _SemModelo(), 'palavras (aproximação)'
+    medir = not args.sem_encode and getattr(modelo, 'tokenizer', None) is not None
+    print(f"📊 Lote fixo {LOTE_FIXO_REFERENCIA} (ordem do arquivo) x lotes por comprimento — tokens: {nome}")
+
+    for caminho in sorted(glob.glob(os.path.join(BASE_DIR, 'data', 'curriculo', '*.xlsx'))):
+        textos = concat_features_curriculo(pd.read_excel(caminho)).fillna('').astype(str).tolist()
+        comprimentos = comprimentos_tokens(modelo, textos)
+        antes = estatisticas_padding(comprimentos, lotes_ordem_arquivo(len(textos)))
+        depois = estatisticas_padding(comprimentos, planejar_lotes(comprimentos, args.orcamento))
+
+        print(f"\n📁 {os.path.basename(caminho)}: {len(textos)} textos, tokens "
+              f"mín {comprimentos.min()} / mediana {int(np.median(comprimentos))} / máx {comprimentos.max()}")
+        print(f"   {'':<14} {'lotes':>6} {'tokens processados':>19} {'padding':>8}")
+        for rotulo, est in (('lote fixo', antes), ('por comprimento', depois)):
+            print(f"   {rotulo:<14} {est['lotes']:>6} {est['tokens_processados']:>19} "
+                  f"{est['desperdicio_padding']:>8.1%}")
+
+        if medir:
+            fixo = _vazao(lambda: modelo.encode(textos, batch_size=LOTE_FIXO_REFERENCIA,
+                                                show_progress_bar=False), len(textos))
+            dinamico = _vazao(lambda: codificar_em_lotes(modelo, textos, args.orcamento), len(textos))
+            print(f"   vazão: {fixo:.0f} → {dinamico:.0f} textos/s ({dinamico / fixo:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
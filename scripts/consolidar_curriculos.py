@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Consolida as planilhas por ano/disciplina/bimestre de data/*_curriculo/ em uma
+tabela Parquet por segmento (artefatos/consolidacao/).
+
+Uso: python scripts/consolidar_curriculos.py [anos_iniciais|anos_finais|infantil ...]
+                                              [--processos N] [--forcar] [--xlsx]
+
+Só as planilhas novas ou alteradas desde a última execução são lidas de novo (o
+manifesto guarda o hash de cada arquivo); --forcar ignora o manifesto.
+"""
+
+import os
+import sys
+import argparse
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from core.consolidacao import SEGMENTOS, consolidar_segmento
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('segmentos', nargs='*', help=f"padrão: todos ({', '.join(SEGMENTOS)})")
+    parser.add_argument('--processos', type=int, default=None, help='processos do pool (padrão: núcleos)')
+    parser.add_argument('--forcar', action='store_true', help='relê todas as planilhas')
+    parser.add_argument('--xlsx', action='store_true', help='também exporta a tabela consolidada em .xlsx')
+    args = parser.parse_args()
+    desconhecidos = [s for s in args.segmentos if s not in SEGMENTOS]
+    if desconhecidos:
+        parser.error(f"segmento(s) desconhecido(s): {', '.join(desconhecidos)}")
+
+    falhas = 0
+    for chave in args.segmentos or list(SEGMENTOS):
+        resumo = consolidar_segmento(chave, processos=args.processos, forcar=args.forcar)
+        falhas += len(resumo['erros'])
+        if args.xlsx:
+            destino = os.path.splitext(resumo['tabela'])[0] + '.xlsx'
+            pd.read_parquet(resumo['tabela']).to_excel(destino, index=False)
+            print(f"💾 {os.path.relpath(destino, BASE_DIR)}")
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
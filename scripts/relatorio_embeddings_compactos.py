@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Relatório de espaço e desvio das notas dos formatos de embeddings (float32,
+float16, int8 com escala por vetor), usando os currículos de data/curriculo/ e a
+BNCC de cada segmento.
+
+Uso: python scripts/relatorio_embeddings_compactos.py [--nota-corte 0.8]
+
+Os embeddings vêm do modelo padrão; sem o modelo (ambiente offline) o relatório
+usa embeddings LSA (TF-IDF + SVD) e avisa no cabeçalho.
+"""
+
+import os
+import sys
+import glob
+import argparse
+import contextlib
+import io
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from core.similarity import concat_features_bncc, concat_features_curriculo, encontrar_similaridade_balanceada
+from core.artefatos_bncc import resolver_arquivo_bncc
+from core.embeddings_compactos import EmbeddingsCompactos, normalizar, pontuar, comparar_formatos, FORMATOS
+
+
+def _segmento(caminho, curriculo_df):
+    if 'OBJETIVO DE APRENDIZAGEM' in curriculo_df.columns:
+        return 'infantil'
+    return 'anos finais' if 'final' in os.path.basename(caminho).lower() else 'anos iniciais'
+
+
+def _codificador():
+    """Modelo padrão ou, sem ele, LSA ajustado sobre os próprios textos"""
+    try:
+        from core.modelos import obter_modelo, MODELO_PADRAO
+        modelo = obter_modelo(MODELO_PADRAO)
+        return MODELO_PADRAO, lambda textos_bncc, textos_curr: (
+            modelo.encode(textos_bncc), modelo.encode(textos_curr))
+    except Exception as e:
+        print(f"⚠️ Modelo indisponível ({e.__class__.__name__}); usando embeddings LSA (TF-IDF + SVD)")
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.decomposition import TruncatedSVD
+
+        def lsa(textos_bncc, textos_curr):
+            tfidf = TfidfVectorizer().fit(textos_bncc + textos_curr)
+            svd = TruncatedSVD(n_components=128, random_state=0).fit(tfidf.transform(textos_curr))
+            return (svd.transform(tfidf.transform(textos_bncc)).astype(np.float32),
+                    svd.transform(tfidf.transform(textos_curr)).astype(np.float32))
+        return 'LSA (TF-IDF + SVD)', lsa
+
+
+def _pares(relatorio):
+    return {(h['bncc_indice'], s['curriculo_indice']) for h in relatorio for s in h['habilidades_similares']}
+
+
+def _balanceado(notas, bncc_df, curriculo_df, nota_corte):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return _pares(encontrar_similaridade_balanceada(notas, bncc_df, curriculo_df, nota_corte))
+
+
+def avaliar(caminho, codificar, nota_corte):
+    curriculo_df = pd.read_excel(caminho)
+    bncc_df = pd.read_excel(resolver_arquivo_bncc(_segmento(caminho, curriculo_df)))
+    bncc, curriculo = codificar(concat_features_bncc(bncc_df).fillna('').tolist(),
+                                concat_features_curriculo(curriculo_df).fillna('').tolist())
+    bncc, curriculo = normalizar(bncc), normalizar(curriculo)
+    pares_float32 = _balanceado(pontuar(bncc, curriculo), bncc_df, curriculo_df, nota_corte)
+
+    print(f"\n📁 {os.path.basename(caminho)}: {len(bncc_df)} BNCC × {len(curriculo_df)} currículo, "
+          f"dimensão {bncc.shape[1]}")
+    print(f"   {'formato':>8} {'BNCC':>9} {'currículo':>10} {'economia':>9} {'desvio máx':>11} "
+          f"{'desvio médio':>13} {'mesmo top-1':>12} {'pares iguais':>13}")
+    linhas = comparar_formatos(bncc, curriculo)
+    total_float32 = linhas[0]['bytes_bncc'] + linhas[0]['bytes_curriculo']
+    for linha in linhas:
+        compactos = [EmbeddingsCompactos.compactar(x, linha['formato']).float32() for x in (bncc, curriculo)]
+        pares = _balanceado(pontuar(*compactos), bncc_df, curriculo_df, nota_corte)
+        linha['pares_iguais'] = len(pares & pares_float32) / max(1, len(pares_float32))
+        total = linha['bytes_bncc'] + linha['bytes_curriculo']
+        print(f"   {linha['formato']:>8} {linha['bytes_bncc'] / 1024:>7.0f}KB {linha['bytes_curriculo'] / 1024:>8.0f}KB "
+              f"{1 - total / total_float32:>9.0%} {linha['desvio_max']:>11.2e} {linha['desvio_medio']:>13.2e} "
+              f"{linha['mesmo_top1']:>12.1%} {linha['pares_iguais']:>13.1%}")
+    return [dict(linha, arquivo=os.path.basename(caminho)) for linha in linhas]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nota-corte', type=float, default=0.8)
+    parser.add_argument('--csv', help='grava a tabela também em CSV')
+    args = parser.parse_args()
+
+    nome, codificar = _codificador()
+    print(f"📊 Formatos de embeddings ({', '.join(FORMATOS)}) x float32 — embeddings: {nome}")
+    print("   desvio: |nota - nota float32|; mesmo top-1: linhas BNCC com a mesma melhor linha do "
+          "currículo; pares iguais: correspondências do algoritmo balanceado idênticas às do float32")
+
+    linhas = []
+    for caminho in sorted(glob.glob(os.path.join(BASE_DIR, 'data', 'curriculo', '*.xlsx'))):
+        linhas += avaliar(caminho, codificar, args.nota_corte)
+    if args.csv:
+        pd.DataFrame(linhas).to_csv(args.csv, index=False)
+        print(f"\n💾 {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Testes da análise de várias abas de uma pasta de trabalho (core/analise_abas.py)
+"""
+
+import os
+import sys
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core.analise_abas import analisar_abas, _rotulos_arquivo
+from core.similarity import process_uploaded_file
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+
+def _arquivos(resultado):
+    return [c for c in resultado['files'].values() if c]
+
+
+def test_rotulos_de_arquivo_sem_repeticao():
+    assert _rotulos_arquivo(['1º Ano', '1º-Ano', 'Instruções!']) == {
+        '1º Ano': '1º_Ano', '1º-Ano': '1º_Ano_2', 'Instruções!': 'Instruções'}
+
+
+def test_cada_aba_igual_a_analise_isolada(tmp_path, ambiente_offline):
+    curriculo = pd.read_excel(os.path.join(BASE_DIR, 'data', 'curriculo', 'ANOSINICIAIS_curriculo_normalizado.xlsx'))
+    pasta = str(tmp_path / 'rede.xlsx')
+    with pd.ExcelWriter(pasta) as escritor:
+        pd.DataFrame({'Leia-me': ['preencha uma aba por ano']}).to_excel(escritor, sheet_name='Leia-me', index=False)
+        for ano in ['1º Ano', '2º Ano']:
+            curriculo[curriculo['ANO'] == ano].to_excel(escritor, sheet_name=ano, index=False)
+    isolado = str(tmp_path / 'segundo.xlsx')
+    curriculo[curriculo['ANO'] == '2º Ano'].to_excel(isolado, index=False)
+
+    resultado = analisar_abas(pasta, 'anos iniciais', 0.8, processos=1)
+    referencia = process_uploaded_file(isolado, 'anos iniciais', 0.8)
+    for r in list(resultado['abas'].values()) + [referencia]:
+        ambiente_offline.extend(_arquivos(r))
+    ambiente_offline.append(resultado['indice'])
+
+    assert list(resultado['abas']) == ['1º Ano', '2º Ano']
+    assert 'Colunas ausentes' in resultado['erros']['Leia-me']
+    assert '2º_Ano' in resultado['abas']['2º Ano']['files']['csv']
+    pd.testing.assert_frame_equal(pd.read_csv(os.path.join(BASE_DIR, resultado['abas']['2º Ano']['files']['csv'])),
+                                  pd.read_csv(os.path.join(BASE_DIR, referencia['files']['csv'])))
+
+    indice = pd.read_csv(os.path.join(BASE_DIR, resultado['indice']))
+    assert indice['aba'].tolist() == ['Leia-me', '1º Ano', '2º Ano']
+    assert indice['total_curriculo'].tolist()[1:] == [(curriculo['ANO'] == a).sum() for a in ['1º Ano', '2º Ano']]
+
+
+def test_abas_inexistentes(tmp_path):
+    pasta = str(tmp_path / 'rede.xlsx')
+    pd.DataFrame({'A': [1]}).to_excel(pasta, sheet_name='Única', index=False)
+    with pytest.raises(Exception, match='Abas não encontradas'):
+        analisar_abas(pasta, 'anos iniciais', 0.8, abas=['Outra'])
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Testes da análise em lote de vários currículos (core/analise_lote.py)
+"""
+
+import os
+import sys
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core.analise_lote import analisar_lote, listar_diretorio, ler_manifesto
+from core.similarity import process_uploaded_file
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+
+def _arquivos(resumo):
+    return [resumo[c] for c in ('csv', 'heatmap', 'resumo_executivo', 'relatorio_detalhado', 'matriz') if resumo.get(c)]
+
+
+def test_manifesto_resolve_caminhos_e_nota(tmp_path):
+    manifesto = tmp_path / 'lote.csv'
+    manifesto.write_text('Arquivo,Segmento,nota_corte\nredes/a.xlsx,anos iniciais,0.7\nb.csv,anos finais,\n,,\n',
+                         encoding='utf-8')
+    itens = ler_manifesto(str(manifesto), 0.8)
+    assert itens == [
+        {'arquivo': str(tmp_path / 'redes' / 'a.xlsx'), 'segmento': 'anos iniciais', 'nota_corte': 0.7},
+        {'arquivo': str(tmp_path / 'b.csv'), 'segmento': 'anos finais', 'nota_corte': 0.8},
+    ]
+
+
+def test_manifesto_recusa_repetido_e_nota_invalida(tmp_path):
+    manifesto = tmp_path / 'lote.csv'
+    manifesto.write_text('arquivo,segmento,nota_corte\na.xlsx,anos iniciais,0.8\n./a.xlsx,anos iniciais,0.7\n',
+                         encoding='utf-8')
+    with pytest.raises(Exception, match=r"linha 3: './a.xlsx' já aparece na linha 2"):
+        ler_manifesto(str(manifesto), 0.8)
+    manifesto.write_text('arquivo,segmento,nota_corte\na.xlsx,anos iniciais,0.8\nb.xlsx,anos finais,80%\n',
+                         encoding='utf-8')
+    with pytest.raises(Exception, match=r"linha 3: nota_corte inválida '80%'"):
+        ler_manifesto(str(manifesto), 0.8)
+    with pytest.raises(Exception, match='Arquivos repetidos'):
+        analisar_lote([{'arquivo': 'a.xlsx', 'segmento': 'anos iniciais', 'nota_corte': n} for n in (0.7, 0.8)])
+
+
+def test_lote_grava_dataset_e_resumos(tmp_path, ambiente_offline):
+    curriculo = pd.read_excel(os.path.join(BASE_DIR, 'data', 'curriculo', 'ANOSINICIAIS_curriculo_normalizado.xlsx'))
+    pasta = tmp_path / 'redes'
+    pasta.mkdir()
+    curriculo[curriculo['ANO'] == '1º Ano'].to_excel(pasta / 'municipio_a.xlsx', index=False)
+    curriculo[curriculo['ANO'] == '2º Ano'].to_csv(pasta / 'municipio_b.csv', index=False, sep=';')
+    pd.DataFrame({'Leia-me': ['sem currículo']}).to_excel(pasta / 'instrucoes.xlsx', index=False)
+
+    itens = listar_diretorio(str(pasta), 'anos iniciais', 0.8)
+    resultado = analisar_lote(itens, saida=str(tmp_path / 'saida'), processos=1)
+    referencia = process_uploaded_file(str(pasta / 'municipio_b.csv'), 'anos iniciais', 0.8)
+    for resumo in list(resultado['resumos'].values()) + [referencia['resumo']]:
+        ambiente_offline.extend(_arquivos(resumo))
+
+    assert list(resultado['erros']) == [str(pasta / 'instrucoes.xlsx')]
+    matches = pd.read_parquet(resultado['matches'])
+    assert set(matches['arquivo']) == {'municipio_a', 'municipio_b'}
+    assert set(matches['segmento']) == {'anos iniciais'}
+    doc_b = matches[matches['arquivo'] == 'municipio_b'].drop(columns=['segmento', 'arquivo']).reset_index(drop=True)
+    pd.testing.assert_frame_equal(doc_b, pd.read_csv(os.path.join(BASE_DIR, referencia['files']['csv'])),
+                                  check_dtype=False)
+
+    resumos = pd.read_csv(resultado['resumos_csv'])
+    assert resumos['arquivo'].tolist() == [str(pasta / n) for n in ('instrucoes.xlsx', 'municipio_a.xlsx', 'municipio_b.csv')]
+    assert resumos['erro'].notna().tolist() == [True, False, False]
+    assert resumos['linhas_curriculo'].tolist()[1:] == [(curriculo['ANO'] == a).sum() for a in ('1º Ano', '2º Ano')]
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Testes dos artefatos pré-computados da BNCC (core/artefatos_bncc.py): reaproveitamento,
+reconstrução quando a planilha ou o modelo mudam e conteúdo igual a uma codificação nova
+"""
+
+import os
+import sys
+import shutil
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core import artefatos_bncc, modelos
+from core.artefatos_bncc import carregar_referencia_bncc, chave_artefato, _preparar_tabela
+from core.codificadores import CodificadorHash
+from core.embeddings_compactos import normalizar
+from core.modelos import identificador_modelo, obter_modelo, MODELO_PADRAO
+from core.tabelas_parquet import ler_planilha
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def planilha(tmp_path, monkeypatch, ambiente_offline):
+    """Cópia da BNCC dos anos iniciais; contagem de construções de artefato"""
+    monkeypatch.setattr(artefatos_bncc, '_referencias_em_memoria', {})
+    destino = tmp_path / 'bncc_df_anosiniciais.xlsx'
+    shutil.copy(os.path.join(BASE_DIR, 'bncc_df_anosiniciais.xlsx'), destino)
+    construcoes = []
+    construir = artefatos_bncc.construir_artefato_bncc
+
+    def contar(*args, **kwargs):
+        construcoes.append(args)
+        return construir(*args, **kwargs)
+
+    monkeypatch.setattr(artefatos_bncc, 'construir_artefato_bncc', contar)
+    return str(destino), construcoes
+
+
+def _recarregar(caminho, modelo_id):
+    """Carrega de novo sem o cache em memória do processo (como outro worker)"""
+    artefatos_bncc._referencias_em_memoria.clear()
+    return carregar_referencia_bncc(caminho, modelo_id)
+
+
+def test_conteudo_igual_a_codificacao_nova(planilha):
+    caminho, construcoes = planilha
+    from core.similarity import concat_features_bncc
+    modelo_id = identificador_modelo(MODELO_PADRAO)
+    referencia = carregar_referencia_bncc(caminho, modelo_id)
+    assert len(construcoes) == 1
+
+    # Embeddings mapeados em memória, iguais aos de um encode novo da planilha
+    assert isinstance(referencia.compactos.valores, np.memmap)
+    # Sem cópia float32 residente: as notas usam os próprios vetores mapeados
+    assert referencia.embeddings is referencia.compactos
+    tabela = _preparar_tabela(ler_planilha(caminho))
+    novos = normalizar(obter_modelo(modelo_id).encode(concat_features_bncc(tabela).tolist()))
+    np.testing.assert_allclose(referencia.embeddings, novos, rtol=1e-5, atol=1e-6)
+    # Tabela Arrow com as colunas e valores da planilha
+    pd.testing.assert_frame_equal(referencia.dataframe(), tabela)
+    assert referencia.textos.tolist() == concat_features_bncc(tabela).astype(str).tolist()
+
+
+def test_reaproveitado_sem_mudanca(planilha):
+    caminho, construcoes = planilha
+    modelo_id = identificador_modelo(MODELO_PADRAO)
+    primeira = carregar_referencia_bncc(caminho, modelo_id)
+    # Mesmo processo: a mesma instância; outro processo: o mesmo artefato em disco
+    assert carregar_referencia_bncc(caminho, modelo_id) is primeira
+    segunda = _recarregar(caminho, modelo_id)
+    assert segunda is not primeira and segunda.diretorio == primeira.diretorio
+    # mtime novo com o mesmo conteúdo também reaproveita
+    os.utime(caminho, ns=(0, 10**18))
+    assert _recarregar(caminho, modelo_id).chave == primeira.chave
+    assert len(construcoes) == 1
+
+
+def test_reconstruido_quando_a_planilha_muda(planilha):
+    caminho, construcoes = planilha
+    modelo_id = identificador_modelo(MODELO_PADRAO)
+    antes = carregar_referencia_bncc(caminho, modelo_id)
+
+    alterada = pd.read_excel(caminho)
+    alterada.loc[0, 'HABILIDADE'] = 'Contar objetos de uma coleção até 100'
+    alterada.to_excel(caminho, index=False)
+    depois = _recarregar(caminho, modelo_id)
+
+    assert len(construcoes) == 2 and depois.chave != antes.chave and depois.diretorio != antes.diretorio
+    assert 'Contar objetos' in depois.textos.iloc[0]
+    assert not np.allclose(depois.embeddings[0], antes.embeddings[0])
+    np.testing.assert_array_equal(depois.embeddings[1:], antes.embeddings[1:])
+
+
+def test_reconstruido_quando_o_modelo_muda(planilha, monkeypatch):
+    caminho, construcoes = planilha
+    monkeypatch.setitem(modelos.BACKENDS, 'teste', lambda base: CodificadorHash(base))
+    monkeypatch.setattr(modelos, '_modelos', {})
+    padrao = carregar_referencia_bncc(caminho, identificador_modelo(MODELO_PADRAO))
+    outro = carregar_referencia_bncc(caminho, 'outro-modelo@teste')
+
+    assert len(construcoes) == 2 and outro.chave != padrao.chave
+    assert outro.modelo_nome == 'outro-modelo@teste'
+    assert outro.chave == chave_artefato(artefatos_bncc.hash_arquivo(caminho), 'outro-modelo@teste')
+    # Formato dos embeddings também entra na chave
+    assert chave_artefato('h', 'm', 'float32') != chave_artefato('h', 'm', 'int8')
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Testes do backend ONNX int8: pooling em NumPy, seleção do backend pelo
+identificador do modelo e, com o onnxruntime instalado, exportação e encode
+int8 de um modelo pequeno criado no teste (sem baixar pesos)
+"""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core.backend_onnx import agrupar_tokens, exportar_modelo_onnx, ModeloOnnxInt8, ARQUIVO_INT8
+from core.modelos import identificador_modelo
+
+
+def test_pooling_media_ignora_padding():
+    saida = np.arange(2 * 3 * 2, dtype=np.float32).reshape(2, 3, 2)
+    mascara = np.array([[1, 1, 0], [1, 1, 1]])
+    agrupado = agrupar_tokens(saida, mascara, 'mean')
+    np.testing.assert_allclose(agrupado[0], saida[0, :2].mean(axis=0))
+    np.testing.assert_allclose(agrupado[1], saida[1].mean(axis=0))
+
+
+def test_pooling_cls_e_max():
+    saida = np.array([[[1.0, -5.0], [3.0, 2.0], [9.0, 9.0]]], dtype=np.float32)
+    mascara = np.array([[1, 1, 0]])
+    np.testing.assert_array_equal(agrupar_tokens(saida, mascara, 'cls'), [[1.0, -5.0]])
+    np.testing.assert_array_equal(agrupar_tokens(saida, mascara, 'max'), [[3.0, 2.0]])
+
+
+def test_identificador_do_backend():
+    assert identificador_modelo('all-MiniLM-L6-v2@torch') == 'all-MiniLM-L6-v2'
+    assert identificador_modelo('all-MiniLM-L6-v2@onnx-int8') == 'all-MiniLM-L6-v2@onnx-int8'
+    with pytest.raises(ValueError):
+        identificador_modelo('all-MiniLM-L6-v2@tensorrt')
+
+
+TEXTOS = [
+    'Reconhecer e nomear as letras do alfabeto',
+    'Ler e escrever números naturais até a ordem das centenas',
+    'Identificar elementos de um texto narrativo',
+    'Explorar sons e ritmos com o corpo',
+]
+
+
+def _modelo_pequeno(pasta):
+    """SentenceTransformer BERT de 2 camadas com pesos aleatórios fixos, salvo em `pasta`"""
+    import torch
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+    from sentence_transformers import SentenceTransformer, models
+
+    palavras = sorted({p for t in TEXTOS for p in t.lower().split()})
+    letras = sorted({c for t in TEXTOS for c in t.lower() if c != ' '})
+    vocab = ['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]'] + palavras + letras + [f'##{c}' for c in letras]
+    (pasta / 'hf').mkdir(parents=True)
+    (pasta / 'hf' / 'vocab.txt').write_text('\n'.join(dict.fromkeys(vocab)), encoding='utf-8')
+    tokenizer = BertTokenizerFast(str(pasta / 'hf' / 'vocab.txt'), do_lower_case=True)
+    torch.manual_seed(0)
+    config = BertConfig(vocab_size=len(tokenizer), hidden_size=64, num_hidden_layers=2, num_attention_heads=4,
+                        intermediate_size=128, max_position_embeddings=128)
+    BertModel(config).save_pretrained(pasta / 'hf')
+    tokenizer.save_pretrained(pasta / 'hf')
+
+    transformer = models.Transformer(str(pasta / 'hf'), max_seq_length=64)
+    modelo = SentenceTransformer(modules=[transformer, models.Pooling(64, 'mean'), models.Normalize()],
+                                 device='cpu')
+    modelo.save(str(pasta / 'st'))
+    return str(pasta / 'st'), modelo
+
+
+def test_exportacao_int8_proxima_do_fp32(tmp_path):
+    pytest.importorskip('onnxruntime')
+    pytest.importorskip('onnx')
+    pytest.importorskip('sentence_transformers')
+    caminho, modelo_fp32 = _modelo_pequeno(tmp_path / 'modelo')
+
+    diretorio = str(tmp_path / 'onnx' / 'pequeno')
+    assert exportar_modelo_onnx(caminho, diretorio) == diretorio
+    assert os.path.exists(os.path.join(diretorio, ARQUIVO_INT8))
+    # Nenhuma pasta temporária da exportação fica para trás
+    assert os.listdir(tmp_path / 'onnx') == ['pequeno']
+
+    modelo_int8 = ModeloOnnxInt8(caminho, diretorio)
+    int8 = modelo_int8.encode(TEXTOS, batch_size=3)
+    fp32 = modelo_fp32.encode(TEXTOS, convert_to_numpy=True)
+    assert int8.shape == fp32.shape and int8.dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(int8, axis=1), 1.0, rtol=1e-5)
+    cossenos = (int8 * fp32).sum(axis=1)
+    assert cossenos.min() > 0.98, cossenos
+    # Texto único: sem padding, a quantização dinâmica das ativações muda só a 3ª casa
+    np.testing.assert_allclose(modelo_int8.encode(TEXTOS[0]), int8[0], atol=1e-3)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Testes do cache persistente de embeddings (core/cache_embeddings.py)
+"""
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core.cache_embeddings import CacheEmbeddings, codificar_com_cache, hash_texto
+
+
+class ModeloContador:
+    """Modelo falso que registra quantos textos foram codificados"""
+
+    def __init__(self):
+        self.textos_codificados = []
+
+    def encode(self, textos, show_progress_bar=False):
+        self.textos_codificados.extend(textos)
+        return np.array([[len(t), t.count('a'), 1.0] for t in textos], dtype=np.float32)
+
+
+def _curriculo(n):
+    return [f"MATEMÁTICA | (EF0{i % 9}MA{i:02d}) habilidade {i} | orientação {i}" for i in range(n)]
+
+
+def test_reenvio_codifica_apenas_linhas_editadas():
+    cache = CacheEmbeddings(':memory:')
+    modelo = ModeloContador()
+    textos = _curriculo(40)
+
+    primeira = codificar_com_cache(modelo, textos, 'modelo-teste', cache=cache)
+    assert len(modelo.textos_codificados) == 40
+
+    revisado = list(textos)
+    for i in (3, 7, 11, 20, 33):
+        revisado[i] = revisado[i] + " (revisada)"
+    modelo.textos_codificados.clear()
+    segunda = codificar_com_cache(modelo, revisado, 'modelo-teste', cache=cache)
+
+    assert len(modelo.textos_codificados) == 5
+    assert segunda.shape == primeira.shape
+    inalteradas = [i for i in range(40) if i not in (3, 7, 11, 20, 33)]
+    assert np.array_equal(segunda[inalteradas], primeira[inalteradas])
+    assert cache.acertos == 35
+
+
+def test_normalizacao_de_espacos_e_modelo_na_chave():
+    cache = CacheEmbeddings(':memory:')
+    modelo = ModeloContador()
+    codificar_com_cache(modelo, ["texto  com\nespaços "], 'modelo-a', cache=cache)
+    codificar_com_cache(modelo, ["texto com espaços"], 'modelo-a', cache=cache)
+    assert len(modelo.textos_codificados) == 1
+    assert hash_texto(" a  b ") == hash_texto("a b")
+
+    # Outro modelo não reaproveita embeddings
+    codificar_com_cache(modelo, ["texto com espaços"], 'modelo-b', cache=cache)
+    assert len(modelo.textos_codificados) == 2
+
+
+def test_descarte_lru_respeita_limite():
+    cache = CacheEmbeddings(':memory:', limite_entradas=3)
+    vetor = np.ones(4, dtype=np.float32)
+    for chave in ('a', 'b', 'c'):
+        cache.gravar_varios('m', {chave: vetor})
+    cache.obter_varios('m', ['a'])  # 'a' passa a ser o mais recente
+    cache.gravar_varios('m', {'d': vetor})
+
+    assert len(cache) == 3
+    presentes = cache.obter_varios('m', ['a', 'b', 'c', 'd'])
+    assert set(presentes) == {'a', 'c', 'd'}
+    assert cache.estatisticas()['descartes'] == 1
+
+
+if __name__ == "__main__":
+    test_reenvio_codifica_apenas_linhas_editadas()
+    test_normalizacao_de_espacos_e_modelo_na_chave()
+    test_descarte_lru_respeita_limite()
+    print("✅ Testes do cache de embeddings passaram!")
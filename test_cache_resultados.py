@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Testes do cache de resultados por conteúdo do upload (core/cache_resultados.py)
+"""
+
+import io
+import os
+import sys
+import hashlib
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core import cache_resultados
+from core.cache_resultados import CacheResultados, chave_resultado, salvar_com_hash
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ARQUIVO_DOCS = os.path.join('data', 'curriculo', 'curriculo_df_inf.xlsx')
+
+
+def _resultado(nota=0.9):
+    return {
+        'resumo': {'total_bncc': 3, 'nota_media': np.float32(nota)},
+        'files': {'csv': ARQUIVO_DOCS, 'heatmap': None},
+        'top_matches': [{'codigo': 'EI01EO01', 'nota': np.float64(nota), 'linha': np.int64(4)}],
+        'relatorios': {'resumo_executivo': 'Resumo', 'relatorio_detalhado': 'Detalhado'},
+        'df': 'não guardado',
+    }
+
+
+def test_salvar_com_hash(tmp_path):
+    conteudo = os.urandom(3 * 1024 * 1024 + 17)
+    caminho = tmp_path / 'upload.xlsx'
+    assert salvar_com_hash(io.BytesIO(conteudo), str(caminho)) == hashlib.sha256(conteudo).hexdigest()
+    assert caminho.read_bytes() == conteudo
+
+
+def test_chave_muda_com_cada_componente(monkeypatch):
+    base = chave_resultado('abc', 'Educação Infantil', 0.8, 'modelo')
+    assert base == chave_resultado('abc', 'infantil', 0.80, 'modelo')
+    outras = {
+        chave_resultado('abd', 'infantil', 0.8, 'modelo'),
+        chave_resultado('abc', 'anos iniciais', 0.8, 'modelo'),
+        chave_resultado('abc', 'infantil', 0.7, 'modelo'),
+        chave_resultado('abc', 'infantil', 0.8, 'modelo@hash'),
+    }
+    monkeypatch.setattr(cache_resultados, 'VERSAO_ALGORITMO', cache_resultados.VERSAO_ALGORITMO + 1)
+    outras.add(chave_resultado('abc', 'infantil', 0.8, 'modelo'))
+    assert len(outras) == 5 and base not in outras
+
+
+def test_chave_muda_com_os_parametros_do_indice_ann(monkeypatch):
+    from core import indice_ann, similaridade_blocos
+    monkeypatch.setattr(similaridade_blocos, 'MODO_SIMILARIDADE', 'ann')
+    base = chave_resultado('abc', 'infantil', 0.8, 'modelo')
+    chaves = set()
+    for nome in ('N_LISTAS_PADRAO', 'N_SONDAS_PADRAO', 'PQ_SUBESPACOS_PADRAO', 'PQ_REORDENAR_PADRAO'):
+        with monkeypatch.context() as m:
+            m.setattr(indice_ann, nome, getattr(indice_ann, nome) + 1)
+            chaves.add(chave_resultado('abc', 'infantil', 0.8, 'modelo'))
+    assert len(chaves) == 4 and base not in chaves
+    # Fora do modo 'ann' os parâmetros do índice não contam
+    monkeypatch.setattr(similaridade_blocos, 'MODO_SIMILARIDADE', 'blocos')
+    blocos = chave_resultado('abc', 'infantil', 0.8, 'modelo')
+    monkeypatch.setattr(indice_ann, 'N_SONDAS_PADRAO', indice_ann.N_SONDAS_PADRAO + 1)
+    assert chave_resultado('abc', 'infantil', 0.8, 'modelo') == blocos
+
+
+def test_acerto_falha_e_conteudo_guardado():
+    cache = CacheResultados(':memory:')
+    assert cache.obter('k') is None
+    cache.gravar('k', _resultado())
+    guardado = cache.obter('k')
+    # Escalares NumPy viram números; o DataFrame e afins não são guardados
+    assert guardado['resumo']['nota_media'] == np.float32(0.9).item()
+    assert guardado['top_matches'][0]['linha'] == 4
+    assert guardado['relatorios']['resumo_executivo'] == 'Resumo'
+    assert 'df' not in guardado
+    assert (cache.acertos, cache.falhas) == (1, 1)
+
+
+def test_persistencia_e_arquivo_ausente_invalida(tmp_path):
+    caminho = str(tmp_path / 'resultados.sqlite3')
+    cache = CacheResultados(caminho)
+    cache.gravar('k', _resultado())
+    resultado_sumido = _resultado()
+    resultado_sumido['files']['csv'] = os.path.join('docs', 'infantil', 'nao_existe.csv')
+    cache.gravar('sumido', resultado_sumido)
+    cache.fechar()
+
+    reaberto = CacheResultados(caminho)
+    assert reaberto.obter('k')['files']['csv'] == ARQUIVO_DOCS
+    # Relatórios apagados de docs/: a entrada vale como falha e sai do índice
+    assert reaberto.obter('sumido') is None and len(reaberto) == 1
+
+
+def test_limite_descarta_menos_usadas():
+    cache = CacheResultados(':memory:', limite_entradas=3)
+    for chave in ('a', 'b', 'c'):
+        cache.gravar(chave, _resultado())
+    assert cache.obter('a') is not None
+    cache.gravar('d', _resultado())
+    assert len(cache) == 3 and cache.descartes == 1
+    assert cache.obter('b') is None
+    assert all(cache.obter(chave) is not None for chave in ('a', 'c', 'd'))
+
+
+def test_desativado_por_variavel(monkeypatch):
+    monkeypatch.setenv('BNCC_CACHE_RESULTADOS', '0')
+    assert cache_resultados.obter_cache_resultados() is None
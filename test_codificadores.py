@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Testes do codificador offline por hashing (core/codificadores.py) e do registro
+de backends de embeddings (core/modelos.py)
+"""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core.codificadores import CodificadorHash
+from core import modelos
+
+
+TEXTOS = [
+    "MATEMÁTICA | (EF01MA01) Utilizar números naturais como indicador de quantidade",
+    "MATEMÁTICA | (EF01MA02) Contar de maneira exata ou aproximada quantidades",
+    "ARTE | (EF15AR01) Identificar e apreciar formas distintas das artes visuais",
+]
+
+
+def test_determinismo_e_formato():
+    a = CodificadorHash().encode(TEXTOS)
+    b = CodificadorHash().encode(list(reversed(TEXTOS)))[::-1]
+    assert a.dtype == np.float32
+    assert a.shape == (3, CodificadorHash().dimensao)
+    np.testing.assert_array_equal(a, b)
+    np.testing.assert_allclose(np.linalg.norm(a, axis=1), 1.0, rtol=1e-5)
+
+
+def test_textos_parecidos_ficam_mais_proximos():
+    emb = CodificadorHash().encode(TEXTOS)
+    assert emb[0] @ emb[1] > emb[0] @ emb[2]
+    # Acentos e caixa não mudam o vetor
+    np.testing.assert_allclose(CodificadorHash().encode("Matemática"), CodificadorHash().encode("matematica"))
+
+
+def test_lista_vazia():
+    assert CodificadorHash().encode([]).shape == (0, CodificadorHash().dimensao)
+
+
+def test_registro_de_backends(monkeypatch):
+    assert modelos.identificador_modelo('all-MiniLM-L6-v2@hash') == f"{modelos.MODELO_HASH}@hash"
+    assert isinstance(modelos.obter_modelo('qualquer@hash'), CodificadorHash)
+
+    monkeypatch.setitem(modelos.BACKENDS, 'teste', lambda base: ('instancia', base))
+    assert modelos.identificador_modelo('modelo-x@teste') == 'modelo-x@teste'
+    assert modelos._carregar('modelo-x@teste') == ('instancia', 'modelo-x')
+    with pytest.raises(ValueError):
+        modelos.identificador_modelo('modelo-x@inexistente')
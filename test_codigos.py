@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Equivalência da extração vetorizada de códigos (core/codigos.py) com a função
+anterior, que testava os padrões um a um com re.search
+"""
+
+import os
+import re
+import sys
+import glob
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core.codigos import extrair_codigo, extrair_codigos, indexar_codigos, IndiceCodigos
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _extrair_codigo_original(obj):
+    """extrair_codigo como era em core/similarity.py antes da expressão única"""
+    if pd.isna(obj):
+        return "(SEM_COD)"
+    obj_str = str(obj)
+    patterns = [
+        r'\(([A-Z]{2}\d{2}[A-Z]{2,4}\d{2}[A-Z]*\d*)\)',
+        r'\(([A-Z]{2}\d{2}[A-Z]{2}\d{2})\)',
+        r'\(([A-Z]+\d+[A-Z]*\d*)\)',
+        r'\(([A-Z0-9]+)\)'
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, obj_str)
+        if match:
+            return f"({match.group(1)})"
+    match_inicio = re.search(r'^\(([^)]+)\)', obj_str)
+    if match_inicio:
+        return f"({match_inicio.group(1)})"
+    return f"({obj_str[:15]}...)" if len(obj_str) > 15 else f"({obj_str})"
+
+
+EXEMPLOS = [
+    # Infantil
+    "(EI03CG01) Criar com o corpo formas diversificadas de expressão de sentimentos.",
+    "(EI01EF23ME03) Reconhecer os combinados e rotinas por meio de gravuras.",
+    # Anos iniciais/finais
+    "(EF15AR01) Identificar e apreciar formas distintas das artes visuais.",
+    "(EF67LP01) Analisar a estrutura e funcionamento dos hiperlinks.",
+    "(EF15AR13P3) Identificar e apreciar criticamente diversas formas musicais.",
+    # Prioridade dos padrões: o primeiro padrão vence mesmo aparecendo depois
+    "(A1) texto com código no fim (EF15AR01)",
+    "(EI01EF23ME03) seguido de (AB1)",
+    "(AB)(CD1)",
+    "((EF15AR01) parênteses duplos",
+    "texto\nem duas linhas (EF15AR01)",
+    # Fallbacks: primeiro parênteses no início, texto curto e texto longo
+    "(ef15ar01) código em minúsculas",
+    "(Matemática) sem código",
+    "EF07MA24) parêntese de abertura faltando no início",
+    "Texto longo sem nenhum código entre parênteses",
+    "curto",
+    "",
+    "()",
+    12,
+    3.5,
+    None,
+    float('nan'),
+    pd.NA,
+]
+
+
+def _valores_do_repositorio():
+    valores = []
+    caminhos = glob.glob(os.path.join(BASE_DIR, 'bncc_df_*.xlsx'))
+    caminhos += glob.glob(os.path.join(BASE_DIR, 'data', 'curriculo', '*.xlsx'))
+    for caminho in sorted(caminhos):
+        df = pd.read_excel(caminho)
+        df.columns = df.columns.astype(str).str.strip()
+        for coluna in ('HABILIDADE', 'HABILIDADES', 'OBJETIVO DE APRENDIZAGEM'):
+            if coluna in df.columns:
+                valores += df[coluna].tolist()
+    return valores
+
+
+@pytest.mark.parametrize('valor', EXEMPLOS, ids=range(len(EXEMPLOS)))
+def test_escalar_igual_ao_original(valor):
+    assert extrair_codigo(valor) == _extrair_codigo_original(valor)
+
+
+def test_coluna_inteira_igual_ao_original():
+    valores = EXEMPLOS + _valores_do_repositorio()
+    serie = pd.Series(valores, index=np.arange(len(valores)) * 2, dtype=object)
+    codigos = extrair_codigos(serie)
+    assert list(codigos.index) == list(serie.index)
+    assert codigos.tolist() == [_extrair_codigo_original(v) for v in valores]
+    # Também com o dtype str do pandas (regex do Arrow não tem lookahead)
+    textos = pd.Series([v for v in valores if isinstance(v, str)], dtype='str')
+    assert extrair_codigos(textos).tolist() == [_extrair_codigo_original(v) for v in textos]
+
+
+def test_indice_de_codigos():
+    indice = IndiceCodigos(['(A)', '(B)', '(A)', '(C)', '(B)', '(A)'])
+    assert indice.unicos.tolist() == ['(A)', '(B)', '(C)']
+    assert indice.ids.tolist() == [0, 1, 0, 2, 1, 0]
+    assert indice.posicoes['(A)'].tolist() == [0, 2, 5]
+    assert indice.posicao('(B)') == 1
+    assert indice[3] == '(C)' and type(indice[3]) is str
+    with pytest.raises(KeyError):
+        indice.posicao('(D)')
+    assert IndiceCodigos([]).posicoes == {}
+
+
+def test_colunas_de_cada_tabela():
+    bncc = pd.DataFrame({'HABILIDADE': ['(EF01LP01) a'], 'OBJETIVO DE APRENDIZAGEM': ['(EI03CG01) b']})
+    curriculo = pd.DataFrame({'OBJETIVO DE APRENDIZAGEM': ['(EI03CG01) b'], 'HABILIDADE': ['(EF01LP01) a']})
+    assert indexar_codigos(bncc, 'bncc').lista() == ['(EF01LP01)']
+    assert indexar_codigos(curriculo, 'curriculo').lista() == ['(EI03CG01)']
+    assert indexar_codigos(pd.DataFrame({'X': [1, 2]}), 'curriculo').lista() == ['CURR_0', 'CURR_1']
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Testes da consolidação incremental das planilhas por bimestre (core/consolidacao.py)
+"""
+
+import os
+import sys
+import shutil
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core import consolidacao
+from core.consolidacao import consolidar_segmento, ler_nome_arquivo, normalizar_disciplina
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PASTA_INICIAIS = os.path.join(BASE_DIR, 'data', 'iniciais_curriculo')
+
+
+@pytest.mark.parametrize('nome, esperado', [
+    ("1º ANO - EDUCAÇAO FISICA- 1º BIMESTRE.xlsx", ('1º Ano', 1, 'EDUCAÇÃO FÍSICA')),
+    ("3º ANO – MATEMÁTICA  - 4º bimestre.xlsx", ('3º Ano', 4, 'MATEMÁTICA')),
+    ("2º ANO - ARTE - 4 º BIMESTRE.xlsx", ('2º Ano', 4, 'ARTE')),
+    ("ENSINO RELIGIOSO –7º ANO – 2º BIMESTRE.xlsx", ('7º Ano', 2, 'ENSINO RELIGIOSO')),
+    ("6º-ANO-1º-BIMESTRE-MAT.xlsx", ('6º Ano', 1, 'MATEMÁTICA')),
+    ("9º-ano-1ºbimestre-LP.xlsx", ('9º Ano', 1, 'LÍNGUA PORTUGUESA')),
+    ("6 ano - 1° BIMESTRE - HISTÓRIA.xlsx", ('6º Ano', 1, 'HISTÓRIA')),
+    ("4º ANO - ENSINO RELIGIOSO - 1º BIMESTRE (1).xlsx", ('4º Ano', 1, 'ENSINO RELIGIOSO')),
+])
+def test_nome_arquivo_fundamental(nome, esperado):
+    info = ler_nome_arquivo(nome, 'anos_iniciais')
+    assert (info['ANO'], info['BIMESTRE'], normalizar_disciplina(info['GRUPO'])) == esperado
+
+
+@pytest.mark.parametrize('nome, ano, eixo', [
+    ("B1 - Traços, Sons, Cores E Formas.xlsx", 'BERÇÁRIO 1', 'TRAÇOS, SONS, CORES E FORMAS'),
+    ("B2  - CORPO, GESTOS E MOVIMENTOS.xlsx", 'BERÇÁRIO 2', 'CORPO, GESTOS E MOVIMENTOS'),
+    ("2º PERÍODO - Traços, Sons, Cores E Fromas.xlsx", '2º PERÍODO', 'TRAÇOS, SONS, CORES E FORMAS'),
+    ("Maternal - Espaços, Tempos, Quantidades, Relações.xlsx", 'MATERNAL', 'ESPAÇOS, TEMPOS, QUANTIDADES, RELAÇÕES'),
+])
+def test_nome_arquivo_infantil(nome, ano, eixo):
+    info = ler_nome_arquivo(nome, 'infantil')
+    assert (info['ANO'], info['BIMESTRE'], normalizar_disciplina(info['GRUPO'])) == (ano, None, eixo)
+
+
+def test_normalizar_disciplina_infantil():
+    assert normalizar_disciplina(float('nan')) == 'SEM_DISCIPLINA'
+    assert normalizar_disciplina(' espaços, tempos, quantidades e relações ') == 'ESPAÇOS, TEMPOS, QUANTIDADES, RELAÇÕES'
+
+
+@pytest.fixture
+def pasta(tmp_path, monkeypatch):
+    """Cópia de algumas planilhas dos anos iniciais em uma árvore temporária"""
+    destino = tmp_path / 'data' / 'iniciais_curriculo'
+    destino.mkdir(parents=True)
+    for nome in ["1º ANO - ARTE - 2º BIMESTRE.xlsx", "1º ANO – MATEMÁTICA  - 2º BIMESTRE.xlsx",
+                 "4º ANO - ENSINO RELIGIOSO - 1º BIMESTRE.xlsx", "4º ANO - ENSINO RELIGIOSO - 1º BIMESTRE (1).xlsx"]:
+        shutil.copy(os.path.join(PASTA_INICIAIS, nome), destino / nome)
+    monkeypatch.setattr(consolidacao, 'DIRETORIO_CONSOLIDACAO', str(tmp_path / 'saida'))
+    return tmp_path
+
+
+def test_consolidacao_incremental(pasta, monkeypatch):
+    resumo = consolidar_segmento('anos_iniciais', processos=1, base_dir=str(pasta))
+    assert (resumo['arquivos'], resumo['lidos'], resumo['duplicados']) == (3, 3, 1)
+    tabela = pd.read_parquet(resumo['tabela'])
+    assert len(tabela) == resumo['linhas'] > 0
+    assert set(tabela['DISCIPLINA']) == {'ARTE', 'MATEMÁTICA', 'ENSINO RELIGIOSO'}
+    assert set(tabela['BIMESTRE']) == {1, 2}
+    assert (tabela['HABILIDADES'] != '').any() and not tabela['HABILIDADES'].isna().any()
+
+    # Nada mudou: nenhuma planilha é lida de novo
+    with monkeypatch.context() as m:
+        m.setattr(consolidacao, 'interpretar_planilha', lambda *a: pytest.fail("planilha não deveria ser relida"))
+        resumo = consolidar_segmento('anos_iniciais', processos=1, base_dir=str(pasta))
+    assert (resumo['lidos'], resumo['reaproveitados']) == (0, 3)
+
+    # Uma planilha alterada e outra removida
+    arte = pasta / 'data' / 'iniciais_curriculo' / "1º ANO - ARTE - 2º BIMESTRE.xlsx"
+    df = pd.read_excel(arte, header=None)
+    df.iloc[-1, 2] = 'habilidade nova'
+    df.to_excel(arte, header=False, index=False)
+    os.remove(pasta / 'data' / 'iniciais_curriculo' / "1º ANO – MATEMÁTICA  - 2º BIMESTRE.xlsx")
+    resumo = consolidar_segmento('anos_iniciais', processos=1, base_dir=str(pasta))
+    assert (resumo['arquivos'], resumo['lidos'], resumo['reaproveitados']) == (2, 1, 1)
+    tabela = pd.read_parquet(resumo['tabela'])
+    assert 'MATEMÁTICA' not in set(tabela['DISCIPLINA'])
+    assert 'habilidade nova' in set(tabela['HABILIDADES'])
+    assert len(os.listdir(pasta / 'saida' / 'anos_iniciais' / 'fragmentos')) == 2
+
+
+def test_pool_de_processos_igual_ao_sequencial(pasta, tmp_path):
+    sequencial = consolidar_segmento('anos_iniciais', processos=1, base_dir=str(pasta),
+                                     diretorio=str(tmp_path / 'seq'))
+    paralelo = consolidar_segmento('anos_iniciais', processos=2, base_dir=str(pasta),
+                                   diretorio=str(tmp_path / 'par'))
+    pd.testing.assert_frame_equal(pd.read_parquet(sequencial['tabela']), pd.read_parquet(paralelo['tabela']))
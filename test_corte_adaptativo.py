@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+A busca direta da nota de corte adaptativa reproduz exatamente o laço de 0.01 em 0.01
+"""
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core.similarity import encontrar_similaridade_adaptativa, primeiro_corte_adaptativo
+
+
+def _laco_original(similaridades, nota_corte_inicial):
+    """Versão anterior de encontrar_similaridade_adaptativa (oráculo)"""
+    nota_corte_atual = nota_corte_inicial
+    indices = np.where(similaridades >= nota_corte_atual)[0]
+    while len(indices) == 0 and nota_corte_atual > 0.1:
+        nota_corte_atual -= 0.01
+        indices = np.where(similaridades >= nota_corte_atual)[0]
+    if len(indices) == 0:
+        idx_melhor = np.argmax(similaridades)
+        indices = np.array([idx_melhor])
+        nota_corte_atual = similaridades[idx_melhor]
+    return indices, nota_corte_atual
+
+
+def _valores_de_fronteira(nota_corte_inicial, tipo):
+    """Cada nota do laço convertida para o tipo, e os vizinhos imediatos"""
+    valores = []
+    nota = nota_corte_inicial
+    while nota > 0.1:
+        nota -= 0.01
+        convertido = np.asarray(nota, dtype=tipo)
+        valores += [convertido, np.nextafter(convertido, tipo(0)), np.nextafter(convertido, tipo(1))]
+    return np.array(valores, dtype=tipo)
+
+
+def test_mesma_nota_e_mesmos_indices_que_o_laco():
+    rng = np.random.default_rng(42)
+    for tipo in (np.float32, np.float64):
+        for nota_corte_inicial in (0.8, 0.85, 0.7, 0.5, 0.33, 0.12, 0.1, 0.05, np.float32(0.8)):
+            fronteira = _valores_de_fronteira(nota_corte_inicial, tipo)
+            aleatorios = rng.uniform(-0.1, 0.9, size=300).astype(tipo)
+            for maximo in np.concatenate([fronteira, aleatorios]):
+                linha = np.array([maximo * 0.5, maximo, maximo * 0.25], dtype=tipo)
+                esperado_idx, esperado_nota = _laco_original(linha, nota_corte_inicial)
+                obtido_idx, obtido_nota = encontrar_similaridade_adaptativa(linha, nota_corte_inicial)
+                assert np.array_equal(esperado_idx, obtido_idx)
+                assert esperado_nota == obtido_nota and type(esperado_nota) is type(obtido_nota)
+
+
+def test_numero_de_iteracoes():
+    assert primeiro_corte_adaptativo(np.float32(0.795), 0.8)[0] == 1
+    assert primeiro_corte_adaptativo(np.float32(0.05), 0.8) is None
+    iteracoes, nota = primeiro_corte_adaptativo(0.5, 0.8)
+    nota_laco, passos = 0.8, 0
+    while nota_laco > 0.1 and not 0.5 >= nota_laco:
+        nota_laco -= 0.01
+        passos += 1
+    assert (iteracoes, nota) == (passos, nota_laco)
+
+
+if __name__ == "__main__":
+    test_mesma_nota_e_mesmos_indices_que_o_laco()
+    test_numero_de_iteracoes()
+    print("✅ Nota de corte adaptativa idêntica ao laço original!")
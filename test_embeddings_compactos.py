@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Testes dos embeddings normalizados e compactos (core/embeddings_compactos.py)
+"""
+
+import os
+import sys
+import numpy as np
+import pytest
+from sklearn.metrics.pairwise import cosine_similarity
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core.embeddings_compactos import EmbeddingsCompactos, normalizar, pontuar, comparar_formatos
+
+
+@pytest.fixture
+def vetores():
+    gerador = np.random.default_rng(11)
+    return gerador.normal(size=(30, 24)).astype(np.float32), gerador.normal(size=(70, 24)).astype(np.float32)
+
+
+def test_produto_de_normalizados_igual_a_cosine_similarity(vetores):
+    bncc, curriculo = vetores
+    notas = pontuar(normalizar(bncc), normalizar(curriculo))
+    assert notas.dtype == np.float32
+    np.testing.assert_array_equal(notas, cosine_similarity(bncc, curriculo))
+
+
+@pytest.mark.parametrize('formato, tolerancia, proporcao', [('float16', 1e-3, 2), ('int8', 2e-2, 4)])
+def test_formatos_compactos(tmp_path, vetores, formato, tolerancia, proporcao):
+    normalizados = normalizar(vetores[1])
+    compactos = EmbeddingsCompactos.compactar(normalizados, formato)
+    assert compactos.formato == formato
+    assert compactos.nbytes() <= normalizados.nbytes / proporcao + normalizados.shape[0] * 4
+    np.testing.assert_allclose(compactos.float32(), normalizados, atol=tolerancia)
+
+    compactos.gravar(str(tmp_path))
+    abertos = EmbeddingsCompactos.abrir(str(tmp_path))
+    np.testing.assert_array_equal(abertos.float32(10, 20), compactos.float32()[10:20])
+
+
+def test_float32_sem_copia_e_formato_invalido(vetores):
+    normalizados = normalizar(vetores[0])
+    assert np.shares_memory(EmbeddingsCompactos.compactar(normalizados, 'float32').float32(), normalizados)
+    with pytest.raises(ValueError):
+        EmbeddingsCompactos.compactar(normalizados, 'int4')
+
+
+@pytest.mark.parametrize('formato', ['float32', 'float16', 'int8'])
+def test_selecao_convertida_so_no_trecho(vetores, formato):
+    normalizados = normalizar(vetores[1])
+    compactos = EmbeddingsCompactos.compactar(normalizados, formato)
+    completos = compactos.float32()
+    np.testing.assert_array_equal(compactos[5], completos[5])
+    np.testing.assert_array_equal(compactos[10:20], completos[10:20])
+    np.testing.assert_array_equal(compactos[np.array([3, 1])], completos[[3, 1]])
+    # pontuar aceita os compactos direto (conversão temporária)
+    np.testing.assert_array_equal(pontuar(compactos, normalizados), pontuar(completos, normalizados))
+
+
+def test_comparacao_de_formatos(vetores):
+    bncc, curriculo = normalizar(vetores[0]), normalizar(vetores[1])
+    linhas = {l['formato']: l for l in comparar_formatos(bncc, curriculo)}
+    assert linhas['float32']['desvio_max'] == 0 and linhas['float32']['mesmo_top1'] == 1
+    assert linhas['float16']['bytes_curriculo'] * 2 == linhas['float32']['bytes_curriculo']
+    assert 0 < linhas['float16']['desvio_max'] < linhas['int8']['desvio_max'] < 0.05
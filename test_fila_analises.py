@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Testes da fila de análises em segundo plano (core/fila_analises.py), dos avisos
+de progresso (core/progresso.py) e das rotas /process (inclusive com o
+resultado vindo do cache de resultados), /process_abas, /jobs/<id>,
+/jobs/<id>/eventos, /get_report/<id>/<tipo> e /matriz
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import importlib
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core import modelos, cache_resultados
+from core.fila_analises import FilaAnalises, FilaCheia, NA_FILA, PROCESSANDO, CONCLUIDA, ERRO
+from core.resultados_analises import ResultadosAnalises
+from core.progresso import Avanco
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ETAPAS = {'a': 'Etapa A', 'b': 'Etapa B', 'c': 'Etapa C'}
+
+
+def _esperar(tarefa, estados=(CONCLUIDA, ERRO), limite=120):
+    inicio = time.time()
+    while tarefa.estado not in estados:
+        assert time.time() - inicio < limite, f'tarefa parada em {tarefa.estado}'
+        time.sleep(0.02)
+
+
+def test_etapas_estado_e_resultado():
+    liberar = threading.Event()
+
+    def executar(valor, progresso=None):
+        progresso('a')
+        progresso('b', 0, 10)
+        progresso('b', 4, 10)
+        liberar.wait(10)
+        return valor * 2
+
+    fila = FilaAnalises(trabalhadores=1)
+    try:
+        tarefa = fila.enfileirar(executar, 21, parametros={'p': 1}, etapas=ETAPAS)
+        _esperar(tarefa, (PROCESSANDO,))
+        while tarefa.etapa != 'b':
+            time.sleep(0.01)
+        while tarefa.situacao()['etapas'][1]['feito'] != 4:
+            time.sleep(0.01)
+        situacao = tarefa.situacao()
+        assert [e['situacao'] for e in situacao['etapas']] == ['concluida', 'em_andamento', 'pendente']
+        assert (situacao['etapas'][1]['feito'], situacao['etapas'][1]['total']) == (4, 10)
+        # Contagem na mesma etapa não reinicia o relógio da etapa
+        assert situacao['etapas'][1]['duracao_segundos'] is not None
+        assert situacao['progresso'] == pytest.approx(0.33)
+        assert situacao['parametros'] == {'p': 1}
+
+        liberar.set()
+        _esperar(tarefa)
+        assert tarefa.estado == CONCLUIDA and tarefa.resultado == 42
+        assert tarefa.situacao()['progresso'] == 1.0
+        assert fila.obter(tarefa.id) is tarefa
+    finally:
+        fila.encerrar()
+
+
+def test_esperar_mudanca():
+    liberar = threading.Event()
+    fila = FilaAnalises(trabalhadores=1)
+    try:
+        tarefa = fila.enfileirar(lambda progresso=None: liberar.wait(10), etapas=ETAPAS)
+        _esperar(tarefa, (PROCESSANDO,))
+        versao = tarefa.versao
+        assert tarefa.esperar_mudanca(versao, timeout=0.05) == versao
+        threading.Timer(0.05, tarefa.avisar_etapa, args=('a',)).start()
+        assert tarefa.esperar_mudanca(versao, timeout=10) > versao
+    finally:
+        liberar.set()
+        fila.encerrar()
+
+
+def test_avanco_limitado_pelo_intervalo():
+    avisos = []
+    avanco = Avanco(lambda *aviso: avisos.append(aviso), 'algoritmo', 100, intervalo=60)
+    for feito in range(1, 101):
+        avanco(feito)
+    # Só o primeiro aviso e o de conclusão passam; os intermediários são agregados
+    assert avisos == [('algoritmo', 1, 100), ('algoritmo', 100, 100)]
+    avanco_sem_total = Avanco(lambda *aviso: avisos.append(aviso), 'embeddings', intervalo=0)
+    avanco_sem_total.somar(3)
+    avanco_sem_total.somar(2)
+    assert avisos[-1] == ('embeddings', 5, None)
+    # Sem quem acompanhe, só conta
+    sem_progresso = Avanco(None, 'algoritmo', 10)
+    sem_progresso(7)
+    assert sem_progresso.feito == 7
+
+
+def test_erro_da_analise():
+    def executar(progresso=None):
+        progresso('a')
+        raise Exception('Colunas ausentes no arquivo')
+
+    fila = FilaAnalises(trabalhadores=1)
+    try:
+        tarefa = fila.enfileirar(executar, etapas=ETAPAS)
+        _esperar(tarefa)
+        assert tarefa.estado == ERRO and tarefa.erro == 'Colunas ausentes no arquivo'
+        assert tarefa.situacao()['etapas'][0]['situacao'] == 'concluida'
+    finally:
+        fila.encerrar()
+
+
+def test_fila_limitada_posicao_e_descarte():
+    liberar = threading.Event()
+
+    def executar(progresso=None):
+        liberar.wait(10)
+
+    fila = FilaAnalises(trabalhadores=1, limite=2, limite_encerradas=2)
+    try:
+        primeira = fila.enfileirar(executar)
+        _esperar(primeira, (PROCESSANDO,))
+        segunda, terceira = fila.enfileirar(executar), fila.enfileirar(executar)
+        assert (segunda.estado, terceira.estado) == (NA_FILA, NA_FILA)
+        assert (fila.posicao(primeira), fila.posicao(segunda), fila.posicao(terceira)) == (0, 0, 1)
+        with pytest.raises(FilaCheia):
+            fila.enfileirar(executar)
+
+        liberar.set()
+        _esperar(terceira)
+        fila.encerrar()
+        # Só as duas encerradas mais recentes continuam consultáveis
+        assert fila.obter(primeira.id) is None
+        assert fila.obter(segunda.id) is segunda and fila.obter(terceira.id) is terceira
+    finally:
+        liberar.set()
+        fila.encerrar()
+
+
+@pytest.fixture
+def cliente(tmp_path, monkeypatch, ambiente_offline):
+    """Flask em teste sobre o ambiente_offline (conftest.py), com uploads em diretório temporário"""
+    monkeypatch.setenv('BNCC_MODELOS_AQUECIMENTO', f"{modelos.MODELO_PADRAO}@hash")
+    app = importlib.import_module('app')
+    monkeypatch.setitem(app.app.config, 'UPLOAD_FOLDER', str(tmp_path / 'uploads'))
+    fila = FilaAnalises(trabalhadores=1)
+    monkeypatch.setattr(app, 'fila_analises', fila)
+    monkeypatch.setattr(app, 'resultados_analises', ResultadosAnalises())
+    monkeypatch.setattr(cache_resultados, '_cache_global',
+                        cache_resultados.CacheResultados(str(tmp_path / 'cache_resultados.sqlite3')))
+    yield app.app.test_client(), ambiente_offline
+    fila.encerrar()
+
+
+def test_process_enfileira_e_jobs_acompanha(tmp_path, cliente):
+    cliente, gerados = cliente
+    (tmp_path / 'uploads').mkdir()
+    origem = os.path.join(BASE_DIR, 'data', 'curriculo', 'curriculo_df_inf.xlsx')
+
+    with open(origem, 'rb') as arquivo:
+        resposta = cliente.post('/process', data={'file': (arquivo, 'curriculo.xlsx'),
+                                                  'segment': 'infantil', 'nota_corte': '0.8'})
+    assert resposta.status_code == 202
+    id_tarefa = resposta.get_json()['id']
+    assert resposta.headers['Location'].endswith(f'/jobs/{id_tarefa}')
+
+    inicio = time.time()
+    while True:
+        situacao = cliente.get(f'/jobs/{id_tarefa}').get_json()
+        if situacao['estado'] in (CONCLUIDA, ERRO):
+            break
+        assert time.time() - inicio < 300
+        time.sleep(0.2)
+    assert situacao['estado'] == CONCLUIDA, situacao['erro']
+    arquivos = {tipo: url.split('/download/', 1)[1] for tipo, url in situacao['links']['arquivos'].items()}
+    gerados.extend(arquivos.values())
+
+    etapas = {e['etapa']: e for e in situacao['etapas']}
+    assert list(etapas) == ['validacao', 'leitura', 'embeddings', 'similaridade', 'algoritmo',
+                            'relatorios', 'heatmap', 'matriz']
+    assert all(e['situacao'] == 'concluida' for e in etapas.values())
+    # Contagens de linhas codificadas e de habilidades BNCC do algoritmo chegam ao total
+    assert etapas['embeddings']['feito'] == etapas['embeddings']['total'] == situacao['resumo']['total_curriculo']
+    assert etapas['algoritmo']['feito'] == etapas['algoritmo']['total'] == situacao['resumo']['total_bncc']
+
+    # Fluxo SSE de uma análise encerrada: um evento com o estado final e fim do fluxo
+    eventos = cliente.get(situacao['links']['eventos'])
+    assert eventos.mimetype == 'text/event-stream'
+    dados = [json.loads(linha[len('data: '):]) for linha in eventos.get_data(as_text=True).splitlines()
+             if linha.startswith('data: ')]
+    assert [d['estado'] for d in dados] == [CONCLUIDA]
+    assert cliente.get('/jobs/inexistente/eventos').status_code == 404
+    # Relatórios com o id da tarefa no nome; upload apagado ao fim
+    assert id_tarefa[:8] in arquivos['csv']
+    assert not os.path.exists(tmp_path / 'uploads' / id_tarefa)
+
+    pagina = cliente.get(situacao['links']['resultado'])
+    assert pagina.status_code == 200 and 'infantil' in pagina.get_data(as_text=True).lower()
+
+    # Relatórios servidos da memória, mesmo sem os .txt no disco
+    textos = {}
+    for tipo, chave in (('executive', 'resumo_executivo'), ('detailed', 'relatorio_detalhado')):
+        with open(os.path.join(BASE_DIR, arquivos[chave]), encoding='utf-8') as f:
+            textos[tipo] = f.read()
+        os.remove(os.path.join(BASE_DIR, arquivos[chave]))
+    for tipo, texto in textos.items():
+        assert cliente.get(f'/get_report/{id_tarefa}/{tipo}').get_data(as_text=True) == texto
+    assert cliente.get('/get_report/inexistente/executive').status_code == 404
+
+    assert cliente.get('/jobs/inexistente').status_code == 404
+    assert cliente.post('/process', data={}).status_code == 400
+
+
+def test_eventos_durante_a_analise(cliente):
+    cliente, _ = cliente
+    passo = threading.Semaphore(0)
+
+    def executar(progresso=None):
+        for feito in (0, 5, 10):
+            passo.acquire(timeout=10)
+            progresso('b', feito, 10)
+        return {'resumo': {}, 'files': {}}
+
+    tarefa = sys.modules['app'].fila_analises.enfileirar(executar, etapas=ETAPAS)
+    resposta = cliente.get(f'/jobs/{tarefa.id}/eventos', buffered=False)
+    eventos = []
+    for pedaco in resposta.response:
+        texto = pedaco.decode() if isinstance(pedaco, bytes) else pedaco
+        if texto.startswith('id: '):
+            eventos.append(json.loads(texto.split('data: ', 1)[1]))
+            passo.release()
+    resposta.close()
+    # Um evento por mudança; mudanças seguidas podem chegar agregadas no mesmo evento
+    feitos = [e['etapas'][1]['feito'] for e in eventos if e['etapa'] == 'b' and e['estado'] == PROCESSANDO]
+    assert len(feitos) >= 2 and feitos == sorted(feitos) and set(feitos) <= {0, 5, 10}
+    assert eventos[-1]['estado'] == CONCLUIDA and eventos[-1]['etapas'][1]['feito'] == 10
+
+
+def test_reenvio_identico_vem_do_cache(tmp_path, cliente):
+    cliente, gerados = cliente
+    (tmp_path / 'uploads').mkdir()
+    origem = os.path.join(BASE_DIR, 'data', 'curriculo', 'curriculo_df_inf.xlsx')
+
+    def enviar(nota_corte='0.8', **extra):
+        with open(origem, 'rb') as arquivo:
+            return cliente.post('/process', data={'file': (arquivo, 'curriculo.xlsx'), 'segment': 'infantil',
+                                                  'nota_corte': nota_corte, **extra})
+
+    primeira = enviar()
+    assert primeira.status_code == 202
+    tarefa = sys.modules['app'].fila_analises.obter(primeira.get_json()['id'])
+    _esperar(tarefa, limite=300)
+    assert tarefa.estado == CONCLUIDA, tarefa.erro
+    gerados.extend(tarefa.resultado['files'].values())
+
+    # Mesmo conteúdo, segmento e nota de corte: concluída na hora, com os mesmos arquivos
+    segunda = enviar()
+    assert segunda.status_code == 200
+    situacao = segunda.get_json()
+    assert situacao['cache'] is True and situacao['estado'] == CONCLUIDA
+    assert situacao['resumo'] == tarefa.resultado['resumo']
+    assert cliente.get(f"/jobs/{situacao['id']}").get_json()['estado'] == CONCLUIDA
+    assert cliente.get(situacao['links']['resultado']).status_code == 200
+    assert cliente.get(f"/get_report/{situacao['id']}/executive").status_code == 200
+    assert not os.path.exists(tmp_path / 'uploads' / situacao['id'])
+
+    # Outra nota de corte é outra chave: volta para a fila
+    outra = enviar('0.7')
+    assert outra.status_code == 202
+    _esperar(sys.modules['app'].fila_analises.obter(outra.get_json()['id']), limite=300)
+    gerados.extend(sys.modules['app'].fila_analises.obter(outra.get_json()['id']).resultado['files'].values())
+
+
+def test_process_abas_enfileira(tmp_path, cliente):
+    cliente, gerados = cliente
+    (tmp_path / 'uploads').mkdir()
+    curriculo = pd.read_excel(os.path.join(BASE_DIR, 'data', 'curriculo', 'ANOSINICIAIS_curriculo_normalizado.xlsx'))
+    pasta = tmp_path / 'rede.xlsx'
+    with pd.ExcelWriter(pasta) as escritor:
+        pd.DataFrame({'Leia-me': ['uma aba por ano']}).to_excel(escritor, sheet_name='Leia-me', index=False)
+        curriculo[curriculo['ANO'] == '1º Ano'].to_excel(escritor, sheet_name='1º Ano', index=False)
+
+    with open(pasta, 'rb') as arquivo:
+        invalida = cliente.post('/process_abas', data={'file': (arquivo, 'rede.xlsx'), 'segment': 'anos iniciais',
+                                                       'nota_corte': 'oito'})
+    assert invalida.status_code == 400
+    with open(pasta, 'rb') as arquivo:
+        resposta = cliente.post('/process_abas', data={'file': (arquivo, 'rede.xlsx'), 'segment': 'anos iniciais',
+                                                       'nota_corte': '0.8'})
+    assert resposta.status_code == 202
+    tarefa = sys.modules['app'].fila_analises.obter(resposta.get_json()['id'])
+    _esperar(tarefa, limite=300)
+    situacao = cliente.get(f'/jobs/{tarefa.id}').get_json()
+    assert situacao['estado'] == CONCLUIDA, situacao['erro']
+    gerados.append(tarefa.resultado['files']['indice'])
+    for aba in tarefa.resultado['abas'].values():
+        gerados.extend(aba['files'].values())
+
+    assert list(situacao['abas']) == ['1º Ano'] and 'Leia-me' in situacao['erros_abas']
+    assert situacao['abas']['1º Ano']['resumo']['total_curriculo'] == (curriculo['ANO'] == '1º Ano').sum()
+    assert 'indice' in situacao['links']['arquivos'] and 'resultado' not in situacao['links']
+    assert all(e['situacao'] == 'concluida' for e in situacao['etapas'])
+    assert not os.path.exists(tmp_path / 'uploads' / tarefa.id)
+
+
+def test_matriz_fora_de_docs_recusada(tmp_path, monkeypatch, cliente):
+    cliente, _ = cliente
+    monkeypatch.setattr(sys.modules['app'], 'BASE_DIR', str(tmp_path))
+    for pasta in ('docs', 'docs_old'):
+        (tmp_path / pasta).mkdir()
+        np.save(tmp_path / pasta / 'matriz.npy', np.eye(2, dtype=np.float32))
+    # Pasta irmã com o mesmo prefixo e subida de diretório não passam pela checagem
+    assert cliente.get('/matriz/docs_old/matriz.npy?bncc=0').status_code == 400
+    assert cliente.get('/matriz/docs/../docs_old/matriz.npy?bncc=0').status_code == 400
+    assert cliente.get('/matriz/docs/inexistente.npy?bncc=0').status_code == 404
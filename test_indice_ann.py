@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Testes do índice aproximado IVF/PQ (core/indice_ann.py)
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core.indice_ann import IndiceIVF, calcular_candidatos_ann
+from core.similarity import encontrar_similaridade_balanceada
+from test_motor_balanceado import _iguais
+from test_similaridade_blocos import _dados
+
+
+def _agrupados(rng, quantidade, dimensao=64, grupos=30):
+    """Embeddings com estrutura de grupos, como textos de temas parecidos"""
+    centros = rng.normal(size=(grupos, dimensao))
+    return (centros[rng.integers(0, grupos, size=quantidade)] +
+            0.35 * rng.normal(size=(quantidade, dimensao))).astype(np.float32)
+
+
+def _recall_top1(indice, consultas, base, n_sondas):
+    exato = np.argmax(cosine_similarity(consultas, base), axis=1)
+    acertos = 0
+    for consulta, esperado in zip(consultas, exato):
+        posicoes, notas = indice.buscar(consulta, n_sondas)
+        acertos += int(posicoes[np.argmax(notas)] == esperado)
+    return acertos / len(consultas)
+
+
+def test_recall_cresce_com_as_sondas():
+    rng = np.random.default_rng(0)
+    base = _agrupados(rng, 3000)
+    consultas = _agrupados(rng, 100)
+    indice = IndiceIVF(n_listas=50).construir(base)
+
+    recalls = [_recall_top1(indice, consultas, base, n) for n in (1, 4, 50)]
+    assert recalls[0] <= recalls[1] <= recalls[2] == 1.0
+    assert recalls[1] >= 0.9
+
+
+def test_pq_reordena_com_nota_exata():
+    rng = np.random.default_rng(1)
+    base = _agrupados(rng, 3000)
+    consultas = _agrupados(rng, 50)
+    indice = IndiceIVF(n_listas=40, pq_subespacos=8, pq_reordenar=100).construir(base)
+    assert indice.pq_codigos.dtype == np.uint8 and indice.pq_codigos.shape == (3000, 8)
+
+    posicoes, notas = indice.buscar(consultas[0], n_sondas=10)
+    assert len(posicoes) <= 100
+    assert np.allclose(notas, cosine_similarity(consultas[:1], base[posicoes])[0], atol=1e-5)
+    assert _recall_top1(indice, consultas, base, n_sondas=10) >= 0.9
+
+
+def test_sondando_todas_as_listas_igual_ao_denso():
+    rng = np.random.default_rng(3)
+    bncc_df, curriculo_df, bncc, curriculo = _dados(rng)
+    indice = IndiceIVF(n_listas=8).construir(curriculo)
+    candidatos = calcular_candidatos_ann(bncc, curriculo, curriculo_df, k=200, n_sondas=8, indice=indice)
+
+    esperado = encontrar_similaridade_balanceada(cosine_similarity(bncc, curriculo), bncc_df, curriculo_df, 0.5)
+    obtido = encontrar_similaridade_balanceada(candidatos, bncc_df, curriculo_df, 0.5)
+    assert _iguais(esperado, obtido)
+
+
+def test_disciplina_fora_das_sondas_nao_recalcula():
+    # Disciplinas presas a grupos: a maioria fica fora das listas sondadas de cada linha
+    rng = np.random.default_rng(4)
+    centros = rng.normal(size=(40, 64))
+    grupos = rng.integers(0, 40, size=4000)
+    curriculo = (centros[grupos] + 0.35 * rng.normal(size=(4000, 64))).astype(np.float32)
+    bncc = _agrupados(rng, 200)
+    curriculo_df = pd.DataFrame({
+        'DISCIPLINA': [f'DISCIPLINA {g % 10}' for g in grupos],
+        'HABILIDADES': [f"(C{i:05d}) habilidade {i}" for i in range(4000)],
+        'ORIENTACOES_PEDAGOGICAS': [f"orientação {i}" for i in range(4000)],
+    })
+    bncc_df = pd.DataFrame({
+        'EIXO': ['EIXO'] * 200,
+        'HABILIDADE': [f"(EF15LP{i:03d}) habilidade BNCC {i}" for i in range(200)],
+        'EXEMPLOS': ['exemplo'] * 200,
+    })
+    candidatos = calcular_candidatos_ann(normalize(bncc), normalize(curriculo), curriculo_df)
+    relatorio = encontrar_similaridade_balanceada(candidatos, bncc_df, curriculo_df, 0.8)
+
+    assert candidatos.recalculos < len(bncc) // 10
+    assert all(h['quantidade_similares'] >= 1 for h in relatorio)
+
+
+if __name__ == "__main__":
+    test_recall_cresce_com_as_sondas()
+    test_pq_reordena_com_nota_exata()
+    test_sondando_todas_as_listas_igual_ao_denso()
+    test_disciplina_fora_das_sondas_nao_recalcula()
+    print("✅ Testes do índice aproximado passaram!")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Testes da leitura do upload com validação do cabeçalho antes das linhas
+(core/leitura_upload.py)
+"""
+
+import os
+import sys
+import glob
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core import leitura_upload
+from core.leitura_upload import (ler_curriculo_enviado, ler_cabecalho, detectar_formato_csv,
+                                 ler_csv_em_blocos, ler_e_codificar_curriculo)
+from core.tabelas_parquet import COLUNAS_ANALISE
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _segmento(caminho):
+    return 'infantil' if 'inf' in os.path.basename(caminho).lower() else 'anos finais'
+
+
+def _esperado(df):
+    df.columns = df.columns.str.strip()
+    return df[[c for c in df.columns if c in COLUNAS_ANALISE]]
+
+
+@pytest.mark.parametrize('caminho', sorted(glob.glob(os.path.join(BASE_DIR, 'data', 'curriculo', '*.xlsx'))),
+                         ids=os.path.basename)
+def test_xlsx_igual_ao_read_excel(caminho):
+    pd.testing.assert_frame_equal(ler_curriculo_enviado(caminho, _segmento(caminho)),
+                                  _esperado(pd.read_excel(caminho)))
+
+
+def test_layout_errado_rejeitado_so_pelo_cabecalho(tmp_path, monkeypatch):
+    caminho = str(tmp_path / 'errado.xlsx')
+    pd.DataFrame({'COMPONENTE': ['x'] * 500, 'TEXTO': ['y'] * 500}).to_excel(caminho, index=False)
+
+    def falhar(*args, **kwargs):
+        raise AssertionError("as linhas não deveriam ser lidas")
+    monkeypatch.setattr(leitura_upload, '_ler_xlsx_colunas', falhar)
+    monkeypatch.setattr(leitura_upload.pd, 'read_excel', falhar)
+
+    assert ler_cabecalho(caminho) == ['COMPONENTE', 'TEXTO']
+    with pytest.raises(Exception, match='Colunas ausentes no arquivo do currículo'):
+        ler_curriculo_enviado(caminho, 'anos iniciais')
+
+
+def test_csv_com_ponto_e_virgula(tmp_path):
+    caminho = str(tmp_path / 'curriculo.csv')
+    df = pd.DataFrame({'ANO': ['1º', '2º'], ' DISCIPLINA ': ['ARTE', 'MATEMÁTICA'],
+                       'HABILIDADES': ['(EF15AR01) a', '(EF02MA01) b'],
+                       'ORIENTACOES_PEDAGOGICAS': ['o1', 'o2'], 'EXTRA': [1, 2]})
+    df.to_csv(caminho, sep=';', index=False)
+    lido = ler_curriculo_enviado(caminho, 'anos iniciais')
+    assert list(lido.columns) == ['ANO', 'DISCIPLINA', 'HABILIDADES', 'ORIENTACOES_PEDAGOGICAS']
+    assert lido['DISCIPLINA'].tolist() == ['ARTE', 'MATEMÁTICA']
+
+
+def test_csv_latin1_igual_ao_read_csv(tmp_path):
+    caminho = str(tmp_path / 'exportado.csv')
+    original = pd.read_excel(os.path.join(BASE_DIR, 'data', 'curriculo', 'ANOSINICIAIS_curriculo_normalizado.xlsx'))
+    original = original.apply(lambda c: c.str.encode('cp1252', 'replace').str.decode('cp1252'))
+    original.to_csv(caminho, sep=';', index=False, encoding='cp1252')
+
+    assert detectar_formato_csv(caminho) == ('cp1252', ';')
+    pd.testing.assert_frame_equal(ler_curriculo_enviado(caminho, 'anos iniciais'),
+                                  _esperado(pd.read_csv(caminho, sep=';', encoding='cp1252')))
+
+
+def test_csv_em_blocos_codifica_cada_bloco(tmp_path):
+    caminho = str(tmp_path / 'grande.csv')
+    original = pd.read_excel(os.path.join(BASE_DIR, 'data', 'curriculo', 'ANOSINICIAIS_curriculo_normalizado.xlsx'))
+    original.to_csv(caminho, index=False)
+    colunas = list(_esperado(original.copy()).columns)
+
+    blocos = list(ler_csv_em_blocos(caminho, colunas, bloco_bytes=64 * 1024))
+    assert len(blocos) > 3
+    pd.testing.assert_frame_equal(pd.concat(blocos), ler_curriculo_enviado(caminho, 'anos iniciais'))
+
+    tamanhos = []
+
+    def codificar(df):
+        tamanhos.append(len(df))
+        return df.index.to_numpy(dtype=float).reshape(-1, 1)
+    leitura_upload.BLOCO_CSV_BYTES, anterior = 64 * 1024, leitura_upload.BLOCO_CSV_BYTES
+    try:
+        df, embeddings = ler_e_codificar_curriculo(caminho, 'anos iniciais', codificar)
+    finally:
+        leitura_upload.BLOCO_CSV_BYTES = anterior
+    assert len(tamanhos) == len(blocos) and sum(tamanhos) == len(original)
+    assert embeddings[:, 0].tolist() == list(range(len(original)))
+    pd.testing.assert_frame_equal(df, pd.concat(blocos))
+
+
+def test_formato_nao_suportado(tmp_path):
+    with pytest.raises(Exception, match='Formato de arquivo não suportado'):
+        ler_curriculo_enviado(str(tmp_path / 'curriculo.ods'), 'infantil')
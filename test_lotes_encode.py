@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Testes dos lotes dinâmicos por comprimento (core/lotes_encode.py)
+"""
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core.lotes_encode import (codificar_em_lotes, planejar_lotes, estatisticas_padding,
+                               lotes_ordem_arquivo)
+
+
+class TokenizerPalavras:
+    def __call__(self, textos, **kwargs):
+        return {'input_ids': [t.split() for t in textos]}
+
+
+class ModeloRegistrador:
+    """Modelo falso: vetor = (nº de palavras, tamanho do texto); registra os lotes"""
+
+    tokenizer = TokenizerPalavras()
+    max_seq_length = None
+
+    def __init__(self):
+        self.lotes = []
+
+    def encode(self, textos, batch_size=32, show_progress_bar=False):
+        self.lotes.append(list(textos))
+        return np.array([[len(t.split()), len(t)] for t in textos], dtype=np.float32)
+
+
+def _textos():
+    rng = np.random.default_rng(0)
+    return [' '.join(['palavra'] * int(n)) + f' {i}' for i, n in enumerate(rng.integers(1, 120, size=300))]
+
+
+def test_resultado_na_ordem_original():
+    textos = _textos()
+    modelo = ModeloRegistrador()
+    resultado = codificar_em_lotes(modelo, textos, orcamento_tokens=1000, lote_maximo=64)
+    esperado = np.array([[len(t.split()), len(t)] for t in textos], dtype=np.float32)
+    np.testing.assert_array_equal(resultado, esperado)
+    assert sorted(t for lote in modelo.lotes for t in lote) == sorted(textos)
+
+
+def test_lotes_respeitam_orcamento():
+    comprimentos = np.array([len(t.split()) for t in _textos()])
+    lotes = planejar_lotes(comprimentos, orcamento_tokens=1000, lote_maximo=64)
+    assert sorted(np.concatenate(lotes).tolist()) == list(range(len(comprimentos)))
+    for lote in lotes:
+        assert len(lote) <= 64
+        assert len(lote) == 1 or len(lote) * comprimentos[lote].max() <= 1000
+    # Texto maior que o orçamento vai sozinho
+    assert [len(l) for l in planejar_lotes([5000, 10], orcamento_tokens=1000)] == [1, 1]
+
+
+def test_menos_padding_que_lote_fixo():
+    comprimentos = np.array([len(t.split()) for t in _textos()])
+    antes = estatisticas_padding(comprimentos, lotes_ordem_arquivo(len(comprimentos)))
+    depois = estatisticas_padding(comprimentos, planejar_lotes(comprimentos, orcamento_tokens=4096))
+    assert antes['tokens_reais'] == depois['tokens_reais']
+    assert depois['desperdicio_padding'] < antes['desperdicio_padding'] / 2
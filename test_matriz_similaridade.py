@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Testes da matriz de similaridade persistida (core/matriz_similaridade.py)
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core.matriz_similaridade import gravar_matriz, abrir_matriz
+from core.embeddings_compactos import normalizar, pontuar
+
+
+@pytest.fixture
+def dados():
+    gerador = np.random.default_rng(7)
+    bncc_embeddings = normalizar(gerador.normal(size=(600, 16)))
+    curriculo_embeddings = normalizar(gerador.normal(size=(40, 16)))
+    bncc_df = pd.DataFrame({'HABILIDADE': [f"(EF01LP{i:02d}) Habilidade {i}" for i in range(600)]})
+    curriculo_df = pd.DataFrame({'HABILIDADES': [f"(EF01MA{i:02d}) Linha {i}" for i in range(40)]})
+    return bncc_embeddings, curriculo_embeddings, bncc_df, curriculo_df
+
+
+def test_densa_e_em_blocos_gravam_a_mesma_matriz(tmp_path, dados):
+    bncc_embeddings, curriculo_embeddings, bncc_df, curriculo_df = dados
+    densa = pontuar(bncc_embeddings, curriculo_embeddings)
+    caminho_densa = gravar_matriz(str(tmp_path / 'densa'), densa, bncc_embeddings, curriculo_embeddings,
+                                  bncc_df, curriculo_df, 'anos iniciais', 'modelo')
+    caminho_blocos = gravar_matriz(str(tmp_path / 'blocos'), None, bncc_embeddings, curriculo_embeddings,
+                                   bncc_df, curriculo_df, 'anos iniciais', 'modelo')
+
+    a, b = abrir_matriz(caminho_densa), abrir_matriz(caminho_blocos)
+    assert isinstance(a.valores, np.memmap) and a.valores.dtype == np.float16
+    np.testing.assert_array_equal(a.valores, b.valores)
+    np.testing.assert_allclose(a.valores, densa, atol=1e-3)
+
+
+def test_fatias_por_codigo(tmp_path, dados):
+    bncc_embeddings, curriculo_embeddings, bncc_df, curriculo_df = dados
+    densa = pontuar(bncc_embeddings, curriculo_embeddings)
+    matriz = abrir_matriz(gravar_matriz(str(tmp_path / 'm'), densa, bncc_embeddings, curriculo_embeddings,
+                                        bncc_df, curriculo_df, 'anos iniciais', 'modelo', tipo='float32'))
+
+    assert matriz.shape == (600, 40)
+    np.testing.assert_array_equal(matriz.linha('(EF01LP03)'), densa[3])
+    np.testing.assert_array_equal(matriz.coluna(5), densa[:, 5])
+    trecho = matriz.trecho([1, 2], [0, 39])
+    assert list(trecho.index) == ['(EF01LP01)', '(EF01LP02)'] and list(trecho.columns) == ['(EF01MA00)', '(EF01MA39)']
+
+    melhores = matriz.mais_similares(curriculo='(EF01MA07)', limite=3)
+    assert [m['indice'] for m in melhores] == list(np.argsort(-densa[:, 7], kind='stable')[:3])
+    with pytest.raises(KeyError):
+        matriz.linha('(XX)')
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Equivalência entre o motor vetorizado e o motor de referência do algoritmo balanceado
+"""
+
+import os
+import sys
+import glob
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core.similarity import (
+    concat_features_bncc,
+    concat_features_curriculo,
+    encontrar_similaridade_balanceada,
+)
+from core.artefatos_bncc import resolver_arquivo_bncc
+
+DIRETORIO_CURRICULOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'curriculo')
+
+
+def _iguais(a, b):
+    """Comparação profunda que trata NaN == NaN e exige o mesmo tipo nos números"""
+    if isinstance(a, dict):
+        return isinstance(b, dict) and a.keys() == b.keys() and all(_iguais(a[k], b[k]) for k in a)
+    if isinstance(a, list):
+        return isinstance(b, list) and len(a) == len(b) and all(_iguais(x, y) for x, y in zip(a, b))
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, (float, np.floating)) and np.isnan(a):
+        return bool(np.isnan(b))
+    return a == b
+
+
+def _segmento(caminho, curriculo_df):
+    if 'OBJETIVO DE APRENDIZAGEM' in curriculo_df.columns:
+        return 'infantil'
+    return 'anos finais' if 'final' in os.path.basename(caminho).lower() else 'anos iniciais'
+
+
+def _similaridade_tfidf(bncc_df, curriculo_df):
+    """Similaridade sem modelo de IA (TF-IDF), em float32 como a do pipeline"""
+    textos_bncc = concat_features_bncc(bncc_df).fillna('').tolist()
+    textos_curriculo = concat_features_curriculo(curriculo_df).fillna('').tolist()
+    vetorizador = TfidfVectorizer().fit(textos_bncc + textos_curriculo)
+    return cosine_similarity(
+        vetorizador.transform(textos_bncc), vetorizador.transform(textos_curriculo)
+    ).astype(np.float32)
+
+
+def _comparar(grau, bncc_df, curriculo_df, nota_corte):
+    referencia = encontrar_similaridade_balanceada(grau, bncc_df, curriculo_df, nota_corte, motor='referencia')
+    vetorizado = encontrar_similaridade_balanceada(grau, bncc_df, curriculo_df, nota_corte, motor='vetorizado')
+    assert len(referencia) == len(vetorizado)
+    for i, (r, v) in enumerate(zip(referencia, vetorizado)):
+        assert _iguais(r, v), f"Divergência na habilidade BNCC {i}: {r} != {v}"
+    return referencia
+
+
+def test_equivalencia_nos_curriculos_de_exemplo():
+    arquivos = sorted(glob.glob(os.path.join(DIRETORIO_CURRICULOS, '*.xlsx')))
+    assert arquivos, "Nenhum currículo em data/curriculo/"
+    for caminho in arquivos:
+        curriculo_df = pd.read_excel(caminho)
+        bncc_df = pd.read_excel(resolver_arquivo_bncc(_segmento(caminho, curriculo_df)))
+        grau = _similaridade_tfidf(bncc_df, curriculo_df)
+        # 0.8 força as estratégias 2 e 3; 0.2 exercita a 1 e a 4
+        for nota_corte in (0.8, 0.2):
+            _comparar(grau, bncc_df, curriculo_df, nota_corte)
+
+
+def test_equivalencia_com_empates_e_codigos_repetidos():
+    rng = np.random.default_rng(7)
+    disciplinas = ['MATEMÁTICA', 'CIÊNCIAS', 'ARTE', 'GEOGRAFIA']
+    curriculo_df = pd.DataFrame({
+        'DISCIPLINA': [disciplinas[i % 4] for i in range(60)],
+        # Mesmo código em disciplinas diferentes e linhas sem código
+        'HABILIDADES': [f"(EF0{i % 5}MA{i % 12:02d}) habilidade {i}" if i % 7 else np.nan for i in range(60)],
+        'ORIENTACOES_PEDAGOGICAS': [f"orientação {i}" for i in range(60)],
+    })
+    bncc_df = pd.DataFrame({
+        'EIXO': ['EIXO'] * 25,
+        'HABILIDADE': [f"(EF15LP{i:02d}) habilidade BNCC {i}" for i in range(25)],
+        'EXEMPLOS': ['exemplo'] * 25,
+    })
+    # Poucos valores distintos para gerar muitos empates
+    grau = (rng.integers(0, 8, size=(25, 60)) / 10).astype(np.float32)
+    for nota_corte in (0.75, 0.5, 0.05):
+        _comparar(grau, bncc_df, curriculo_df, nota_corte)
+
+
+if __name__ == "__main__":
+    test_equivalencia_nos_curriculos_de_exemplo()
+    test_equivalencia_com_empates_e_codigos_repetidos()
+    print("✅ Motor vetorizado equivalente ao de referência!")
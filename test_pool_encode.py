@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Testes do pool de processos de codificação (core/pool_encode.py), com o backend
+offline 'hash' (não baixa pesos)
+"""
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core import pool_encode
+from core.modelos import obter_modelo, identificador_modelo
+
+
+def _textos(n):
+    return [f"DISCIPLINA {i % 7} | (EF0{i % 9}XX{i:03d}) habilidade número {i} " + "texto " * (i % 13)
+            for i in range(n)]
+
+
+def test_pool_igual_ao_processo_local():
+    identificador = identificador_modelo('qualquer@hash')
+    modelo = obter_modelo(identificador)
+    textos = _textos(250)
+    try:
+        paralelo = pool_encode.codificar_paralelo(modelo, textos, identificador, processos=2, min_linhas=0)
+        assert pool_encode.obter_pool(identificador).processos == 2
+    finally:
+        pool_encode.encerrar_pools()
+    np.testing.assert_array_equal(paralelo, modelo.encode(textos))
+
+
+def test_abaixo_do_limiar_nao_cria_pool():
+    identificador = identificador_modelo('qualquer@hash')
+    modelo = obter_modelo(identificador)
+    textos = _textos(10)
+    resultado = pool_encode.codificar_paralelo(modelo, textos, identificador, processos=4, min_linhas=100)
+    assert identificador not in pool_encode._pools
+    np.testing.assert_array_equal(resultado, modelo.encode(textos))
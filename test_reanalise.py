@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Testes da reanálise incremental de uma nova versão do currículo (core/reanalise.py)
+"""
+
+import os
+import sys
+import threading
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core import reanalise
+from core.reanalise import reanalisar_curriculo, relatorio_mudancas, gravar_versao, carregar_versao
+from core.similarity import process_uploaded_file
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_relatorio_mudancas():
+    anteriores = pd.DataFrame({'bncc_indice': [1, 1, 2], 'bncc_codigo': ['A', 'A', 'B'],
+                               'curriculo_codigo': ['x', 'y', 'z'], 'similaridade': [0.9, 0.8, 0.7],
+                               'curriculo_hash': ['hx', 'hy', 'hz']})
+    novos = pd.DataFrame({'bncc_indice': [1, 2, 2], 'bncc_codigo': ['A', 'B', 'B'],
+                          'curriculo_codigo': ['x', 'z', 'w'], 'similaridade': [0.9, 0.7, 0.75],
+                          'curriculo_hash': ['hx', 'hz', 'hw']})
+    mudancas = relatorio_mudancas(anteriores, novos, ['hx', 'hy', 'hz'], ['hx', 'hz', 'hw'])
+    assert mudancas[['bncc_indice', 'situacao', 'curriculo_codigo', 'linha']].values.tolist() == [
+        [1, 'saiu', 'y', 'removida'],
+        [2, 'entrou', 'w', 'nova'],
+    ]
+
+
+def test_gravacoes_simultaneas_da_mesma_chave(tmp_path):
+    diretorio = str(tmp_path / 'versoes' / 'anos_iniciais' / 'rede')
+    matches = pd.DataFrame({'bncc_indice': [1], 'curriculo_hash': ['h0']})
+    erros = []
+
+    def gravar(n):
+        try:
+            for i in range(15):
+                meta = {'formato': reanalise.VERSAO_FORMATO, 'modelo': 'm', 'bncc': 'b', 'gravacao': (n, i)}
+                embeddings = np.full((4, 8), n + 1, dtype=np.float32)
+                gravar_versao(diretorio, meta, [f'h{j}' for j in range(4)], embeddings, None, matches)
+        except Exception as e:
+            erros.append(e)
+
+    threads = [threading.Thread(target=gravar, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert erros == []
+    versao = carregar_versao(diretorio, 'm', 'b')
+    assert versao is not None and len(versao['hashes']) == 4
+    # Só a versão final fica na pasta do segmento (temporárias e antigas removidas)
+    assert os.listdir(os.path.dirname(diretorio)) == ['rede']
+
+
+def test_segunda_versao_igual_a_analise_completa(tmp_path, ambiente_offline):
+    curriculo = pd.read_excel(os.path.join(BASE_DIR, 'data', 'curriculo', 'ANOSINICIAIS_curriculo_normalizado.xlsx'))
+    v1 = curriculo[curriculo['ANO'] == '2º Ano'].reset_index(drop=True)
+    v2 = v1.drop(index=[5, 6]).copy()
+    v2.loc[10, 'HABILIDADES'] = f"{v2.loc[10, 'HABILIDADES']} com produção de cartazes"
+    v2 = pd.concat([v2, curriculo[curriculo['ANO'] == '3º Ano'].head(2)], ignore_index=True)
+    v1.to_excel(tmp_path / 'v1.xlsx', index=False)
+    v2.to_excel(tmp_path / 'v2.xlsx', index=False)
+
+    primeira = reanalisar_curriculo(str(tmp_path / 'v1.xlsx'), 'anos iniciais', 0.8, 'Rede Teste')
+    segunda = reanalisar_curriculo(str(tmp_path / 'v2.xlsx'), 'anos iniciais', 0.8, 'Rede Teste')
+    completa = process_uploaded_file(str(tmp_path / 'v2.xlsx'), 'anos iniciais', 0.8)
+    for resultado in (primeira, segunda, completa):
+        ambiente_offline.extend(c for c in resultado['files'].values() if c)
+
+    assert primeira['files']['mudancas'] is None
+    assert (segunda['resumo']['linhas_reaproveitadas'], segunda['resumo']['linhas_novas'],
+            segunda['resumo']['linhas_removidas']) == (len(v2) - 3, 3, 3)
+    pd.testing.assert_frame_equal(pd.read_csv(os.path.join(BASE_DIR, segunda['files']['csv'])),
+                                  pd.read_csv(os.path.join(BASE_DIR, completa['files']['csv'])))
+
+    mudancas = pd.read_csv(os.path.join(BASE_DIR, segunda['files']['mudancas']))
+    assert set(mudancas['situacao']) <= {'saiu', 'entrou'}
+    assert mudancas['bncc_indice'].nunique() == segunda['resumo']['bncc_com_mudanca']
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Testes do armazenamento de resultados por análise (core/resultados_analises.py)
+"""
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core import resultados_analises
+from core.resultados_analises import ResultadosAnalises
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+def _resultado(texto='resumo', detalhado='detalhado', files=None):
+    return {
+        'resumo': {'total_bncc': 10},
+        'files': files or {},
+        'top_matches': [{'bncc_codigo': '(EF01LP01)', 'similaridade': 0.9}],
+        'relatorios': {'resumo_executivo': texto, 'relatorio_detalhado': detalhado},
+    }
+
+
+def test_guarda_e_serve_da_memoria():
+    armazem = ResultadosAnalises()
+    armazem.guardar('a', _resultado(), {'segmento': 'infantil', 'nota_corte': 0.8})
+    guardado = armazem.obter('a')
+    assert guardado.resumo == {'total_bncc': 10}
+    assert guardado.parametros == {'segmento': 'infantil', 'nota_corte': 0.8}
+    # Sem caminho em 'files': o texto só pode vir da memória
+    assert (guardado.relatorio('executive'), guardado.relatorio('detailed')) == ('resumo', 'detalhado')
+    assert armazem.obter('b') is None
+
+
+def test_expira_pelo_ttl():
+    relogio = Relogio()
+    armazem = ResultadosAnalises(ttl=60, relogio=relogio)
+    armazem.guardar('a', _resultado())
+    relogio.agora = 59
+    assert armazem.obter('a') is not None
+    relogio.agora = 61
+    assert armazem.obter('a') is None and len(armazem) == 0
+
+
+def test_descarta_o_menos_usado_acima_do_limite():
+    texto = 'x' * 1000
+    armazem = ResultadosAnalises(limite_memoria=3500)
+    for id_analise in ('a', 'b', 'c'):
+        armazem.guardar(id_analise, _resultado(texto))
+    assert armazem.obter('a') is not None  # 'a' passa a ser o mais recente
+    armazem.guardar('d', _resultado(texto))
+    assert armazem.obter('b') is None
+    assert all(armazem.obter(i) is not None for i in ('a', 'c', 'd'))
+    # Um resultado sozinho acima do limite continua guardado
+    pequeno = ResultadosAnalises(limite_memoria=10)
+    pequeno.guardar('a', _resultado(texto))
+    assert pequeno.obter('a') is not None
+
+
+def test_texto_grande_fica_no_disco(tmp_path, monkeypatch):
+    monkeypatch.setattr(resultados_analises, 'BASE_DIR', str(tmp_path))
+    (tmp_path / 'detalhado.txt').write_text('d' * 100, encoding='utf-8')
+    armazem = ResultadosAnalises(limite_texto=50)
+    guardado = armazem.guardar('a', _resultado('curto', 'd' * 100, {'relatorio_detalhado': 'detalhado.txt'}))
+    assert set(guardado.relatorios) == {'executive'}
+    assert guardado.relatorio('detailed') == 'd' * 100
+    os.remove(tmp_path / 'detalhado.txt')
+    assert guardado.relatorio('detailed') is None
+    with pytest.raises(KeyError):
+        guardado.relatorio('outro')
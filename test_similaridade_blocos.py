@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Modo em blocos (top-k por disciplina) x matriz densa no algoritmo balanceado
+"""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+from sklearn.metrics.pairwise import cosine_similarity
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core.similarity import encontrar_similaridade_balanceada
+from core.similaridade_blocos import calcular_candidatos_topk, escolher_modo_similaridade
+from test_motor_balanceado import _iguais
+
+
+def _embeddings_exatos(rng, quantidade):
+    """
+    Vetores unitários com entradas ±0.25 (16 não nulas em 32 dimensões): normas e
+    produtos internos são exatos em float32, então blocos de qualquer tamanho dão
+    exatamente as mesmas notas da matriz densa (e há muitos empates)
+    """
+    vetores = np.zeros((quantidade, 32), dtype=np.float32)
+    for i in range(quantidade):
+        posicoes = rng.choice(32, size=16, replace=False)
+        vetores[i, posicoes] = rng.choice([-0.25, 0.25], size=16)
+    return vetores
+
+
+def _dados(rng, total_curriculo=120, total_bncc=40):
+    disciplinas = ['MATEMÁTICA', 'CIÊNCIAS', 'ARTE', 'HISTÓRIA', 'GEOGRAFIA']
+    curriculo_df = pd.DataFrame({
+        'DISCIPLINA': [disciplinas[i % 5] if i % 11 else 'ARTE' for i in range(total_curriculo)],
+        'HABILIDADES': [f"(EF0{i % 5}MA{i % 40:02d}) habilidade {i}" for i in range(total_curriculo)],
+        'ORIENTACOES_PEDAGOGICAS': [f"orientação {i}" for i in range(total_curriculo)],
+    })
+    bncc_df = pd.DataFrame({
+        'EIXO': ['EIXO'] * total_bncc,
+        'HABILIDADE': [f"(EF15LP{i:02d}) habilidade BNCC {i}" for i in range(total_bncc)],
+        'EXEMPLOS': ['exemplo'] * total_bncc,
+    })
+    bncc = _embeddings_exatos(rng, total_bncc)
+    # Parte do currículo repete vetores da BNCC para haver notas altas
+    curriculo = _embeddings_exatos(rng, total_curriculo)
+    curriculo[::7] = bncc[rng.integers(0, total_bncc, size=len(curriculo[::7]))]
+    return bncc_df, curriculo_df, bncc, curriculo
+
+
+def test_topk_igual_a_matriz_densa():
+    rng = np.random.default_rng(3)
+    bncc_df, curriculo_df, bncc, curriculo = _dados(rng)
+    densa = cosine_similarity(bncc, curriculo)
+
+    # k pequeno força listas esgotadas e empates na fronteira (recalculo da linha)
+    for k in (1, 3, 200):
+        for nota_corte in (0.8, 0.3):
+            candidatos = calcular_candidatos_topk(bncc, curriculo, curriculo_df, k=k, orcamento_mb=0.001)
+            esperado = encontrar_similaridade_balanceada(densa, bncc_df, curriculo_df, nota_corte, motor='referencia')
+            obtido = encontrar_similaridade_balanceada(candidatos, bncc_df, curriculo_df, nota_corte)
+            assert _iguais(esperado, obtido)
+            if k == 200:
+                assert candidatos.recalculos == 0
+
+
+def test_listas_topk_ordenadas_e_compactas():
+    rng = np.random.default_rng(5)
+    bncc_df, curriculo_df, bncc, curriculo = _dados(rng)
+    densa = cosine_similarity(bncc, curriculo)
+    candidatos = calcular_candidatos_topk(bncc, curriculo, curriculo_df, k=4, orcamento_mb=0.001)
+
+    for d, disciplina in enumerate(candidatos.curriculo.disciplinas):
+        colunas, notas = candidatos.colunas[d], candidatos.notas[d]
+        assert colunas.dtype == np.int32 and notas.dtype == np.float32 and colunas.shape == (40, 4)
+        posicoes = np.flatnonzero(curriculo_df['DISCIPLINA'].values == disciplina)
+        for i in range(len(bncc)):
+            # As k maiores notas, ordenadas por nota e posição (empatadas com a k-ésima
+            # podem ficar de fora: o algoritmo recalcula a linha nesse caso)
+            assert np.array_equal(notas[i], np.sort(densa[i, posicoes])[::-1][:4])
+            assert np.array_equal(notas[i], densa[i, colunas[i]])
+            assert list(colunas[i]) == sorted(colunas[i], key=lambda p: (-densa[i, p], p))
+
+
+def test_escolha_automatica_pelo_orcamento():
+    assert escolher_modo_similaridade(50, 1000, orcamento_mb=1, modo='auto') == 'densa'
+    assert escolher_modo_similaridade(50, 100_000, orcamento_mb=1, modo='auto') == 'blocos'
+    assert escolher_modo_similaridade(50, 100_000, orcamento_mb=1, modo='densa') == 'densa'
+
+
+if __name__ == "__main__":
+    test_topk_igual_a_matriz_densa()
+    test_listas_topk_ordenadas_e_compactas()
+    test_escolha_automatica_pelo_orcamento()
+    print("✅ Modo em blocos equivalente à matriz densa!")
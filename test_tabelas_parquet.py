@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Testes do cache Parquet das planilhas de referência (core/tabelas_parquet.py)
+"""
+
+import os
+import sys
+import shutil
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from core import tabelas_parquet
+from core.tabelas_parquet import ler_planilha, COLUNAS_ANALISE
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def planilha(tmp_path, monkeypatch):
+    monkeypatch.setattr(tabelas_parquet, 'DIRETORIO_PARQUET', str(tmp_path / 'parquet'))
+    destino = tmp_path / 'bncc.xlsx'
+    shutil.copy(os.path.join(BASE_DIR, 'bncc_df_anosiniciais.xlsx'), destino)
+    return str(destino)
+
+
+def _proibir_excel(monkeypatch):
+    def falhar(*args, **kwargs):
+        raise AssertionError("read_excel não deveria ser chamado")
+    monkeypatch.setattr(tabelas_parquet.pd, 'read_excel', falhar)
+
+
+def test_leitura_igual_ao_excel_e_reaproveitada(planilha, monkeypatch):
+    original = pd.read_excel(planilha)
+    pd.testing.assert_frame_equal(ler_planilha(planilha), original)
+
+    _proibir_excel(monkeypatch)
+    pd.testing.assert_frame_equal(ler_planilha(planilha), original)
+    # mtime novo com o mesmo conteúdo: confere o hash e continua no Parquet
+    os.utime(planilha, ns=(0, 10**18))
+    pd.testing.assert_frame_equal(ler_planilha(planilha), original)
+
+
+def test_conteudo_alterado_invalida(planilha):
+    ler_planilha(planilha)
+    alterada = pd.read_excel(planilha)
+    alterada.loc[0, 'HABILIDADE'] = 'habilidade editada'
+    alterada.to_excel(planilha, index=False)
+    assert ler_planilha(planilha).loc[0, 'HABILIDADE'] == 'habilidade editada'
+
+
+def test_apenas_colunas_pedidas(planilha):
+    df = ler_planilha(planilha, COLUNAS_ANALISE)
+    assert list(df.columns) == [c for c in pd.read_excel(planilha).columns if c in COLUNAS_ANALISE]
+    assert list(ler_planilha(planilha, ['EIXO', 'INEXISTENTE']).columns) == ['EIXO']
+
+
+@pytest.mark.parametrize('cache_ativo', [True, False])
+def test_colunas_com_espacos_no_cabecalho(planilha, monkeypatch, cache_ativo):
+    monkeypatch.setattr(tabelas_parquet, 'CACHE_PARQUET_ATIVO', cache_ativo)
+    original = pd.read_excel(planilha)
+    original.rename(columns={'HABILIDADE': 'HABILIDADE ', 'EIXO': ' EIXO'}).to_excel(planilha, index=False)
+    df = ler_planilha(planilha, ['EIXO', 'HABILIDADE'])
+    # Cabeçalhos devolvidos como na planilha; quem chama faz o strip
+    assert list(df.columns) == [c for c in pd.read_excel(planilha).columns if c.strip() in ('EIXO', 'HABILIDADE')]
+    assert df.columns.str.strip().tolist() == [c for c in original.columns if c in ('EIXO', 'HABILIDADE')]